@@ -1,8 +1,20 @@
+import math
+
 import streamlit as st
-from supabase import create_client
 import pandas as pd
 from datetime import datetime
 
+from qa_scorecard.db import get_client
+from qa_scorecard.scorecards import SCORING_CARDS, TEAM_CONSULTANTS_MAP, TEAM_DEPARTMENT_MAP
+from qa_scorecard.anomaly import describe_alert, get_detector
+from qa_scorecard.audit_import import build_audit, parse_answer_keys, write_audits
+from qa_scorecard.data_store import AUDITS, record_audits, store
+from qa_scorecard.dedupe import CONFLICT, DUPLICATE, NEW, get_duplicate_index
+from qa_scorecard.queries import SORTABLE_COLUMNS, fetch_audit_page
+from qa_scorecard.resilience import BackendDegraded
+from qa_scorecard.search import search_audits
+from qa_scorecard.ui import live_updates, stale_data_notice
+
 # =================== STREAMLIT PAGE CONFIG ===================
 st.set_page_config(
     page_title="QA Scorecard System",
@@ -11,220 +23,26 @@ st.set_page_config(
 )
 
 # =================== SUPABASE CONNECTION ===================
-@st.cache_resource
-def init_connection():
-    url = st.secrets["SUPABASE_URL"]
-    key = st.secrets["SUPABASE_KEY"]
-    return create_client(url, key)
-
-supabase = init_connection()
-
-# =================== DATA STRUCTURES ===================
-TEAM_DEPARTMENT_MAP = {
-    "Sipho Ramashiya": "Digital Support",
-    "Anita Maharaj": "ARQ",
-    "Palesa Maponya": "ARQ",
-    "Neo Thobejane": "ARQ",
-    "Garth Masekele": "ARQ",
-    "Sue Darrol": "DVQ (KYC)",
-    "Rethabile Nkadimeng": "Assessment",
-    "Theo Sambinda": "Confirmations",
-    "Pacience Mashigo": "Dialler",
-    "Bradlee Naidoo": "ARQ"
-}
-
-TEAM_CONSULTANTS_MAP = {
-    "Sipho Ramashiya": [
-        "Aobakwe Peter", "Daychannel Jasson", "Diyajal Ramesar",
-        "Golden Raphulu", "Karabo Ratau", "Moreen Nkosi"
-    ],
-    "Anita Maharaj": [
-        "Bongani Sekese", "Chriselda Silubane", "Jeanerty Jiyane",
-        "Martin Kwinda", "Molatelo Mohlapamaswi", "Nokwethaba Buthelezi",
-        "Ntudiseng Komane", "Qaqamba Somdakakazi", "Rudzani Ratshumana",
-        "Ryle Basaviah", "Shamla Shilubane"
-    ],
-    "Palesa Maponya": [
-        "Kgosietsile Seleke", "Lerato Lepuru", "Matome Sekhaolelo",
-        "Mpho Ramadwa", "Precious Tlaka", "Pumzile Siko",
-        "Refilwe Mokgonyana", "Sholeen Franklin", "Sylvia Letsiane",
-        "Thulie Khumalo", "Vuyelwa Mayekiso"
-    ],
-    "Neo Thobejane": [ 
-        "Anna Sekhaolelo", "Joseph Rameetse", "Neria Mohlapamaswi", 
-        "Ndifhadza Modau", "Nirvana Rampersad", "Nonkqubela Maganga", 
-        "Phelepine Mogaila", "Prince Mabuza", "Refiloe Mohlokoone", 
-        "Thando Simelane", "Busi Khanyeza" 
-    ], 
-    "Garth Masekele": [ 
-        "Bandile Khumalo", "Basetsana Eva Masombuka", "Bathabile Mathunjwa", 
-        "Charmaine Sambo", "Charmaine Samuel", "Gadija Wilson", 
-        "Gladys Thembi Matshiga", "Emily Thandzwane", "Mpho Makgoba", 
-        "Sibonelo Phakathi", "Terence Dyssel" 
-    ],
-    "Sue Darrol": [
-        "Bafikile Bungane", "Candice Julius", "Constance Mashele", 
-        "Dimpho Gaoletswe (Maaroganye)", "Lindiwe Mazwe", 
-        "Moleboheng Mafereka", "Portia Mashego", "Tirsa Wentzel", 
-        "Veronicque Wilson", "Prince Masengane", "Thabiso Mokgotsi", 
-        "Velancia Parker"
-    ],
-    "Rethabile Nkadimeng": [
-        "Bafedile Komane", "Celine Kelly", "Constantia Makgalia", 
-        "Ernest Mthembu", "Eulenda Mduli", "Londeka Mdodana", 
-        "Mathabo Makgopa", "Memory Mpofu", "Ndamulelo Makhado", 
-        "Pheladi Rameetse", "Margaret Matlala" 
-    ],
-    "Theo Sambinda": [ 
-        "Choene Mojela (Jenny)", "Cynthia Masiya", "Gracious Tshabalala", 
-        "Jeanette Thobane", "Kwena Mojela (Lilian)", "Martha Sangweni", 
-        "Metlholo Koki", "Thembi Hlongwane", "Unathi Mbuli", 
-        "Nokuthela Mashiloane", "Phikisiwe Mthembu"
-    ], 
-    "Pacience Mashigo": [ 
-        "Ayanda Booi", "Claudia Malatji", "Dineo Maija", 
-        "Kelly Leso", "Keseabetswe Sebatakgomo", 
-        "Thando Ngcanga", "Wiseman Zimemo", 
-        "Faith Sekano", "Marika Redelinghuys"
-    ], 
-    "Bradlee Naidoo": [ 
-        "Kekeletso Tokeng", "Kgotso Mavhunga", 
-        "Lerato Mongolo", "Maud Phosa", "Nwabisa Mjobo", 
-        "Vincent Bhengu", "Zwanga Nndwammbi", 
-        "Claudia Malatji", "Qondile Zulu"
-    ]
-}
-    
-    # ... add other team leader consultants similarly
-
-SCORING_CARDS = {
-    "Digital Support": {
-        "name": "Digital Support QA Scorecard",
-        "questions": {
-            1: "Was the consultant Friendly & Professional towards the customer?",
-            2: "Did the consultant correctly validate the customer? (POPI Act)",
-            3: "Was the consultant Actively Listening to the customer?",
-            4: "Did the consultant display Empathy?",
-            5: "Were notes placed on every interaction?",
-            6: "Was the Hold Process followed correctly?",
-            7: "Was the call transferred to the appropriate Dept?",
-            8: "Did the consultant assist the client to navigate correctly?",
-            9: "Was the Pin/Password reset process followed?",
-            10: "Was the Branch referral correct?",
-            11: "Did the agent call back the client?",
-            12: "Was Self-Service Promoted?"
-        },
-        "critical_questions": [2, 10]
-    },
-    "ARQ": {
-        "name": "ARQ Department QA Scorecard",
-        "questions": {
-            1: "Were all documents verified to be in the customers name?",
-            2: "Was the payslip and bank statement information clear and visible?",
-            3: "Was the bank statement validated with OBS/SkyQR/FNB Website?",
-            4: "Did the agent write clear notes when suspending the application?",
-            5: "Did the agent confirm flags before approving?",
-            6: "Was income captured correctly?",
-            7: "Was all incomes captured correctly according to the payslip?",
-            8: "Were the documents checked for fraudulent indications?",
-            9: "Was the application suspended correctly?",
-            10: "Was Net2/Net3 salary captured correctly?",
-            11: "Were all required signatures obtained?",
-            12: "Was the ARQ checklist fully completed?"
-        },
-        "critical_questions": [3, 6, 10]
-    },
-    "DVQ (KYC)": {
-        "name": "DVQ (KYC) Department QA Scorecard",
-        "questions": {
-            1: "Were the customers names and surnames captured?",
-            2: "Was the application approved/suspended correctly?",
-            3: "Was the ID Document run through Sprint Hive?",
-            4: "Does the Sprint Hive outcome and suspension reason match?",
-            5: "Were there clear notes made when suspending for additional documents?",
-            6: "Bank Statements: 3 salary deposits verified?",
-            7: "OBS Banks: consultant reference checked Sybrin?",
-            8: "Were all documents verified to be in the customers name?",
-            9: "Was the employment confirmation letter requested?",
-            10: "Did the agent refer the application correctly?",
-            11: "Was the payslip and bank statement information clear?",
-            12: "Were any red flags properly escalated?"
-        },
-        "critical_questions": [3, 4, 7]
-    },
-    "Assessment": { 
-        "name": "Assessment Department QA Scorecard", 
-        "questions": { 
-            1: "Q1: Was the assessment scope clearly defined?", 
-            2: "Q2: Were assessment criteria applied correctly?", 
-            3: "Q3: Was the assessment thorough and complete?", 
-            4: "Q4: Were findings properly documented?", 
-            5: "Q5: Were recommendations clear and actionable?", 
-            6: "Q6: Was the assessment delivered on time?", 
-            7: "Q7: Was client feedback incorporated?", 
-            8: "Q8: Were risks properly evaluated?", 
-            9: "Q9: Was the assessment report professional?", 
-            10: "Q10: Were follow-up assessments scheduled if needed?", 
-            11: "Q11: Was the assessment methodology appropriate?", 
-            12: "Q12: Were all stakeholders properly informed?" 
-        }, 
-        "critical_questions": []
-    },
-    "Confirmations": { 
-        "name": "Confirmations Department QA Scorecard", 
-        "questions": { 
-            1: "Q1: Did the Agent validate clients ID and employee numbers to HR?", 
-            2: "Q2: Did the Agent verify client's employment status i.e. perm or temp?", 
-            3: "Q3: Did the Agent verify client company name?", 
-            4: "Q4: Did the Agent verify client's employment dates?", 
-            5: "Q5: Did the Agent verify client's salary payment dates including when they get paid when it falls on weekend and public holiday?", 
-            6: "Q6: Did the Agent verify if there is any possible retrenchment within the company?", 
-            7: "Q7: Did the Agent obtain HR/manager/payroll personnel name and surname explaining the significance in obtain the particulars?", 
-            8: "Q8: Did the agent confirm the company email address?", 
-            9: "Q9: Were follow-ups documented?", 
-            10: "Q10: Was feedback from confirmations actioned?", 
-            11: "Q11: Were all compliance requirements met?", 
-            12: "Q12: Was the confirmation process efficient?" 
-        }, 
-        "critical_questions": []
-    },
-    "Dialler": { 
-        "name": "Dialler Department QA Scorecard", 
-        "questions": { 
-            1: "Q1: Regulatory statement (African is a financial services provider…) ⚠️", 
-            2: "Q2: ID & V (authenticate the customer correctly) ⚠️", 
-            3: "Q3: Did the consultant speak clear, audible and polite tone/accent without interruptions?", 
-            4: "Q4: Did the consultant inform/assist with different platforms of sending documents?", 
-            5: "Q5: Did the consultant confirm receival of documents?", 
-            6: "Q6: Did the consultant confirm and communicate clearly what is outstanding? Referred to the notes on Exactus?", 
-            7: "Q7: Defining what will be the next steps to the application?", 
-            8: "Q8: How the customer can check on the status of their application?", 
-            9: "Q9: Was call disposition accurately recorded?", 
-           10: "Q10: Were customer objections handled professionally?", 
-           11: "Q11: Was the customer experience positive?", 
-           12: "Q12: Were all compliance requirements met during calls?" 
-        }, 
-        "critical_questions": [1, 2]
-    }
-    # Add other departments similarly...
-}
+supabase = get_client()
 
 # =================== HELPER FUNCTIONS ===================
-def calculate_score(answers, critical_questions):
-    """ Calculate total score; total = 0 if any critical = 'No' """
-    for q in critical_questions:
-        if answers.get(f"q{q}") == "No":
-            return 0
-    total = 0
-    max_possible = 0
-    for i in range(1, 13):
-        ans = answers.get(f"q{i}", "NA")
-        if ans == "NA":
-            continue
-        max_possible += 1
-        if ans == "Yes":
-            total += 1
-    return round((total / max_possible) * 100, 2) if max_possible else 0
+@st.cache_data(ttl=300, max_entries=500, show_spinner=False)
+def fetch_audit_page_cached(data_version, page, page_size, sort_by, descending,
+                            filters, search, start_date, end_date):
+    """One page of audits, cached per data version so flipping back is instant"""
+    return fetch_audit_page(page, page_size, sort_by, descending, dict(filters),
+                            search, start_date, end_date)
+
+def fetch_audit_page_or_last(page, *page_args):
+    """``(rows, total, stale)``; the last page shown stands in while the backend is degraded"""
+    try:
+        rows, total = fetch_audit_page_cached(store.version(AUDITS), page, *page_args)
+    except BackendDegraded:
+        if "last_view_result" not in st.session_state:
+            raise
+        return (*st.session_state.last_view_result, True)
+    st.session_state.last_view_result = (rows, total)
+    return rows, total, False
 
 # =================== SESSION STATE ===================
 if 'selected_team_leader' not in st.session_state:
@@ -233,9 +51,13 @@ if 'selected_department' not in st.session_state:
     st.session_state.selected_department = None
 if 'available_consultants' not in st.session_state:
     st.session_state.available_consultants = []
+if 'rapid_queue' not in st.session_state:
+    st.session_state.rapid_queue = []
 
 # =================== APP LAYOUT ===================
 st.title("🎯 QA Scoring Dashboard")
+live_updates()
+stale_data_notice()
 
 tab1, tab2, tab3, tab4 = st.tabs([
     "➕ New Audit", 
@@ -247,6 +69,11 @@ tab1, tab2, tab3, tab4 = st.tabs([
 # ------------------- TAB 1: NEW AUDIT -------------------
 with tab1:
     st.header("New Audit")
+    rapid_mode = st.toggle(
+        "⚡ Rapid entry",
+        key="rapid_entry",
+        help="Type all twelve answers as keys, queue several audits and send them together."
+    )
 
     # Step 1: Team Leader selection
     team_leader = st.selectbox(
@@ -255,7 +82,90 @@ with tab1:
         index=0,
         key="team_leader_widget"
     )
-    if team_leader:
+    if team_leader and rapid_mode:
+        # Everything below lives in one form, so nothing reruns until it is submitted
+        department = TEAM_DEPARTMENT_MAP.get(team_leader)
+        st.session_state.selected_department = department
+        scoring_card = SCORING_CARDS.get(department)
+        st.success(department)
+        if scoring_card:
+            with st.expander(f"{scoring_card['name']} — answer keys", expanded=False):
+                st.markdown("\n".join(
+                    f"{i}. {scoring_card['questions'][i]}" for i in range(1, 13)
+                ))
+                st.caption("Type one key per question in order: **y** = Yes, **n** = No, "
+                           "**a** or **-** = NA (spaces are ignored), e.g. `yyyy nyyy a-yy`.")
+
+        # A fresh form (new widget keys) only once a row is queued, so a
+        # rejected entry keeps what was typed
+        form_id = st.session_state.setdefault("rapid_form_generation", 0)
+        with st.form(f"rapid_entry_form_{form_id}"):
+            r_col1, r_col2 = st.columns(2)
+            with r_col1:
+                rapid_consultant = st.selectbox(
+                    "Consultant", sorted(TEAM_CONSULTANTS_MAP.get(team_leader, [])),
+                    key=f"rapid_consultant_{form_id}"
+                )
+                rapid_client_id = st.text_input("Client ID", key=f"rapid_client_id_{form_id}")
+            with r_col2:
+                rapid_date = st.date_input("Audit Date", value=datetime.now(), key=f"rapid_date_{form_id}")
+                rapid_time = st.time_input("Audit Time", value=datetime.now().time(), key=f"rapid_time_{form_id}")
+            rapid_keys = st.text_input("Answers (12 keys)", placeholder="yyyynyyyayyy", key=f"rapid_keys_{form_id}")
+            rapid_comments = st.text_input("Comments", key=f"rapid_comments_{form_id}")
+            add_to_queue = st.form_submit_button("Add to queue (Enter)")
+        if "rapid_queued" in st.session_state:
+            st.toast(st.session_state.pop("rapid_queued"))
+
+        if add_to_queue:
+            try:
+                if not (rapid_consultant and rapid_client_id.strip() and scoring_card):
+                    raise ValueError("Consultant, client ID and a scorecard are required")
+                row = build_audit(
+                    team_leader, department, rapid_consultant, rapid_client_id.strip(),
+                    datetime.combine(rapid_date, rapid_time).isoformat(),
+                    parse_answer_keys(rapid_keys), rapid_comments
+                )
+                status, existing_id = get_duplicate_index(department).classify(row)
+                queued_keys = {q["dedupe_key"] for q in st.session_state.rapid_queue}
+                if status != NEW:
+                    st.warning(f"Audit #{existing_id} already covers this consultant, client and time; not queued.")
+                elif row["dedupe_key"] in queued_keys:
+                    st.warning("That audit is already in the queue.")
+                else:
+                    st.session_state.rapid_queue.append(row)
+                    st.session_state.rapid_queued = f"Queued {rapid_consultant} / {row['client_id']}: {row['score']}%"
+                    st.session_state.rapid_form_generation += 1
+                    st.rerun()
+            except ValueError as e:
+                st.error(str(e))
+
+        if "rapid_notice" in st.session_state:
+            st.success(st.session_state.pop("rapid_notice"))
+        queue = st.session_state.rapid_queue
+        if queue:
+            st.dataframe(
+                pd.DataFrame(queue)[["consultant", "client_id", "audit_date", "score", "comments"]],
+                hide_index=True, use_container_width=True
+            )
+            q_col1, q_col2 = st.columns(2)
+            with q_col1:
+                if st.button(f"Submit {len(queue)} queued audit(s)", type="primary", use_container_width=True):
+                    try:
+                        # One batched upsert; the unique dedupe_key skips anything stored meanwhile
+                        stored = write_audits(queue, ignore_duplicates=True)
+                        skipped = len(queue) - len(stored)
+                        st.session_state.rapid_queue = []
+                        st.session_state.rapid_notice = f"Submitted {len(stored)} audit(s)." + (
+                            f" {skipped} were already stored." if skipped else "")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error submitting audits: {e}")
+            with q_col2:
+                if st.button("Clear queue", use_container_width=True):
+                    st.session_state.rapid_queue = []
+                    st.rerun()
+
+    elif team_leader:
         st.session_state.selected_team_leader = team_leader
         st.session_state.selected_department = TEAM_DEPARTMENT_MAP.get(team_leader)
         st.session_state.available_consultants = TEAM_CONSULTANTS_MAP.get(team_leader, [])
@@ -301,40 +211,156 @@ with tab1:
             if not (team_leader and consultant and client_id and scoring_card):
                 st.error("Please complete all required fields")
             else:
-                score = calculate_score(answers, scoring_card.get('critical_questions', []))
-                data = {
-                    "team_leader": team_leader,
-                    "department": department,
-                    "consultant": consultant,
-                    "client_id": client_id,
-                    "audit_date": audit_datetime.isoformat(),
-                    "score": score,
-                    "comments": comments,
-                    **answers
-                }
+                data = build_audit(team_leader, department, consultant, client_id,
+                                   audit_datetime.isoformat(), answers, comments)
+                score = data["score"]
                 try:
-                    supabase.table("audits").insert(data).execute()
-                    st.success(f"Audit submitted successfully! Score: {score}%")
+                    status, existing_id = get_duplicate_index(department).classify(data)
+                    if status == DUPLICATE:
+                        st.warning(f"This audit was already submitted (audit #{existing_id}).")
+                    elif status == CONFLICT:
+                        st.warning(
+                            f"Audit #{existing_id} already covers this consultant, client and time "
+                            "with different answers. Edit that audit instead of submitting a new one."
+                        )
+                    else:
+                        # The unique dedupe_key still guards against a concurrent double submit
+                        response = supabase.table("audits").upsert(
+                            data, on_conflict="dedupe_key", ignore_duplicates=True
+                        ).execute()
+                        if response.data:
+                            record_audits(response.data)
+                            st.success(f"Audit submitted successfully! Score: {score}%")
+                        else:
+                            st.warning("This audit was already submitted.")
                 except Exception as e:
                     st.error(f"Error submitting audit: {e}")
 
 # ------------------- TAB 2: VIEW AUDITS -------------------
 with tab2:
     st.header("View Audits")
+
+    with st.expander("🔎 Quick Search", expanded=False):
+        qs_col1, qs_col2 = st.columns([3, 1])
+        with qs_col1:
+            quick_query = st.text_input(
+                "Client ID prefix or words from the comments (e.g. POPI, branch referral)",
+                key="quick_search"
+            )
+        with qs_col2:
+            quick_department = st.selectbox(
+                "Department", ["All"] + sorted(set(TEAM_DEPARTMENT_MAP.values())), key="quick_search_department"
+            )
+        # A chosen department is searched in its in-memory index; all audits are searched in the database
+        if quick_query.strip():
+            try:
+                if quick_department != "All":
+                    matches = search_audits(quick_query, department=quick_department)
+                    st.caption(f"{len(matches)} matching {quick_department} audits")
+                else:
+                    matches, total = fetch_audit_page(1, 500, search=quick_query.strip())
+                    st.caption(f"{total} matching audits")
+                if not matches.empty:
+                    st.dataframe(matches.head(500), hide_index=True, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error searching audits: {e}")
+
+    # Filters, sorting and search run in the database; only one page is fetched
+    f_col1, f_col2, f_col3, f_col4 = st.columns(4)
+    with f_col1:
+        view_department = st.selectbox(
+            "Department", ["All"] + sorted(set(TEAM_DEPARTMENT_MAP.values())), key="view_department"
+        )
+    with f_col2:
+        view_leaders = [tl for tl, dept in TEAM_DEPARTMENT_MAP.items()
+                        if view_department == "All" or dept == view_department]
+        view_team_leader = st.selectbox("Team Leader", ["All"] + view_leaders, key="view_team_leader")
+    with f_col3:
+        leaders_in_scope = view_leaders if view_team_leader == "All" else [view_team_leader]
+        view_consultants = sorted({c for tl in leaders_in_scope for c in TEAM_CONSULTANTS_MAP.get(tl, [])})
+        view_consultant = st.selectbox("Consultant", ["All"] + view_consultants, key="view_consultant")
+    with f_col4:
+        view_dates = st.date_input("Audit Date Range", value=[], key="view_dates")
+
+    s_col1, s_col2, s_col3, s_col4 = st.columns([2, 1, 1, 1])
+    with s_col1:
+        view_search = st.text_input("Search client ID, consultant or comments", key="view_search")
+    with s_col2:
+        view_sort = st.selectbox("Sort by", list(SORTABLE_COLUMNS), key="view_sort")
+    with s_col3:
+        view_order = st.selectbox("Order", ["Descending", "Ascending"], key="view_order")
+    with s_col4:
+        view_page_size = st.selectbox("Rows per page", [25, 50, 100, 250], key="view_page_size")
+
+    view_filters = tuple(
+        (col, value) for col, value in [
+            ("department", view_department),
+            ("team_leader", view_team_leader),
+            ("consultant", view_consultant),
+        ] if value != "All"
+    )
+    view_start, view_end = (view_dates[0], view_dates[1]) if len(view_dates) == 2 else (None, None)
+
+    # Go back to the first page whenever the query itself changes
+    view_query = (view_filters, view_search, view_start, view_end, view_sort, view_order, view_page_size)
+    if st.session_state.get("view_query") != view_query:
+        st.session_state.view_query = view_query
+        st.session_state.view_page = 1
+
     try:
-        response = supabase.table("audits").select("*").order("audit_date", desc=True).execute()
-        if response.data:
-            df = pd.DataFrame(response.data)
-            st.dataframe(df)
+        page = st.session_state.view_page
+        page_args = (view_page_size, SORTABLE_COLUMNS[view_sort], view_order == "Descending",
+                     view_filters, view_search.strip(), view_start, view_end)
+        page_df, total, view_stale = fetch_audit_page_or_last(page, *page_args)
+        total_pages = max(1, math.ceil(total / view_page_size))
+        if page > total_pages and not view_stale:
+            page = st.session_state.view_page = total_pages
+            page_df, total, view_stale = fetch_audit_page_or_last(page, *page_args)
+        if view_stale:
+            st.warning("⚠️ The database is responding slowly; showing the last page loaded.")
+
+        if not page_df.empty:
+            st.dataframe(page_df, hide_index=True, use_container_width=True)
+            first_row = (page - 1) * view_page_size + 1
+            st.caption(f"Showing {first_row}–{first_row + len(page_df) - 1} of {total} audits")
         else:
-            st.info("No audits yet.")
+            st.info("No audits yet." if not (view_filters or view_search or view_start) else "No audits match your filters.")
+
+        p_col1, p_col2, p_col3 = st.columns([1, 2, 1])
+        with p_col1:
+            if st.button("◀ Previous", disabled=page <= 1, use_container_width=True):
+                st.session_state.view_page = page - 1
+                st.rerun()
+        with p_col2:
+            st.markdown(f"<p style='text-align: center;'>Page {page} of {total_pages}</p>", unsafe_allow_html=True)
+        with p_col3:
+            if st.button("Next ▶", disabled=page >= total_pages, use_container_width=True):
+                st.session_state.view_page = page + 1
+                st.rerun()
     except Exception as e:
         st.error(f"Error fetching audits: {e}")
 
 # ------------------- TAB 3: ANALYTICS -------------------
 with tab3:
     st.header("Analytics Dashboard")
-    st.info("Analytics content goes here (you already have this implemented)")
+    st.info("Full analytics live on the 📈 Analytics page.")
+
+    st.subheader("🚨 Anomaly Alerts")
+    # Only the session's department is watched here; the Analytics page covers the rest
+    alert_department = st.session_state.get("selected_department")
+    if alert_department is None:
+        st.info("Select a team leader under New Audit to see their department's alerts.")
+    else:
+        try:
+            recent_alerts = get_detector(alert_department).recent_alerts(limit=10)
+            if recent_alerts:
+                st.caption(f"Alerts for {alert_department}")
+                for alert in recent_alerts:
+                    st.warning(describe_alert(alert))
+            else:
+                st.success(f"No unusual drops or critical-failure spikes detected in {alert_department}.")
+        except Exception as e:
+            st.error(f"Error loading alerts: {e}")
 
 # ------------------- TAB 4: SETTINGS -------------------
 with tab4:
@@ -1,16 +1,27 @@
 import streamlit as st
-from supabase import create_client
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import LabelEncoder
 import warnings
 warnings.filterwarnings('ignore')
 
+from qa_scorecard.aggregates import aggregate
+from qa_scorecard.analytics import aggregate_insights, generate_coaching_plan
+from qa_scorecard.anomaly import describe_alert, get_detector
+from qa_scorecard.archive import archive_bounds, archive_generation
+from qa_scorecard.cohorts import DEFAULT_CLUSTERS, MIN_AUDITS, coaching_cohorts, consultant_clusters
+from qa_scorecard.data_store import audits_dataset, load_versioned_audits, with_archive
+from qa_scorecard.result_cache import section_cache
+from qa_scorecard.rollups import breakdown_frame, get_rollups
+from qa_scorecard.scorecards import SCORING_CARDS, TEAM_DEPARTMENT_MAP
+from qa_scorecard.sketches import exact_overview, get_sketch_index
+from qa_scorecard.time_index import PERIODS, TimeIndex, get_time_index
+from qa_scorecard.ui import live_updates, stale_data_notice
+
 # Page config
 st.set_page_config(
     page_title="QA Scorecard System",
@@ -18,237 +29,11 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize Supabase connection
-@st.cache_resource
-def init_connection():
-    url = st.secrets["SUPABASE_URL"]
-    key = st.secrets["SUPABASE_KEY"]
-    return create_client(url, key)
-
-supabase = init_connection()
-
-# ==================== AI ANALYTICS FUNCTIONS ====================
-
-def generate_ai_insights(df, selected_consultant=None, selected_team=None, selected_dept=None):
-    """Generate AI-powered insights from audit data"""
-    insights = []
-    
-    if df.empty:
-        return ["📊 Not enough data for AI insights yet. Submit more audits!"]
-    
-    # Overall performance trend
-    if len(df) >= 5:
-        df_sorted = df.sort_values('audit_date')
-        trend = np.polyfit(range(len(df_sorted)), df_sorted['score'], 1)[0]
-        if trend > 1:
-            insights.append(f"📈 **Positive Trend**: Overall scores improving by {trend:.1f}% per audit")
-        elif trend < -1:
-            insights.append(f"📉 **Negative Trend**: Overall scores declining by {abs(trend):.1f}% per audit")
-    
-    # Department comparison
-    if len(df['department'].unique()) > 1:
-        dept_perf = df.groupby('department')['score'].mean().sort_values(ascending=False)
-        best_dept = dept_perf.index[0]
-        worst_dept = dept_perf.index[-1]
-        insights.append(f"🏆 **Top Department**: {best_dept} ({dept_perf.iloc[0]:.1f}%)")
-        insights.append(f"⚡ **Needs Attention**: {worst_dept} ({dept_perf.iloc[-1]:.1f}%)")
-    
-    # Question performance analysis
-    question_cols = [f'q{i}' for i in range(1, 13) if f'q{i}' in df.columns]
-    if question_cols:
-        q_performance = {}
-        for q in question_cols:
-            if q in df.columns:
-                yes_count = (df[q] == 'Yes').sum()
-                total_count = len(df[df[q] != 'NA'])
-                if total_count > 0:
-                    q_performance[q] = (yes_count / total_count) * 100
-        
-        if q_performance:
-            worst_q = min(q_performance, key=q_performance.get)
-            best_q = max(q_performance, key=q_performance.get)
-            insights.append(f"❓ **Weakest Question**: {worst_q.upper()} ({q_performance[worst_q]:.1f}% pass rate)")
-            insights.append(f"✅ **Strongest Question**: {best_q.upper()} ({q_performance[best_q]:.1f}% pass rate)")
-    
-    # Consultant-specific insights
-    if selected_consultant and selected_consultant in df['consultant'].values:
-        consultant_df = df[df['consultant'] == selected_consultant]
-        if len(consultant_df) >= 3:
-            consultant_avg = consultant_df['score'].mean()
-            overall_avg = df['score'].mean()
-            if consultant_avg > overall_avg + 5:
-                insights.append(f"🌟 **Star Performer**: {selected_consultant} is {consultant_avg-overall_avg:.1f}% above average!")
-            elif consultant_avg < overall_avg - 5:
-                insights.append(f"📚 **Training Opportunity**: {selected_consultant} is {overall_avg-consultant_avg:.1f}% below average")
-    
-    # Critical failures analysis
-    critical_cols = ['q2', 'q10', 'q3', 'q6', 'q7']  # Common critical questions
-    critical_cols = [c for c in critical_cols if c in df.columns]
-    if critical_cols:
-        critical_failures = df[critical_cols].apply(lambda x: (x == 'No').any(), axis=1).sum()
-        failure_rate = (critical_failures / len(df)) * 100
-        if failure_rate > 20:
-            insights.append(f"⚠️ **High Critical Failures**: {failure_rate:.1f}% of audits have critical failures")
-    
-    if not insights:
-        insights.append("📊 Submit more audits to generate detailed insights")
-    
-    return insights
-
-def generate_coaching_plan(df, consultant_name):
-    """Generate personalized coaching plan based on audit history"""
-    if consultant_name not in df['consultant'].values:
-        return ["Select a consultant with audit history"]
-    
-    consultant_df = df[df['consultant'] == consultant_name]
-    if len(consultant_df) < 3:
-        return ["Need at least 3 audits to generate coaching plan"]
-    
-    plan = []
-    
-    # Overall performance
-    consultant_avg = consultant_df['score'].mean()
-    overall_avg = df['score'].mean()
-    
-    plan.append(f"## 🎯 Coaching Plan for {consultant_name}")
-    plan.append(f"**Current Average**: {consultant_avg:.1f}%")
-    plan.append(f"**Team Average**: {overall_avg:.1f}%")
-    plan.append(f"**Performance Gap**: {consultant_avg - overall_avg:+.1f}%")
-    
-    # Identify weak areas
-    question_cols = [f'q{i}' for i in range(1, 13) if f'q{i}' in df.columns]
-    weak_areas = []
-    
-    for q in question_cols:
-        if q in consultant_df.columns:
-            consultant_yes = (consultant_df[q] == 'Yes').sum()
-            consultant_total = len(consultant_df[consultant_df[q] != 'NA'])
-            if consultant_total > 0:
-                consultant_rate = (consultant_yes / consultant_total) * 100
-                
-                overall_yes = (df[q] == 'Yes').sum()
-                overall_total = len(df[df[q] != 'NA'])
-                if overall_total > 0:
-                    overall_rate = (overall_yes / overall_total) * 100
-                    
-                    if consultant_rate < 70 and consultant_rate < overall_rate - 10:
-                        weak_areas.append({
-                            'question': q.upper(),
-                            'consultant_rate': consultant_rate,
-                            'team_rate': overall_rate,
-                            'gap': overall_rate - consultant_rate
-                        })
-    
-    if weak_areas:
-        plan.append("\n## 🎯 Areas Needing Improvement:")
-        for area in sorted(weak_areas, key=lambda x: x['gap'], reverse=True)[:3]:
-            plan.append(f"- **{area['question']}**: {area['consultant_rate']:.1f}% vs team {area['team_rate']:.1f}% (gap: {area['gap']:.1f}%)")
-    
-    # Trend analysis
-    if len(consultant_df) >= 4:
-        dates = pd.to_datetime(consultant_df['audit_date'])
-        scores = consultant_df['score'].values
-        dates_numeric = np.array([date.timestamp() for date in dates])
-        
-        # Calculate trend
-        if len(dates_numeric) > 1:
-            model = LinearRegression()
-            model.fit(dates_numeric.reshape(-1, 1), scores)
-            trend = model.coef_[0] * (24*3600*30)  # Per month trend
-            
-            if trend > 5:
-                plan.append(f"\n📈 **Positive Trend**: Improving by {trend:.1f}% per month")
-                plan.append("**Action**: Continue current practices, consider mentoring others")
-            elif trend < -5:
-                plan.append(f"\n📉 **Negative Trend**: Declining by {abs(trend):.1f}% per month")
-                plan.append("**Action**: Schedule one-on-one coaching session")
-            else:
-                plan.append("\n📊 **Stable Performance**: Consistent scores")
-                plan.append("**Action**: Focus on specific skill development")
-    
-    # Critical failures
-    critical_cols = ['q2', 'q10', 'q3', 'q6', 'q7']
-    critical_cols = [c for c in critical_cols if c in consultant_df.columns]
-    
-    critical_fails = []
-    for q in critical_cols:
-        if q in consultant_df.columns:
-            fails = (consultant_df[q] == 'No').sum()
-            if fails > 0:
-                critical_fails.append(f"{q.upper()}: {fails} failure(s)")
-    
-    if critical_fails:
-        plan.append("\n⚠️ **Critical Issues to Address:**")
-        plan.extend([f"- {fail}" for fail in critical_fails])
-        plan.append("**Priority**: Address these immediately as they cause 0% scores")
-    
-    # Recommendations
-    plan.append("\n## 🎯 Recommended Actions:")
-    
-    if consultant_avg < 70:
-        plan.append("1. **Immediate Coaching**: Schedule daily check-ins for 2 weeks")
-        plan.append("2. **Shadowing**: Pair with top performer for a week")
-        plan.append("3. **Focused Training**: Target lowest scoring questions")
-    elif consultant_avg < 85:
-        plan.append("1. **Weekly Review**: Analyze 2 audits per week with manager")
-        plan.append("2. **Skill Workshops**: Attend department training sessions")
-        plan.append("3. **Peer Review**: Exchange audits with colleague for feedback")
-    else:
-        plan.append("1. **Mentor Role**: Start mentoring newer team members")
-        plan.append("2. **Process Improvement**: Identify areas for department improvement")
-        plan.append("3. **Advanced Training**: Prepare for team leader role")
-    
-    return plan
-
-def predict_future_scores(df, consultant_name=None, days_ahead=30):
-    """Predict future scores using linear regression"""
-    if df.empty or len(df) < 5:
-        return None, None
-    
-    if consultant_name:
-        df = df[df['consultant'] == consultant_name]
-        if len(df) < 3:
-            return None, None
-    
-    # Prepare data
-    df_sorted = df.sort_values('audit_date')
-    dates = pd.to_datetime(df_sorted['audit_date'])
-    scores = df_sorted['score'].values
-    
-    # Convert dates to numeric (days since first audit)
-    dates_numeric = np.array([(date - dates.min()).days for date in dates])
-    
-    # Train linear regression model
-    model = LinearRegression()
-    model.fit(dates_numeric.reshape(-1, 1), scores)
-    
-    # Predict future
-    last_date = dates_numeric[-1]
-    future_dates = np.array([last_date + days_ahead])
-    predicted_score = model.predict(future_dates.reshape(-1, 1))[0]
-    
-    # Ensure prediction is within bounds
-    predicted_score = max(0, min(100, predicted_score))
-    
-    # Calculate confidence (R-squared)
-    r_squared = model.score(dates_numeric.reshape(-1, 1), scores)
-    confidence = r_squared * 100
-    
-    return predicted_score, confidence
-
 # ==================== ANALYTICS DASHBOARD ====================
 
-st.markdown("<h1 style='text-align: center;'>🤖 AI-Powered Analytics Dashboard</h1>", unsafe_allow_html=True)
-
-try:
-    # Fetch all audits
-    response = supabase.table("audits").select("*").order("audit_date", desc=True).execute()
-    
-    if not response.data:
-        st.info("No audit data available for analytics. Submit some audits first!")
-        st.stop()
-    
-    df = pd.DataFrame(response.data)
+def prepare_analytics_frame(df):
+    """Copy of the shared audits with the date columns the page works with"""
+    df = df.copy()
     
     # Ensure department column exists
     if 'department' not in df.columns:
@@ -260,21 +45,101 @@ try:
     df['week'] = df['audit_date'].dt.isocalendar().week
     df['month'] = df['audit_date'].dt.strftime('%Y-%m')
     df['month_name'] = df['audit_date'].dt.strftime('%B %Y')
+    return df
+
+def show_overview(overview):
+    """Headline figures, score distribution and leaderboard; estimates carry ±95% error bars"""
+    exact = overview['exact']
+    
+    def with_error(value, error, fmt="{:.1f}"):
+        return fmt.format(value) if exact else f"{fmt.format(value)} ± {fmt.format(error)}"
+    
+    if exact:
+        st.success("✅ Exact figures")
+    else:
+        st.info("⏳ Estimates from pre-built sketches (±95% intervals, whole months) — "
+                "refining to exact figures in the background...")
+    
+    metric_col1, metric_col2, metric_col3, metric_col4, metric_col5 = st.columns(5)
+    with metric_col1:
+        st.metric("Total Audits", f"{overview['count']:,}")
+    with metric_col2:
+        st.metric("Average Score", with_error(overview['mean'], overview['mean_error']) + "%")
+    with metric_col3:
+        p = overview['percentiles']
+        st.metric("Median Score", f"{p[50]:.1f}%", help=f"10th–90th percentile: {p[10]:.1f}% – {p[90]:.1f}%")
+    with metric_col4:
+        st.metric("Distinct Clients", with_error(overview['clients'], overview['clients_error'], "{:,.0f}"))
+    with metric_col5:
+        st.metric("Distinct Consultants",
+                  with_error(overview['consultants'], overview['consultants_error'], "{:,.0f}"))
+    
+    col_chart1, col_chart2 = st.columns(2)
+    with col_chart1:
+        st.subheader("📊 Score Distribution")
+        edges = np.linspace(0, 100, len(overview['histogram']) + 1)
+        fig = go.Figure(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=overview['histogram'],
+            width=edges[1] - edges[0],
+            marker_color='lightseagreen'
+        ))
+        fig.update_layout(xaxis_title="Score (%)", yaxis_title="Number of Audits", height=400,
+                          bargap=0.1, xaxis_range=[0, 100])
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col_chart2:
+        st.subheader("🏆 Consultant Leaderboard")
+        top = overview['leaderboard'].head(15).iloc[::-1]
+        fig = go.Figure(go.Bar(
+            x=top['Avg Score'],
+            y=top['Consultant'],
+            orientation='h',
+            error_x=dict(type='data', array=top['±']) if not exact else None,
+            marker_color='cornflowerblue'
+        ))
+        fig.update_layout(xaxis_title="Average Score (%)", height=400)
+        st.plotly_chart(fig, use_container_width=True)
     
+    st.dataframe(overview['leaderboard'], use_container_width=True, hide_index=True)
+
+st.markdown("<h1 style='text-align: center;'>🤖 AI-Powered Analytics Dashboard</h1>", unsafe_allow_html=True)
+
+try:
     # ==================== FILTERS SECTION ====================
     st.subheader("🔍 Filter Analytics Data")
     
     filter_col1, filter_col2, filter_col3, filter_col4 = st.columns(4)
     
     with filter_col1:
-        # Department filter
-        all_departments = ['All'] + sorted(df['department'].unique().tolist())
+        # Department filter, picked before loading: one department reads and
+        # holds only its own shard of the audits. Starts on the department of
+        # the team leader chosen on the main page.
+        all_departments = ['All'] + sorted(set(SCORING_CARDS) | set(TEAM_DEPARTMENT_MAP.values()))
+        own_department = st.session_state.get('selected_department')
         selected_department = st.selectbox(
             "Select Department",
             all_departments,
-            index=0
+            index=all_departments.index(own_department) if own_department in all_departments else 0
         )
     
+    # Section results are cached per dataset, data version and filter
+    # selection, so flipping back to a combination seen before skips the
+    # recomputation. Cached frames are shared across sessions: never modify
+    # them in place.
+    department = selected_department if selected_department != 'All' else None
+    dataset = audits_dataset(department)
+    version, raw_df = load_versioned_audits(department)
+    data_version = (dataset, version)
+    live_updates(dataset)
+    stale_data_notice(dataset)
+    
+    if raw_df.empty:
+        st.info("No audit data available for analytics. Submit some audits first!")
+        st.stop()
+    
+    df = section_cache.get_or_compute(("prepared", data_version), lambda: prepare_analytics_frame(raw_df))
+    
     with filter_col2:
         # Team Leader filter
         if selected_department != 'All':
@@ -307,32 +172,101 @@ try:
         # Date range filter
         min_date = df['audit_date'].min().date()
         max_date = df['audit_date'].max().date()
+        archived = archive_bounds()
         
         date_range = st.date_input(
             "Date Range",
             value=[min_date, max_date],
-            min_value=min_date,
-            max_value=max_date
+            min_value=min(min_date, archived[0]) if archived else min_date,
+            max_value=max_date,
+            help="Start before the oldest recent audit to include archived history."
         )
     
-    # Apply filters
-    filtered_df = df.copy()
+    start_date, end_date = (date_range[0], date_range[1]) if len(date_range) == 2 else (None, None)
     
-    if selected_department != 'All':
-        filtered_df = filtered_df[filtered_df['department'] == selected_department]
+    # Ranges starting before the oldest hot audit also read the archive
+    # partitions they overlap
+    history = start_date is not None and start_date < min_date
+    generation = archive_generation() if history else None
+    if history:
+        history_raw = section_cache.get_or_compute(
+            ("history", data_version, generation, start_date, end_date),
+            lambda: with_archive(raw_df, start_date, end_date, department)
+        )
+        df = section_cache.get_or_compute(
+            ("prepared_history", data_version, generation, start_date, end_date),
+            lambda: prepare_analytics_frame(history_raw)
+        )
+    filter_key = (data_version, generation, selected_department, selected_team_leader, selected_consultant,
+                  start_date, end_date)
+    
+    def cached(section, compute, *extra):
+        return section_cache.get_or_compute((section, *filter_key, *extra), compute)
     
-    if selected_team_leader != 'All':
-        filtered_df = filtered_df[filtered_df['team_leader'] == selected_team_leader]
+    approximate = st.toggle(
+        "⚡ Approximate mode",
+        help="Instant overview from mergeable sketches, for multi-year or all-department views. "
+             "Exact figures replace the estimates once they are computed. Covers recent (not archived) "
+             "audits; not used for single consultants."
+    )
     
-    if selected_consultant != 'All':
-        filtered_df = filtered_df[filtered_df['consultant'] == selected_consultant]
+    # Apply filters
+    def apply_filters():
+        filtered_df = df
+        
+        if selected_department != 'All':
+            filtered_df = filtered_df[filtered_df['department'] == selected_department]
+        
+        if selected_team_leader != 'All':
+            filtered_df = filtered_df[filtered_df['team_leader'] == selected_team_leader]
+        
+        if selected_consultant != 'All':
+            filtered_df = filtered_df[filtered_df['consultant'] == selected_consultant]
+        
+        if start_date is not None:
+            # Compare timestamps directly rather than materializing .dt.date per row
+            tz = filtered_df['audit_date'].dt.tz
+            filtered_df = filtered_df[
+                (filtered_df['audit_date'] >= pd.Timestamp(start_date, tz=tz)) &
+                (filtered_df['audit_date'] < pd.Timestamp(end_date, tz=tz) + pd.Timedelta(days=1))
+            ]
+        return filtered_df.copy()
+    
+    if approximate and selected_consultant == 'All' and not history:
+        # ==================== APPROXIMATE OVERVIEW ====================
+        overview_key = ("overview", *filter_key)
+        
+        def exact_figures():
+            return exact_overview(cached("filtered", apply_filters))
+        
+        overview = section_cache.get_or_schedule(overview_key, exact_figures)
+        if overview is not None:
+            show_overview(overview)
+        else:
+            estimate = get_sketch_index(department).estimate(
+                department=selected_department if selected_department != 'All' else None,
+                team_leader=selected_team_leader if selected_team_leader != 'All' else None,
+                start_date=start_date,
+                end_date=end_date
+            )
+            error = section_cache.failure(overview_key)
+            if error is not None:
+                st.warning(f"⚠️ Exact figures could not be computed ({error}); showing estimates.")
+                show_overview(estimate)
+            else:
+                @st.fragment(run_every=1)
+                def refine():
+                    # Rerun the whole page once the exact figures are in (or have
+                    # failed), which also stops the polling
+                    if section_cache.get_or_schedule(overview_key, exact_figures) is not None \
+                            or section_cache.failure(overview_key) is not None:
+                        st.rerun()
+                    show_overview(estimate)
+                
+                refine()
+        st.stop()
     
-    if len(date_range) == 2:
-        start_date, end_date = date_range
-        filtered_df = filtered_df[
-            (filtered_df['audit_date'].dt.date >= start_date) &
-            (filtered_df['audit_date'].dt.date <= end_date)
-        ]
+    filtered_df = cached("filtered", apply_filters)
     
     st.info(f"📊 **Showing {len(filtered_df)} out of {len(df)} audits**")
     
@@ -340,19 +274,35 @@ try:
         st.warning("No data matches your filters. Try adjusting filter criteria.")
         st.stop()
     
+    # Running rollups answer whole-period selections without rescanning rows;
+    # the prefix-sum time index answers any other date range
+    # (the rollups cover every department, so a department shard uses the index)
+    full_period = not history and (start_date is None or (start_date <= min_date and end_date >= max_date))
+    rollups = get_rollups() if full_period and department is None else None
+    if history:
+        time_index = section_cache.get_or_compute(
+            ("history_index", data_version, generation, start_date, end_date),
+            lambda: TimeIndex.from_frame(history_raw)
+        )
+    else:
+        time_index = get_time_index(department)
+    scope_filters = dict(
+        department=selected_department if selected_department != 'All' else None,
+        team_leader=selected_team_leader if selected_team_leader != 'All' else None,
+        consultant=selected_consultant if selected_consultant != 'All' else None
+    )
+    if rollups:
+        scope_stats = rollups.scope(**scope_filters)
+    else:
+        scope_stats = time_index.range_stats(start_date, end_date, **scope_filters)
+    
     # ==================== KEY METRICS ====================
     st.subheader("📊 Performance Metrics")
     
     # Calculate metrics
-    total_audits = len(filtered_df)
-    avg_score = filtered_df['score'].mean()
-    
-    # Calculate critical failures
-    critical_questions = ['q2', 'q10', 'q3', 'q6', 'q7']
-    critical_questions = [q for q in critical_questions if q in filtered_df.columns]
-    critical_failures = 0
-    if critical_questions:
-        critical_failures = filtered_df[critical_questions].apply(lambda x: (x == 'No').any(), axis=1).sum()
+    total_audits = scope_stats.count
+    avg_score = scope_stats.mean
+    critical_failures = scope_stats.critical_failures
     
     pass_rate = ((total_audits - critical_failures) / total_audits * 100) if total_audits > 0 else 0
     
@@ -372,12 +322,9 @@ try:
         st.metric("Pass Rate", f"{pass_rate:.1f}%")
     
     with metric_col5:
-        # Performance trend
-        if len(filtered_df) >= 2:
-            df_sorted = filtered_df.sort_values('audit_date')
-            first_half = df_sorted.iloc[:len(df_sorted)//2]['score'].mean()
-            second_half = df_sorted.iloc[len(df_sorted)//2:]['score'].mean()
-            trend = second_half - first_half
+        # Performance trend: later half of the audits vs the earlier half
+        trend = time_index.trend(start_date, end_date, **scope_filters)
+        if trend is not None:
             trend_label = f"{trend:+.1f}%"
             st.metric("Trend", trend_label, delta=trend_label)
         else:
@@ -386,16 +333,26 @@ try:
     # ==================== AI INSIGHTS ====================
     st.subheader("🤖 AI Insights & Recommendations")
     
-    insights = generate_ai_insights(
-        filtered_df, 
-        selected_consultant if selected_consultant != 'All' else None,
-        selected_team_leader if selected_team_leader != 'All' else None,
-        selected_department if selected_department != 'All' else None
-    )
+    # Insights, group comparisons and forecasts read merged partial sums,
+    # computed across a process pool when the selection is large
+    sums = cached("aggregate", lambda: aggregate(filtered_df))
+    insights = aggregate_insights(sums, selected_consultant if selected_consultant != 'All' else None)
     
     for insight in insights[:5]:  # Show top 5 insights
         st.info(insight)
     
+    # ==================== ANOMALY ALERTS ====================
+    alerts = get_detector(department).recent_alerts(
+        department=selected_department if selected_department != 'All' else None,
+        team_leader=selected_team_leader if selected_team_leader != 'All' else None,
+        consultant=selected_consultant if selected_consultant != 'All' else None,
+        limit=5
+    )
+    if alerts:
+        st.subheader("🚨 Anomaly Alerts")
+        for alert in alerts:
+            st.warning(describe_alert(alert))
+    
     # ==================== VISUAL ANALYTICS ====================
     col_chart1, col_chart2 = st.columns(2)
     
@@ -404,8 +361,11 @@ try:
         
         if len(filtered_df) >= 2:
             # Daily average scores
-            daily_scores = filtered_df.groupby('date')['score'].mean().reset_index()
-            daily_scores['7_day_avg'] = daily_scores['score'].rolling(window=7, min_periods=1).mean()
+            def daily_average():
+                daily_scores = filtered_df.groupby('date')['score'].mean().reset_index()
+                daily_scores['7_day_avg'] = daily_scores['score'].rolling(window=7, min_periods=1).mean()
+                return daily_scores
+            daily_scores = cached("daily_scores", daily_average)
             
             fig1 = go.Figure()
             fig1.add_trace(go.Scatter(
@@ -461,11 +421,10 @@ try:
         # Department/Team comparison
         if selected_department == 'All' and len(filtered_df['department'].unique()) > 1:
             st.write("**Department Performance**")
-            dept_stats = filtered_df.groupby('department').agg({
-                'score': 'mean',
-                'id': 'count'
-            }).round(1).reset_index()
-            dept_stats.columns = ['Department', 'Avg Score', 'Audit Count']
+            if rollups and not (scope_filters['team_leader'] or scope_filters['consultant']):
+                dept_stats = breakdown_frame(rollups.breakdown('department'), 'Department')
+            else:
+                dept_stats = sums.group_table('department', 'Department')
             
             fig3 = go.Figure(go.Bar(
                 x=dept_stats['Avg Score'],
@@ -485,11 +444,12 @@ try:
         
         elif selected_team_leader == 'All' and len(filtered_df['team_leader'].unique()) > 1:
             st.write("**Team Leader Performance**")
-            team_stats = filtered_df.groupby('team_leader').agg({
-                'score': 'mean',
-                'id': 'count'
-            }).round(1).reset_index()
-            team_stats.columns = ['Team Leader', 'Avg Score', 'Audit Count']
+            if rollups and not scope_filters['consultant']:
+                team_stats = breakdown_frame(
+                    rollups.breakdown('team_leader', department=scope_filters['department']), 'Team Leader'
+                )
+            else:
+                team_stats = sums.group_table('team_leader', 'Team Leader')
             team_stats = team_stats.sort_values('Avg Score', ascending=True).tail(10)
             
             fig3 = go.Figure(go.Bar(
@@ -512,11 +472,13 @@ try:
         # Consultant leaderboard
         if len(filtered_df['consultant'].unique()) > 1:
             st.write("**Top Performers**")
-            consultant_stats = filtered_df.groupby('consultant').agg({
-                'score': 'mean',
-                'id': 'count'
-            }).round(1).reset_index()
-            consultant_stats.columns = ['Consultant', 'Avg Score', 'Audit Count']
+            if rollups:
+                consultant_stats = breakdown_frame(
+                    rollups.breakdown('consultant', scope_filters['department'], scope_filters['team_leader']),
+                    'Consultant'
+                )
+            else:
+                consultant_stats = sums.group_table('consultant', 'Consultant')
             
             # Show top and bottom performers
             top_5 = consultant_stats.sort_values('Avg Score', ascending=False).head(5)
@@ -554,6 +516,34 @@ try:
             )
             st.plotly_chart(fig4, use_container_width=True)
     
+    # ==================== PERIOD OVER PERIOD ====================
+    st.subheader("📆 Period-over-Period Comparison")
+    
+    period_label = st.radio("Compare", list(PERIODS), horizontal=True)
+    period_days = PERIODS[period_label]
+    period_end = end_date or max_date
+    st.caption(f"Last {period_days} days up to {period_end} vs the {period_days} days before")
+    
+    pop_col1, pop_col2 = st.columns(2)
+    
+    with pop_col1:
+        if not scope_filters['team_leader']:
+            team_pop = time_index.period_comparison(
+                'team_leader', period_days, period_end, department=scope_filters['department']
+            )
+            st.markdown("**By Team Leader**")
+            st.dataframe(team_pop, use_container_width=True, hide_index=True)
+    
+    with pop_col2:
+        consultant_pop = time_index.period_comparison(
+            'consultant', period_days, period_end,
+            department=scope_filters['department'], team_leader=scope_filters['team_leader']
+        )
+        if scope_filters['consultant']:
+            consultant_pop = consultant_pop[consultant_pop['Consultant'] == scope_filters['consultant']]
+        st.markdown("**By Consultant**")
+        st.dataframe(consultant_pop, use_container_width=True, hide_index=True)
+    
     # ==================== QUESTION ANALYSIS ====================
     st.subheader("❓ Question Performance Analysis")
     
@@ -562,10 +552,8 @@ try:
     for q in range(1, 13):
         q_col = f'q{q}'
         if q_col in filtered_df.columns:
-            total_responses = len(filtered_df[filtered_df[q_col] != 'NA'])
-            if total_responses > 0:
-                yes_count = len(filtered_df[filtered_df[q_col] == 'Yes'])
-                pass_rate_q = (yes_count / total_responses) * 100
+            pass_rate_q = scope_stats.question_pass_rate(q_col)
+            if pass_rate_q is not None:
                 
                 # Identify critical questions
                 is_critical = False
@@ -604,6 +592,62 @@ try:
         )
         st.plotly_chart(fig5, use_container_width=True)
     
+    # ==================== GROUP COACHING COHORTS ====================
+    st.subheader("👥 Group Coaching Cohorts")
+    st.caption(f"Consultants with at least {MIN_AUDITS} audits in a department, clustered on their pass rates "
+               "for that department's questions. Members of a cluster share weak spots.")
+    
+    cluster_count = st.slider("Number of clusters", min_value=2, max_value=8, value=DEFAULT_CLUSTERS)
+    clusters = section_cache.get_or_compute(
+        ("consultant_clusters", data_version, cluster_count),
+        lambda: consultant_clusters(raw_df, cluster_count)
+    )
+    cohort_department = selected_department if selected_department != 'All' else None
+    
+    if not clusters or (cohort_department is not None and cohort_department not in clusters):
+        st.info(f"Need at least two consultants with {MIN_AUDITS}+ audits in a department to suggest cohorts.")
+    else:
+        # Each scorecard has its own questions, so profiles are shown for one department at a time
+        profile_department = cohort_department or st.selectbox(
+            "Department for cluster profiles", sorted(clusters), key="cohort_profile_department"
+        )
+        department_clusters = clusters[profile_department]
+        cohort_col1, cohort_col2 = st.columns([1, 2])
+        
+        with cohort_col1:
+            st.write(f"**Cluster Profiles — {profile_department} (pass rate %)**")
+            centroids = department_clusters['centroids']
+            fig_profiles = px.imshow(
+                centroids,
+                x=centroids.columns,
+                y=[f"Cluster {c} ({department_clusters['sizes'][c]})" for c in centroids.index],
+                color_continuous_scale='RdYlGn',
+                zmin=50,
+                zmax=100,
+                text_auto=True,
+                aspect='auto'
+            )
+            fig_profiles.update_layout(height=120 + 40 * len(centroids), coloraxis_showscale=False)
+            st.plotly_chart(fig_profiles, use_container_width=True)
+        
+        with cohort_col2:
+            st.write("**Suggested Cohorts**")
+            st.dataframe(coaching_cohorts(clusters, cohort_department), use_container_width=True, hide_index=True)
+        
+        with st.expander(f"🗺️ Consultant × Question Heatmap — {profile_department}"):
+            matrix = department_clusters['matrix']
+            fig_matrix = px.imshow(
+                matrix,
+                y=[f"{name} · C{department_clusters['labels'][name]}" for name in matrix.index],
+                color_continuous_scale='RdYlGn',
+                zmin=50,
+                zmax=100,
+                aspect='auto',
+                labels={'color': 'Pass Rate (%)'}
+            )
+            fig_matrix.update_layout(height=max(300, 18 * len(matrix)))
+            st.plotly_chart(fig_matrix, use_container_width=True)
+    
     # ==================== PREDICTIVE ANALYTICS ====================
     st.subheader("🔮 Predictive Analytics")
     
@@ -635,14 +679,10 @@ try:
         st.write("")  # Spacer
         if st.button("🔮 Generate Prediction", use_container_width=True):
             if pred_consultant and pred_consultant != 'Select...':
-                predicted_score, confidence = predict_future_scores(
-                    filtered_df, 
-                    pred_consultant, 
-                    prediction_days
-                )
+                predicted_score, confidence = sums.forecast(pred_consultant, prediction_days)
                 
                 if predicted_score is not None:
-                    current_avg = filtered_df[filtered_df['consultant'] == pred_consultant]['score'].mean()
+                    current_avg = sums.group_means('consultant').at[pred_consultant, 'mean']
                     
                     st.success(f"**Predicted Score in {prediction_days} days:**")
                     st.metric(
@@ -687,7 +727,9 @@ try:
         st.write("")  # Spacer
         if st.button("📋 Generate Coaching Plan", use_container_width=True):
             if coach_consultant and coach_consultant != 'Select...':
-                coaching_plan = generate_coaching_plan(filtered_df, coach_consultant)
+                coaching_plan = cached(
+                    "coaching_plan", lambda: generate_coaching_plan(filtered_df, coach_consultant), coach_consultant
+                )
                 
                 with st.expander(f"📋 Coaching Plan for {coach_consultant}", expanded=True):
                     for line in coaching_plan:
@@ -716,7 +758,7 @@ try:
     
     with exp_col1:
         # Export filtered data
-        csv_data = filtered_df.to_csv(index=False)
+        csv_data = cached("csv", lambda: filtered_df.to_csv(index=False))
         st.download_button(
             label="📥 Download Filtered Data (CSV)",
             data=csv_data,
@@ -1,4 +1,13 @@
 import streamlit as st
+import pandas as pd
+
+from qa_scorecard.audit_edits import ANSWER_OPTIONS, EDITABLE_COLUMNS, apply_edits, diff_edits
+from qa_scorecard.audit_import import plan_import, prepare_import, read_import_csv, write_audits
+from qa_scorecard.data_store import load_audits
+from qa_scorecard.dedupe import QUESTION_COLUMNS
+from qa_scorecard.scorecards import SCORING_CARDS, TEAM_DEPARTMENT_MAP
+
+EDIT_ROW_LIMIT = 1000
 
 st.set_page_config(
     page_title="Data Management",
@@ -14,7 +23,142 @@ st.write("- Upload new QA data")
 st.write("- Edit existing records")
 st.write("- Manage datasets")
 
-# File uploader example
+# ------------------- CSV IMPORT -------------------
+st.subheader("📤 Import Audits from CSV")
+st.caption(
+    "Required columns: team_leader, consultant, client_id, audit_date, q1–q12 (Yes/No/NA). "
+    "Optional: department, comments. Scores are recalculated with the department's scorecard."
+)
+
 uploaded_file = st.file_uploader("Upload CSV file", type=["csv"])
 if uploaded_file is not None:
     st.success(f"File uploaded: {uploaded_file.name}")
+    try:
+        rows, errors = prepare_import(read_import_csv(uploaded_file))
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+    if errors:
+        with st.expander(f"⚠️ {len(errors)} row(s) could not be read and will be skipped"):
+            for error in errors[:200]:
+                st.write(error)
+
+    merge_conflicts = st.radio(
+        "When a row matches a stored audit (same consultant, client and time) with different answers",
+        ["Skip the row", "Update the stored audit"],
+        horizontal=True
+    ) == "Update the stored audit"
+
+    to_write, summary = plan_import(rows, merge_conflicts=merge_conflicts)
+    sum_col1, sum_col2, sum_col3, sum_col4, sum_col5 = st.columns(5)
+    sum_col1.metric("New", summary["new"])
+    sum_col2.metric("To Update", summary["merged"])
+    sum_col3.metric("Already Stored", summary["duplicates"])
+    sum_col4.metric("Conflicting (skipped)", summary["conflicts"])
+    sum_col5.metric("Repeated in File", summary["repeated_in_file"])
+
+    if st.button(f"Import {len(to_write)} audit(s)", disabled=not to_write):
+        try:
+            stored = write_audits(to_write)
+            st.success(f"Imported {len(stored)} audit(s).")
+        except Exception as e:
+            st.error(f"Error importing audits: {e}")
+
+# ------------------- EDIT AUDITS -------------------
+st.markdown("---")
+st.subheader("✏️ Edit Audits")
+st.caption(
+    "Change cells in the grid, then save: only the changed cells are written, in one batch, and "
+    "edited answers are re-scored. Audits someone else changed since the grid loaded are not "
+    "overwritten; they are reloaded so you can redo the edit."
+)
+
+if "edit_generation" not in st.session_state:
+    st.session_state.edit_generation = 0
+if "edit_notice" in st.session_state:
+    notice, conflicts = st.session_state.pop("edit_notice")
+    st.success(notice)
+    if conflicts:
+        st.warning(f"{len(conflicts)} audit(s) were changed by someone else and were not saved: "
+                   f"{', '.join(map(str, conflicts))}")
+
+edit_col0, edit_col1, edit_col2, edit_col3 = st.columns(4)
+with edit_col0:
+    # Picked before loading, so one department only reads its own shard
+    departments = ["All"] + sorted(set(SCORING_CARDS) | set(TEAM_DEPARTMENT_MAP.values()))
+    own_department = st.session_state.get("selected_department")
+    edit_department = st.selectbox("Department", departments, key="edit_department",
+                                   index=departments.index(own_department) if own_department in departments else 0)
+
+audits = load_audits(None if edit_department == "All" else edit_department)
+if audits.empty:
+    st.info("No audits stored yet.")
+    st.stop()
+
+dates = pd.to_datetime(audits["audit_date"], format="ISO8601", utc=True)
+with edit_col1:
+    edit_team = st.selectbox("Team Leader", ["All"] + sorted(audits["team_leader"].dropna().unique()),
+                             key="edit_team")
+scope = audits if edit_team == "All" else audits[audits["team_leader"] == edit_team]
+with edit_col2:
+    edit_consultant = st.selectbox("Consultant", ["All"] + sorted(scope["consultant"].dropna().unique()),
+                                   key="edit_consultant")
+with edit_col3:
+    edit_range = st.date_input("Audit Dates", (dates.min().date(), dates.max().date()), key="edit_range")
+
+mask = pd.Series(True, index=audits.index)
+if edit_team != "All":
+    mask &= audits["team_leader"] == edit_team
+if edit_consultant != "All":
+    mask &= audits["consultant"] == edit_consultant
+if len(edit_range) == 2:
+    mask &= dates.dt.date.between(*edit_range)
+matching = int(mask.sum())
+if matching > EDIT_ROW_LIMIT:
+    st.caption(f"Showing the newest {EDIT_ROW_LIMIT} of {matching} matching audits; narrow the filters to see more.")
+
+original = audits.loc[mask, ["id", "updated_at", "department", "team_leader"] + EDITABLE_COLUMNS + ["score"]] \
+    .head(EDIT_ROW_LIMIT).reset_index(drop=True)
+original["audit_date"] = dates[mask].head(EDIT_ROW_LIMIT).dt.tz_localize(None).to_numpy()
+
+edited = st.data_editor(
+    original,
+    key=f"audit_editor_{st.session_state.edit_generation}",
+    hide_index=True,
+    use_container_width=True,
+    num_rows="fixed",
+    column_order=["id", "team_leader", "department"] + EDITABLE_COLUMNS + ["score"],
+    disabled=["id", "team_leader", "department", "score"],
+    column_config={
+        "id": st.column_config.NumberColumn("ID", format="%d"),
+        "audit_date": st.column_config.DatetimeColumn("Audit Date (UTC)", format="YYYY-MM-DD HH:mm",
+                                                      required=True),
+        "score": st.column_config.NumberColumn("Score", format="%.2f"),
+        **{q: st.column_config.SelectboxColumn(q.upper(), options=ANSWER_OPTIONS, required=True)
+           for q in QUESTION_COLUMNS},
+    },
+)
+
+edits = diff_edits(original, edited)
+if edits:
+    with st.expander(f"📝 {len(edits)} audit(s) with unsaved changes", expanded=True):
+        st.dataframe(
+            pd.DataFrame([{"id": edit["id"], **edit["changes"]} for edit in edits]),
+            hide_index=True, use_container_width=True
+        )
+
+save_col, discard_col = st.columns(2)
+with save_col:
+    if st.button(f"Save {len(edits)} change(s)", type="primary", disabled=not edits, use_container_width=True):
+        try:
+            updated, conflicts = apply_edits(edits)
+            st.session_state.edit_notice = (f"Saved {len(updated)} audit(s).", conflicts)
+            st.session_state.edit_generation += 1
+            st.rerun()
+        except Exception as e:
+            st.error(f"Error saving changes: {e}")
+with discard_col:
+    if st.button("Discard changes", disabled=not edits, use_container_width=True):
+        st.session_state.edit_generation += 1
+        st.rerun()
@@ -1,47 +1,50 @@
 import streamlit as st
 import pandas as pd
-from supabase import create_client, Client
 from datetime import datetime
 
-# -------------------------
-# Supabase Connection
-# -------------------------
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from qa_scorecard.data_store import load_audits, load_audits_between
+from qa_scorecard.ui import stale_data_notice
 
 # -------------------------
 # Function to fetch report
 # -------------------------
-def fetch_report(table_name, report_type=None, start_date=None, end_date=None):
+def _to_naive(dates):
+    """Parse ISO timestamps and drop any UTC offset so they compare with picker dates"""
+    dates = pd.to_datetime(dates, format="ISO8601", utc=True)
+    return dates.dt.tz_localize(None)
+
+def fetch_report(report_type=None, start_date=None, end_date=None):
     try:
-        # Get first row to inspect columns
-        sample = supabase.table(table_name).select("*").limit(1).execute()
-        if not sample.data:
+        # Reuse the audits already loaded by any page instead of querying again;
+        # older periods come from the archive
+        df = load_audits_between(start_date, end_date)
+        stale_data_notice()
+        if df.empty:
             st.warning("No data found in the table.")
             return pd.DataFrame()
-        df_sample = pd.DataFrame(sample.data)
         
         # Detect report type column
-        report_col_candidates = [col for col in df_sample.columns if "report" in col.lower()]
+        report_col_candidates = [col for col in df.columns if "report" in col.lower()]
         report_col = report_col_candidates[0] if report_col_candidates else None
         
-        # Detect date column
-        date_col_candidates = [col for col in df_sample.columns if "date" in col.lower()]
-        date_col = date_col_candidates[0] if date_col_candidates else None
+        # Audits are reported by when they happened, never by updated_at
+        date_col_candidates = [col for col in df.columns if "date" in col.lower() and col != "updated_at"]
+        date_col = "audit_date" if "audit_date" in df.columns else \
+            (date_col_candidates[0] if date_col_candidates else None)
 
-        query = supabase.table(table_name).select("*")
+        mask = pd.Series(True, index=df.index)
         if report_col and report_type:
-            query = query.eq(report_col, report_type.lower())
+            mask &= df[report_col] == report_type.lower()
         if date_col:
+            dates = _to_naive(df[date_col])
             if start_date:
-                query = query.gte(date_col, start_date.strftime("%Y-%m-%d"))
+                mask &= dates >= pd.Timestamp(start_date)
             if end_date:
-                query = query.lte(date_col, end_date.strftime("%Y-%m-%d"))
+                mask &= dates <= pd.Timestamp(end_date)
         
-        res = query.execute()
-        if res.data:
-            return pd.DataFrame(res.data)
+        result = df[mask]
+        if not result.empty:
+            return result.reset_index(drop=True)
         else:
             st.warning("No records found for your selection.")
             return pd.DataFrame()
@@ -56,8 +59,7 @@ st.title("📄 QA Reports")
 
 # Fetch available report types dynamically
 try:
-    sample_data = supabase.table("audits").select("*").limit(50).execute()
-    df_sample = pd.DataFrame(sample_data.data) if sample_data.data else pd.DataFrame()
+    df_sample = load_audits().head(50)
     report_col_candidates = [col for col in df_sample.columns if "report" in col.lower()]
     report_col = report_col_candidates[0] if report_col_candidates else None
     available_report_types = df_sample[report_col].unique().tolist() if report_col else ["weekly", "monthly"]
@@ -70,7 +72,7 @@ start_date = st.date_input("Start Date", datetime.today())
 end_date = st.date_input("End Date", datetime.today())
 
 if st.button("Generate Report"):
-    df_report = fetch_report("audits", report_type=report_type, start_date=start_date, end_date=end_date)
+    df_report = fetch_report(report_type=report_type, start_date=start_date, end_date=end_date)
     
     if not df_report.empty:
         st.dataframe(df_report)
@@ -1,5 +1,11 @@
 import streamlit as st
 
+from qa_scorecard.archive import archive_summary
+from qa_scorecard.resilience import latency_report
+from qa_scorecard.result_cache import section_cache
+from qa_scorecard.settings import load_settings, save_settings
+from qa_scorecard.ui import apply_refresh_settings
+
 st.set_page_config(
     page_title="Settings",
     page_icon="⚙️",
@@ -9,15 +15,64 @@ st.set_page_config(
 st.title("⚙️ Settings")
 st.markdown("---")
 
+saved = load_settings()
+theme_options = ["Light", "Dark", "Auto"]
+timezone_options = ["UTC", "EST", "PST", "IST"]
+
 # Settings options
 with st.expander("Application Settings", expanded=True):
-    notifications = st.checkbox("Enable email notifications", value=True)
-    auto_refresh = st.checkbox("Auto-refresh data", value=False)
-    refresh_interval = st.slider("Refresh interval (minutes)", 1, 60, 5)
+    notifications = st.checkbox("Enable email notifications", value=saved["notifications"])
+    auto_refresh = st.checkbox("Auto-refresh data", value=saved["auto_refresh"])
+    refresh_interval = st.slider("Refresh interval (minutes)", 1, 60, saved["refresh_interval"])
+    st.caption("When enabled, the server checks for changed audits once per interval "
+               "and open dashboards update automatically.")
 
 with st.expander("User Preferences"):
-    theme = st.selectbox("Theme", ["Light", "Dark", "Auto"])
-    timezone = st.selectbox("Timezone", ["UTC", "EST", "PST", "IST"])
+    theme = st.selectbox("Theme", theme_options, index=theme_options.index(saved["theme"]))
+    timezone = st.selectbox("Timezone", timezone_options, index=timezone_options.index(saved["timezone"]))
+
+with st.expander("Archive"):
+    archive_after_days = st.number_input(
+        "Archive audits older than (days)", min_value=30, max_value=3650,
+        value=saved["archive_after_days"], step=30
+    )
+    st.caption("Run `python -m qa_scorecard.archive` (e.g. nightly) to move older audits into "
+               "monthly Parquet files. Pages read them back whenever a date range reaches that far.")
+    archived = archive_summary()
+    if archived.empty:
+        st.info("Nothing archived yet.")
+    else:
+        st.dataframe(archived, hide_index=True, use_container_width=True)
+
+with st.expander("Backend Health"):
+    latency, breaker_state = latency_report()
+    st.caption(f"Circuit breaker: **{breaker_state}**. Latencies cover the last calls of each "
+               "database operation made by this server.")
+    if latency.empty:
+        st.info("No database calls recorded yet.")
+    else:
+        st.dataframe(latency, hide_index=True, use_container_width=True)
+
+with st.expander("Analytics Cache"):
+    cache_stats = section_cache.stats()
+    c_col1, c_col2, c_col3, c_col4 = st.columns(4)
+    c_col1.metric("Entries", cache_stats["entries"])
+    c_col2.metric("Memory", f"{cache_stats['bytes'] / 2**20:.1f} / {cache_stats['max_bytes'] / 2**20:.0f} MB")
+    c_col3.metric("Hit Rate", f"{cache_stats['hit_rate'] * 100:.0f}%",
+                  help=f"{cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    c_col4.metric("Evictions", cache_stats["evictions"])
+    if st.button("Clear analytics cache"):
+        section_cache.clear()
+        st.rerun()
 
 if st.button("Save Settings"):
+    settings = save_settings({
+        "notifications": notifications,
+        "auto_refresh": auto_refresh,
+        "refresh_interval": refresh_interval,
+        "theme": theme,
+        "timezone": timezone,
+        "archive_after_days": int(archive_after_days),
+    })
+    apply_refresh_settings(settings)
     st.success("Settings saved successfully!")
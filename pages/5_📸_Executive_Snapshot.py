@@ -0,0 +1,32 @@
+import streamlit as st
+import streamlit.components.v1 as components
+
+from qa_scorecard.data_store import load_audits
+from qa_scorecard.snapshots import latest_snapshot, render_snapshot, write_snapshot
+
+st.set_page_config(
+    page_title="Executive Snapshot",
+    page_icon="📸",
+    layout="wide"
+)
+
+st.title("📸 Executive Snapshot")
+st.markdown("---")
+
+# Served from the pre-rendered file: viewing this page runs no queries
+snapshot = latest_snapshot()
+if snapshot is None:
+    st.info("No snapshot has been generated yet. Schedule `python -m qa_scorecard.snapshots --every 60` "
+            "or generate one now.")
+else:
+    path, generated_at = snapshot
+    page = path.read_text(encoding="utf-8")
+    st.caption(f"Organisation-wide figures as of {generated_at:%Y-%m-%d %H:%M} UTC.")
+    components.html(page, height=1100, scrolling=True)
+    st.download_button("⬇️ Download snapshot", page, file_name=f"qa_snapshot_{generated_at:%Y%m%d}.html",
+                       mime="text/html")
+
+if st.button("🔄 Generate snapshot now"):
+    with st.spinner("Rendering snapshot..."):
+        write_snapshot(render_snapshot(load_audits()))
+    st.rerun()
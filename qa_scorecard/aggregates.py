@@ -0,0 +1,260 @@
+"""Partial-aggregate analytics engine for large audit frames.
+
+Insights, group comparisons and forecasts all reduce to sums: audit counts,
+score totals, per-question pass counts, per-group score totals and the
+sufficient statistics (n, Σx, Σy, Σx², Σxy, Σy²) of the least-squares lines
+behind the trend and the forecasts. ``aggregate`` encodes a frame into
+compact arrays once, splits it into contiguous time partitions, has a
+process pool compute each partition's sums and adds them up, so a frame of
+millions of audits uses every core instead of the script thread alone.
+Frames below ``MIN_PARTITION_ROWS`` per worker are summed inline.
+"""
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from qa_scorecard.answer_masks import ALL_QUESTIONS, QUESTION_COLUMNS, pack_frame, question_counts, question_mask
+from qa_scorecard.scorecards import COMMON_CRITICAL_COLUMNS
+
+GROUP_COLUMNS = ("department", "team_leader", "consultant")
+MIN_PARTITION_ROWS = 100_000  # below this a partition costs more to ship than to sum
+
+_CRITICAL_MASK = question_mask(c[1:] for c in COMMON_CRITICAL_COLUMNS)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide worker pool, started on first use.
+
+    Workers are spawned rather than forked: forking the multi-threaded
+    server could copy a lock some other thread holds.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+# =================== ENCODING ===================
+def encode(frame):
+    """``(arrays, labels)``: the frame as compact arrays, oldest audit first, and the group names.
+
+    ``arrays`` holds ``score``, ``days`` (since the oldest audit), the
+    ``yes``/``na`` answer masks and an integer code column per group column;
+    ``labels[column][code]`` is the group's name.
+    """
+    dates = frame["audit_date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="ISO8601")
+    stamps = pd.DatetimeIndex(dates).as_unit("ns").asi8
+    order = np.argsort(stamps, kind="stable")  # reorder the compact codes, not the frame
+    stamps = stamps[order]
+
+    yes, na = pack_frame(frame)
+    arrays = {
+        "score": pd.to_numeric(frame["score"], errors="coerce").to_numpy(dtype=float)[order],
+        "days": (stamps - stamps[0]) / 86400e9 if len(stamps) else np.zeros(0),
+        "yes": yes.astype(np.uint16)[order],
+        "na": na.astype(np.uint16)[order],
+    }
+    labels = {}
+    for column in GROUP_COLUMNS:
+        if column in frame.columns:
+            codes, uniques = pd.factorize(frame[column])
+        else:
+            codes, uniques = np.full(len(frame), -1), []
+        arrays[column] = codes.astype(np.int32)[order]
+        labels[column] = np.asarray(uniques, dtype=object)
+    return arrays, labels
+
+
+# =================== PARTIAL SUMS ===================
+def _line_sums(x, y):
+    return {"n": len(y), "x": x.sum(), "y": y.sum(), "xx": x @ x, "xy": x @ y, "yy": y @ y}
+
+
+def partial_sums(part, sizes):
+    """Sums over one partition of ``encode``'s arrays; ``sizes`` is the number of labels per group column.
+
+    The trend line regresses score on the audit's position, counted from
+    the start of the partition; ``merge_partials`` shifts it into place.
+    """
+    y = part["score"]
+    days = part["days"]
+    yes, na = part["yes"].astype(np.int64), part["na"].astype(np.int64)
+    passed, answered = question_counts(yes, na)
+    sums = {
+        "position": _line_sums(np.arange(len(y), dtype=float), y),
+        "time": _line_sums(days, y),
+        "last_day": days.max() if len(days) else -np.inf,
+        "yes": passed,
+        "answered": answered,
+        "critical": int(np.count_nonzero(~yes & ~na & _CRITICAL_MASK & ALL_QUESTIONS)),
+    }
+    for column, size in sizes.items():
+        codes = part[column] + 1  # slot 0 collects audits without a value
+        group = {
+            "n": np.bincount(codes, minlength=size + 1)[1:],
+            "y": np.bincount(codes, weights=y, minlength=size + 1)[1:],
+        }
+        if column == "consultant":  # per-consultant forecast lines
+            group["x"] = np.bincount(codes, weights=days, minlength=size + 1)[1:]
+            group["xx"] = np.bincount(codes, weights=days * days, minlength=size + 1)[1:]
+            group["xy"] = np.bincount(codes, weights=days * y, minlength=size + 1)[1:]
+            group["yy"] = np.bincount(codes, weights=y * y, minlength=size + 1)[1:]
+            last_day = np.full(size + 1, -np.inf)
+            np.maximum.at(last_day, codes, days)
+            group["last_day"] = last_day[1:]
+        sums[column] = group
+    return sums
+
+
+def merge_partials(partials):
+    """Add up partition sums, given in time order"""
+    merged = {}
+    offset = 0
+    for part in partials:
+        # Positions restart at 0 in every partition: shift them by the audits before it
+        p = part["position"]
+        shifted = {**p, "x": p["x"] + offset * p["n"],
+                   "xx": p["xx"] + 2 * offset * p["x"] + offset ** 2 * p["n"],
+                   "xy": p["xy"] + offset * p["y"]}
+        offset += p["n"]
+        part = {**part, "position": shifted}
+        if not merged:
+            merged = part
+            continue
+        for key, value in part.items():
+            if key == "last_day":
+                merged[key] = max(merged[key], value)
+            elif isinstance(value, dict):
+                merged[key] = {
+                    k: np.maximum(merged[key][k], v) if k == "last_day" else merged[key][k] + v
+                    for k, v in value.items()
+                }
+            else:
+                merged[key] = merged[key] + value
+    return merged
+
+
+def fit_line(sums):
+    """Least-squares ``(slope, intercept, r_squared)`` from a line's sums, as ``LinearRegression`` fits it"""
+    n = sums["n"]
+    sxx = sums["xx"] - sums["x"] ** 2 / n
+    syy = sums["yy"] - sums["y"] ** 2 / n
+    sxy = sums["xy"] - sums["x"] * sums["y"] / n
+    flat_x = sxx <= 1e-12 * max(sums["xx"], 1.0)
+    slope = 0.0 if flat_x else sxy / sxx
+    intercept = (sums["y"] - slope * sums["x"]) / n
+    if syy <= 1e-12 * max(sums["yy"], 1.0):
+        r_squared = 1.0  # every score equal: the flat line fits perfectly
+    else:
+        r_squared = 0.0 if flat_x else min(max(sxy * sxy / (sxx * syy), 0.0), 1.0)
+    return slope, intercept, r_squared
+
+
+# =================== AGGREGATE ===================
+class AuditAggregate:
+    """Merged sums over a frame of audits, answering the Analytics questions without the rows"""
+
+    def __init__(self, sums, labels):
+        self._sums = sums
+        self._labels = labels
+        self.count = sums["position"]["n"] if sums else 0
+
+    @property
+    def mean(self):
+        return self._sums["position"]["y"] / self.count if self.count else None
+
+    @property
+    def critical_failures(self):
+        """Audits failing a common critical question"""
+        return self._sums["critical"] if self.count else 0
+
+    @property
+    def critical_failure_rate(self):
+        """Share (%) of audits failing a common critical question"""
+        return self._sums["critical"] / self.count * 100 if self.count else None
+
+    def trend_per_audit(self):
+        """Slope of score against audit order (points per audit), None below two audits"""
+        if self.count < 2:
+            return None
+        return fit_line(self._sums["position"])[0]
+
+    def question_pass_rates(self):
+        """``{question: pass rate %}`` over audits where the question was not NA"""
+        if not self.count:
+            return {}
+        return {
+            q: self._sums["yes"][i] / self._sums["answered"][i] * 100
+            for i, q in enumerate(QUESTION_COLUMNS) if self._sums["answered"][i] > 0
+        }
+
+    def group_means(self, column):
+        """Audit count and mean score per value of ``column``, like a ``groupby``"""
+        if not self.count:
+            return pd.DataFrame(columns=["count", "mean"])
+        group = self._sums[column]
+        present = group["n"] > 0
+        return pd.DataFrame(
+            {"count": group["n"][present], "mean": group["y"][present] / group["n"][present]},
+            index=pd.Index(self._labels[column][present], name=column),
+        ).sort_index()
+
+    def group_table(self, column, label):
+        """``group_means`` as the page's ``[label, 'Avg Score', 'Audit Count']`` table"""
+        means = self.group_means(column)
+        return pd.DataFrame({
+            label: means.index,
+            "Avg Score": means["mean"].round(1).to_numpy(),
+            "Audit Count": means["count"].to_numpy(),
+        })
+
+    def forecast(self, consultant=None, days_ahead=30):
+        """``(predicted score, confidence %)`` from a line through score over time.
+
+        For one consultant or, without one, every audit; ``(None, None)``
+        below five audits overall or three for the consultant.
+        """
+        if self.count < 5:
+            return None, None
+        if consultant is None:
+            line, last_day = self._sums["time"], self._sums["last_day"]
+        else:
+            matches = np.flatnonzero(self._labels["consultant"] == consultant)
+            group = self._sums["consultant"]
+            if not len(matches) or group["n"][matches[0]] < 3:
+                return None, None
+            at = matches[0]
+            line = {k: group[k][at] for k in ("n", "x", "y", "xx", "xy", "yy")}
+            last_day = group["last_day"][at]
+        slope, intercept, r_squared = fit_line(line)
+        predicted = intercept + slope * (last_day + days_ahead)
+        return max(0, min(100, predicted)), r_squared * 100
+
+
+def aggregate(frame, workers=None):
+    """``AuditAggregate`` of ``frame``, summed across a process pool when the frame is large"""
+    if frame.empty:
+        return AuditAggregate({}, {})
+    arrays, labels = encode(frame)
+    sizes = {column: len(names) for column, names in labels.items()}
+    workers = workers or os.cpu_count() or 1
+    partitions = max(1, min(workers, math.ceil(len(frame) / MIN_PARTITION_ROWS)))
+    if partitions == 1:
+        return AuditAggregate(partial_sums(arrays, sizes), labels)
+
+    bounds = np.linspace(0, len(frame), partitions + 1).astype(int)
+    parts = [{k: v[start:end] for k, v in arrays.items()} for start, end in zip(bounds[:-1], bounds[1:])]
+    partials = list(get_pool().map(partial_sums, parts, [sizes] * len(parts)))
+    return AuditAggregate(merge_partials(partials), labels)
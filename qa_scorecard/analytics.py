@@ -0,0 +1,186 @@
+"""Insight, coaching-plan and forecast generation over an audits frame.
+
+These work on any DataFrame of audits (with ``audit_date`` parsed to
+datetimes) and have no Streamlit dependency, so the Analytics page, the
+JSON API and batch jobs share one implementation. Insights and forecasts
+are read from an ``AuditAggregate`` (see ``qa_scorecard.aggregates``), so
+large frames are summed across all cores.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from qa_scorecard.aggregates import aggregate
+
+
+def generate_ai_insights(df, selected_consultant=None, selected_team=None, selected_dept=None):
+    """Generate AI-powered insights from audit data"""
+    if df.empty:
+        return ["📊 Not enough data for AI insights yet. Submit more audits!"]
+    return aggregate_insights(aggregate(df), selected_consultant)
+
+
+def aggregate_insights(sums, selected_consultant=None):
+    """``generate_ai_insights`` from an ``AuditAggregate`` of the audits"""
+    insights = []
+    
+    if not sums.count:
+        return ["📊 Not enough data for AI insights yet. Submit more audits!"]
+    
+    # Overall performance trend
+    if sums.count >= 5:
+        trend = sums.trend_per_audit()
+        if trend > 1:
+            insights.append(f"📈 **Positive Trend**: Overall scores improving by {trend:.1f}% per audit")
+        elif trend < -1:
+            insights.append(f"📉 **Negative Trend**: Overall scores declining by {abs(trend):.1f}% per audit")
+    
+    # Department comparison
+    dept_perf = sums.group_means('department')['mean'].sort_values(ascending=False)
+    if len(dept_perf) > 1:
+        best_dept = dept_perf.index[0]
+        worst_dept = dept_perf.index[-1]
+        insights.append(f"🏆 **Top Department**: {best_dept} ({dept_perf.iloc[0]:.1f}%)")
+        insights.append(f"⚡ **Needs Attention**: {worst_dept} ({dept_perf.iloc[-1]:.1f}%)")
+    
+    # Question performance analysis
+    q_performance = sums.question_pass_rates()
+    if q_performance:
+        worst_q = min(q_performance, key=q_performance.get)
+        best_q = max(q_performance, key=q_performance.get)
+        insights.append(f"❓ **Weakest Question**: {worst_q.upper()} ({q_performance[worst_q]:.1f}% pass rate)")
+        insights.append(f"✅ **Strongest Question**: {best_q.upper()} ({q_performance[best_q]:.1f}% pass rate)")
+    
+    # Consultant-specific insights
+    if selected_consultant:
+        consultants = sums.group_means('consultant')
+        if selected_consultant in consultants.index and consultants.at[selected_consultant, 'count'] >= 3:
+            consultant_avg = consultants.at[selected_consultant, 'mean']
+            overall_avg = sums.mean
+            if consultant_avg > overall_avg + 5:
+                insights.append(f"🌟 **Star Performer**: {selected_consultant} is {consultant_avg-overall_avg:.1f}% above average!")
+            elif consultant_avg < overall_avg - 5:
+                insights.append(f"📚 **Training Opportunity**: {selected_consultant} is {overall_avg-consultant_avg:.1f}% below average")
+    
+    # Critical failures analysis
+    failure_rate = sums.critical_failure_rate
+    if failure_rate > 20:
+        insights.append(f"⚠️ **High Critical Failures**: {failure_rate:.1f}% of audits have critical failures")
+    
+    if not insights:
+        insights.append("📊 Submit more audits to generate detailed insights")
+    
+    return insights
+
+
+def generate_coaching_plan(df, consultant_name):
+    """Generate personalized coaching plan based on audit history"""
+    if consultant_name not in df['consultant'].values:
+        return ["Select a consultant with audit history"]
+    
+    consultant_df = df[df['consultant'] == consultant_name]
+    if len(consultant_df) < 3:
+        return ["Need at least 3 audits to generate coaching plan"]
+    
+    plan = []
+    
+    # Overall performance
+    consultant_avg = consultant_df['score'].mean()
+    overall_avg = df['score'].mean()
+    
+    plan.append(f"## 🎯 Coaching Plan for {consultant_name}")
+    plan.append(f"**Current Average**: {consultant_avg:.1f}%")
+    plan.append(f"**Team Average**: {overall_avg:.1f}%")
+    plan.append(f"**Performance Gap**: {consultant_avg - overall_avg:+.1f}%")
+    
+    # Identify weak areas
+    question_cols = [f'q{i}' for i in range(1, 13) if f'q{i}' in df.columns]
+    weak_areas = []
+    
+    for q in question_cols:
+        if q in consultant_df.columns:
+            consultant_yes = (consultant_df[q] == 'Yes').sum()
+            consultant_total = len(consultant_df[consultant_df[q] != 'NA'])
+            if consultant_total > 0:
+                consultant_rate = (consultant_yes / consultant_total) * 100
+                
+                overall_yes = (df[q] == 'Yes').sum()
+                overall_total = len(df[df[q] != 'NA'])
+                if overall_total > 0:
+                    overall_rate = (overall_yes / overall_total) * 100
+                    
+                    if consultant_rate < 70 and consultant_rate < overall_rate - 10:
+                        weak_areas.append({
+                            'question': q.upper(),
+                            'consultant_rate': consultant_rate,
+                            'team_rate': overall_rate,
+                            'gap': overall_rate - consultant_rate
+                        })
+    
+    if weak_areas:
+        plan.append("\n## 🎯 Areas Needing Improvement:")
+        for area in sorted(weak_areas, key=lambda x: x['gap'], reverse=True)[:3]:
+            plan.append(f"- **{area['question']}**: {area['consultant_rate']:.1f}% vs team {area['team_rate']:.1f}% (gap: {area['gap']:.1f}%)")
+    
+    # Trend analysis
+    if len(consultant_df) >= 4:
+        dates = pd.to_datetime(consultant_df['audit_date'])
+        scores = consultant_df['score'].values
+        dates_numeric = np.array([date.timestamp() for date in dates])
+        
+        # Calculate trend
+        if len(dates_numeric) > 1:
+            model = LinearRegression()
+            model.fit(dates_numeric.reshape(-1, 1), scores)
+            trend = model.coef_[0] * (24*3600*30)  # Per month trend
+            
+            if trend > 5:
+                plan.append(f"\n📈 **Positive Trend**: Improving by {trend:.1f}% per month")
+                plan.append("**Action**: Continue current practices, consider mentoring others")
+            elif trend < -5:
+                plan.append(f"\n📉 **Negative Trend**: Declining by {abs(trend):.1f}% per month")
+                plan.append("**Action**: Schedule one-on-one coaching session")
+            else:
+                plan.append("\n📊 **Stable Performance**: Consistent scores")
+                plan.append("**Action**: Focus on specific skill development")
+    
+    # Critical failures
+    critical_cols = ['q2', 'q10', 'q3', 'q6', 'q7']
+    critical_cols = [c for c in critical_cols if c in consultant_df.columns]
+    
+    critical_fails = []
+    for q in critical_cols:
+        if q in consultant_df.columns:
+            fails = (consultant_df[q] == 'No').sum()
+            if fails > 0:
+                critical_fails.append(f"{q.upper()}: {fails} failure(s)")
+    
+    if critical_fails:
+        plan.append("\n⚠️ **Critical Issues to Address:**")
+        plan.extend([f"- {fail}" for fail in critical_fails])
+        plan.append("**Priority**: Address these immediately as they cause 0% scores")
+    
+    # Recommendations
+    plan.append("\n## 🎯 Recommended Actions:")
+    
+    if consultant_avg < 70:
+        plan.append("1. **Immediate Coaching**: Schedule daily check-ins for 2 weeks")
+        plan.append("2. **Shadowing**: Pair with top performer for a week")
+        plan.append("3. **Focused Training**: Target lowest scoring questions")
+    elif consultant_avg < 85:
+        plan.append("1. **Weekly Review**: Analyze 2 audits per week with manager")
+        plan.append("2. **Skill Workshops**: Attend department training sessions")
+        plan.append("3. **Peer Review**: Exchange audits with colleague for feedback")
+    else:
+        plan.append("1. **Mentor Role**: Start mentoring newer team members")
+        plan.append("2. **Process Improvement**: Identify areas for department improvement")
+        plan.append("3. **Advanced Training**: Prepare for team leader role")
+    
+    return plan
+
+
+def predict_future_scores(df, consultant_name=None, days_ahead=30):
+    """Predict future scores using linear regression"""
+    if df.empty or len(df) < 5:
+        return None, None
+    return aggregate(df).forecast(consultant_name, days_ahead)
@@ -0,0 +1,206 @@
+"""Streaming EWMA anomaly detection on incoming audits.
+
+Each tracked series (a consultant's scores, a consultant's failures on one
+critical question, a department's failures on one critical question) keeps
+an EWMA control chart: a slow exponentially weighted baseline mean and
+variance, and a fast EWMA of recent values. An alert fires when the fast
+EWMA leaves the baseline's control limits, i.e. when
+
+    |fast - baseline| > L * sigma * sqrt(lambda / (2 - lambda))
+
+Every audit touches a fixed handful of series and each update is O(1), so
+detection cost does not grow with history. Audits are consumed once, in
+arrival order; later edits to an audit are not replayed into the charts.
+"""
+import math
+import threading
+from collections import deque
+
+import pandas as pd
+
+from qa_scorecard.data_store import audits_dataset, is_audit_dataset, load_audits, store
+from qa_scorecard.scorecards import SCORING_CARDS
+
+FAST_ALPHA = 0.3  # lambda of the monitored EWMA
+BASELINE_ALPHA = 0.05
+CONTROL_LIMIT = 3.0
+WARMUP = 8  # observations before a series may alert
+MIN_STD = {"score": 5.0, "critical_failure_rate": 0.25}  # floors so one-off failures do not alert
+MAX_ALERTS = 200
+
+
+class EwmaChart:
+    """O(1) EWMA control chart state for one series"""
+
+    __slots__ = ("count", "baseline", "variance", "fast", "alarm")
+
+    def __init__(self):
+        self.count = 0
+        self.baseline = 0.0
+        self.variance = 0.0
+        self.fast = 0.0
+        self.alarm = False
+
+    def update(self, value, min_std):
+        """Add one observation; returns the signed deviation if it breaches the limits"""
+        if self.count == 0:
+            self.baseline = self.fast = float(value)
+        else:
+            self.fast += FAST_ALPHA * (value - self.fast)
+        deviation = self.fast - self.baseline
+        sigma = max(math.sqrt(self.variance), min_std)
+        limit = CONTROL_LIMIT * sigma * math.sqrt(FAST_ALPHA / (2 - FAST_ALPHA))
+        breach = self.count >= WARMUP and abs(deviation) > limit
+
+        # Fold the observation into the baseline after testing against it
+        delta = value - self.baseline
+        self.baseline += BASELINE_ALPHA * delta
+        self.variance = (1 - BASELINE_ALPHA) * (self.variance + BASELINE_ALPHA * delta * delta)
+        self.count += 1
+
+        # Alert once per episode: stay latched until the series settles back
+        # well inside the limits, so a sustained shift is not re-reported
+        fired = breach and not self.alarm
+        if breach:
+            self.alarm = True
+        elif abs(deviation) < 0.5 * limit:
+            self.alarm = False
+        return deviation if fired else None
+
+
+class AnomalyDetector:
+    """Per-consultant and per-question charts fed one audit at a time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._charts = {}
+        self._seen = set()
+        self.alerts = deque(maxlen=MAX_ALERTS)
+
+    def _chart(self, key):
+        chart = self._charts.get(key)
+        if chart is None:
+            chart = self._charts[key] = EwmaChart()
+        return chart
+
+    def _check(self, key, value, metric, audit):
+        deviation = self._chart(key).update(value, MIN_STD[metric])
+        if deviation is None:
+            return
+        chart = self._charts[key]
+        if metric == "score":
+            direction = "drop" if deviation < 0 else "spike"
+        else:
+            direction = "spike" if deviation > 0 else "drop"
+        self.alerts.append({
+            "audit_date": audit.get("audit_date"),
+            "department": audit.get("department"),
+            "team_leader": audit.get("team_leader"),
+            "consultant": key[2] if key[0] == "consultant" else None,
+            "question": key[-1] if metric == "critical_failure_rate" else None,
+            "metric": metric,
+            "direction": direction,
+            "recent": chart.fast,
+            "baseline": chart.baseline,
+        })
+
+    def observe(self, audit):
+        """Update every series this audit belongs to"""
+        with self._lock:
+            audit_id = audit.get("id")
+            if audit_id is not None:
+                if audit_id in self._seen:
+                    return
+                self._seen.add(audit_id)
+            consultant = audit.get("consultant")
+            # Consultant series are per department too: a name can appear on
+            # several departments' scorecards, whose scores are not comparable
+            department = audit.get("department")
+            score = audit.get("score")
+            if consultant and score is not None and not pd.isna(score):
+                self._check(("consultant", department, consultant, "score"), float(score), "score", audit)
+            card = SCORING_CARDS.get(department, {})
+            for q in card.get("critical_questions", []):
+                answer = audit.get(f"q{q}")
+                if answer not in ("Yes", "No"):
+                    continue
+                failed = 1.0 if answer == "No" else 0.0
+                if consultant:
+                    self._check(("consultant", department, consultant, f"q{q}"), failed,
+                                "critical_failure_rate", audit)
+                self._check(("department", department, f"q{q}"), failed, "critical_failure_rate", audit)
+
+    def observe_frame(self, frame):
+        if frame is None or frame.empty:
+            return
+        if "audit_date" in frame.columns:
+            frame = frame.sort_values("audit_date", kind="stable")
+        for audit in frame.to_dict("records"):
+            self.observe(audit)
+
+    def recent_alerts(self, department=None, team_leader=None, consultant=None, limit=10):
+        """Newest alerts first, optionally limited to one department, team or consultant"""
+        with self._lock:
+            alerts = list(self.alerts)
+        selected = []
+        for alert in reversed(alerts):
+            if department and alert["department"] != department:
+                continue
+            if team_leader and alert["team_leader"] != team_leader:
+                continue
+            if consultant and alert["consultant"] != consultant:
+                continue
+            selected.append(alert)
+            if len(selected) >= limit:
+                break
+        return selected
+
+
+def describe_alert(alert):
+    """One-line, human readable summary of an alert"""
+    who = alert["consultant"] or alert["department"]
+    when = str(alert["audit_date"])[:10]
+    if alert["metric"] == "score":
+        return (f"📉 **Score {alert['direction']}** for {who} ({when}): recent average "
+                f"{alert['recent']:.1f}% vs usual {alert['baseline']:.1f}%")
+    return (f"⚠️ **Critical {alert['question'].upper()} failures {alert['direction']}** for {who} ({when}): "
+            f"recent rate {alert['recent'] * 100:.0f}% vs usual {alert['baseline'] * 100:.0f}%")
+
+
+# =================== SHARED DETECTOR ===================
+# Every series is keyed by department, so a department's detector, fed only
+# its shard, raises the same alerts for it as the all-audits one
+_detectors = {}  # dataset -> detector
+_detector_lock = threading.Lock()
+_catch_up = set()  # datasets whose detector should replay the next load
+
+
+def _on_store_change(name, previous, current):
+    if not is_audit_dataset(name):
+        return
+    with _detector_lock:
+        detector = _detectors.get(name)
+        if detector is None:
+            return
+        if current is None:
+            _catch_up.add(name)  # feed whatever the next load brings
+            return
+        detector.observe_frame(current)
+
+
+store.subscribe(_on_store_change)
+
+
+def get_detector(department=None):
+    """The process-wide detector of all audits (or one department's), warmed up by replaying history on first use"""
+    dataset = audits_dataset(department)
+    with _detector_lock:
+        detector = _detectors.get(dataset)
+        if detector is None:
+            detector = _detectors[dataset] = AnomalyDetector()
+            _catch_up.add(dataset)
+        if dataset in _catch_up:
+            # Audits already seen are skipped, so only new ones are replayed
+            detector.observe_frame(load_audits(department))
+            _catch_up.discard(dataset)
+        return detector
@@ -0,0 +1,122 @@
+"""Bit-packed audit answers and popcount scoring.
+
+Each audit's twelve answers are stored as two 12-bit integers next to the
+``q1``-``q12`` text columns: ``yes_mask`` has bit ``i - 1`` set when
+question ``i`` was answered Yes, ``na_mask`` when it was NA. A question in
+neither mask was answered No. Blank answers pack as NA.
+
+Bulk readers fetch the two masks instead of the twelve text columns
+(``COMPACT_COLUMNS``) and expand them locally, and scoring, critical checks
+and per-question pass rates work on whole integer arrays with bitwise
+operations and a popcount lookup table.
+"""
+import numpy as np
+import pandas as pd
+
+from qa_scorecard.scorecards import SCORING_CARDS
+
+QUESTION_COLUMNS = [f"q{i}" for i in range(1, 13)]
+ALL_QUESTIONS = (1 << len(QUESTION_COLUMNS)) - 1
+ANSWER_DTYPE = pd.CategoricalDtype(["Yes", "No", "NA"])
+COMPACT_COLUMNS = ",".join([
+    "id", "created_at", "updated_at", "audit_date", "department", "team_leader", "consultant",
+    "client_id", "score", "scorecard_version", "comments", "dedupe_key", "yes_mask", "na_mask",
+])
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(ALL_QUESTIONS + 1)], dtype=np.uint8)
+
+
+def popcount(masks):
+    """Set bits in each 12-bit mask"""
+    return _POPCOUNT[np.asarray(masks, dtype=np.int64) & ALL_QUESTIONS]
+
+
+def question_mask(questions):
+    """Mask with the bits of question numbers (e.g. a scorecard's critical questions)"""
+    mask = 0
+    for q in questions:
+        mask |= 1 << (int(q) - 1)
+    return mask
+
+
+def pack_answers(answers):
+    """``(yes_mask, na_mask)`` of one audit's ``q1``-``q12`` answers"""
+    yes = na = 0
+    for bit, q in enumerate(QUESTION_COLUMNS):
+        answer = answers.get(q)
+        if answer == "Yes":
+            yes |= 1 << bit
+        elif answer != "No":
+            na |= 1 << bit
+    return yes, na
+
+
+def pack_frame(frame):
+    """``(yes, na)`` mask arrays for a frame's rows.
+
+    Uses the frame's mask columns where they are filled and packs the text
+    answers of any other rows (e.g. archived before masks existed).
+    """
+    yes = np.zeros(len(frame), dtype=np.int64)
+    na = np.zeros(len(frame), dtype=np.int64)
+    if "yes_mask" in frame.columns and "na_mask" in frame.columns:
+        stored = frame["yes_mask"].notna().to_numpy() & frame["na_mask"].notna().to_numpy()
+        yes[stored] = frame["yes_mask"].to_numpy()[stored].astype(np.int64)
+        na[stored] = frame["na_mask"].to_numpy()[stored].astype(np.int64)
+    else:
+        stored = np.zeros(len(frame), dtype=bool)
+    if stored.all():
+        return yes, na
+
+    text = ~stored
+    for bit, q in enumerate(QUESTION_COLUMNS):
+        if q in frame.columns:
+            answers = frame[q].to_numpy(dtype=object)[text]
+            yes[text] |= (answers == "Yes").astype(np.int64) << bit
+            na[text] |= ((answers != "Yes") & (answers != "No")).astype(np.int64) << bit
+        else:
+            na[text] |= 1 << bit
+    return yes, na
+
+
+def expand_answers(frame):
+    """Add ``q1``-``q12`` (categorical Yes/No/NA) decoded from the mask columns"""
+    if frame.empty or "yes_mask" not in frame.columns:
+        return frame
+    yes, na = pack_frame(frame)
+    codes = {}
+    for bit, q in enumerate(QUESTION_COLUMNS):
+        # category codes: 0 Yes, 1 No, 2 NA
+        code = np.where((na >> bit) & 1, 2, np.where((yes >> bit) & 1, 0, 1)).astype(np.int8)
+        codes[q] = pd.Categorical.from_codes(code, dtype=ANSWER_DTYPE)
+    return frame.assign(**codes)
+
+
+def score_masks(yes, na, critical_mask):
+    """Scores as ``calculate_score`` gives them, for whole mask arrays.
+
+    ``critical_mask`` is one mask or an array of per-row masks; any
+    critical question answered No zeroes the score.
+    """
+    yes = np.asarray(yes, dtype=np.int64)
+    answered = ~np.asarray(na, dtype=np.int64) & ALL_QUESTIONS
+    failed = (answered & ~yes & np.asarray(critical_mask, dtype=np.int64)) != 0
+    possible = popcount(answered)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.round(popcount(yes & answered) / possible * 100, 2)
+    return np.where(failed | (possible == 0), 0.0, scores)
+
+
+def critical_masks(departments):
+    """Per-row critical-question masks for an array of department names"""
+    lookup = {d: question_mask(card.get("critical_questions", [])) for d, card in SCORING_CARDS.items()}
+    return pd.Series(departments, dtype=object).map(lookup).fillna(0).to_numpy(dtype=np.int64)
+
+
+def question_counts(yes, na):
+    """``(passed, answered)`` per question: arrays of twelve counts"""
+    yes = np.asarray(yes, dtype=np.int64)
+    answered = ~np.asarray(na, dtype=np.int64) & ALL_QUESTIONS
+    bits = np.arange(len(QUESTION_COLUMNS))
+    passed = np.array([np.count_nonzero((yes >> b) & 1) for b in bits])
+    return passed, np.array([np.count_nonzero((answered >> b) & 1) for b in bits])
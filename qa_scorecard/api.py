@@ -0,0 +1,204 @@
+"""Local JSON API over the analytics functions.
+
+Usage::
+
+    python -m qa_scorecard.api [--host 127.0.0.1] [--port 8765]
+
+Endpoints (all GET, filters optional)::
+
+    /insights?department=&team_leader=&consultant=&start=YYYY-MM-DD&end=YYYY-MM-DD
+    /coaching-plan?consultant=...
+    /prediction?consultant=&days_ahead=30
+    /health
+
+Audits come from the shared data store and are kept current by the change
+feed, which the API always runs (every ``refresh_interval`` minutes from
+the saved settings), whether or not dashboards auto-refresh. Responses are cached by endpoint, parameters and data version, so a
+repeated question is a dictionary lookup until the data actually changes.
+"""
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import pandas as pd
+
+from qa_scorecard.analytics import generate_ai_insights, generate_coaching_plan, predict_future_scores
+from qa_scorecard.change_feed import ensure_change_feed
+from qa_scorecard.data_store import AUDITS, load_versioned_audits, store
+from qa_scorecard.settings import load_settings
+
+CACHE_SIZE = 512
+FILTER_PARAMS = ("department", "team_leader", "consultant", "start", "end")
+
+
+class BadRequest(ValueError):
+    """A request parameter is missing or malformed"""
+
+
+# =================== DATA ===================
+_frame = None
+_frame_version = None
+_frame_lock = threading.Lock()
+
+
+def _audits():
+    """``(version, frame)`` with ``audit_date`` parsed, prepared once per data version"""
+    global _frame, _frame_version
+    with _frame_lock:
+        version, frame = load_versioned_audits()
+        if _frame is None or _frame_version != version:
+            frame = frame.copy()
+            if not frame.empty:
+                if "department" not in frame.columns:
+                    frame["department"] = "Not Assigned"
+                frame["audit_date"] = pd.to_datetime(frame["audit_date"], format="ISO8601")
+            _frame, _frame_version = frame, version
+        return _frame_version, _frame
+
+
+def _parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be a YYYY-MM-DD date") from None
+
+
+def _filtered(frame, params):
+    if frame.empty:
+        return frame
+    for column in ("department", "team_leader", "consultant"):
+        if params.get(column):
+            frame = frame[frame[column] == params[column]]
+    start, end = _parse_date(params, "start"), _parse_date(params, "end")
+    if start or end:
+        tz = frame["audit_date"].dt.tz
+        if start:
+            frame = frame[frame["audit_date"] >= pd.Timestamp(start, tz=tz)]
+        if end:
+            frame = frame[frame["audit_date"] < pd.Timestamp(end, tz=tz) + pd.Timedelta(days=1)]
+    return frame
+
+
+# =================== ENDPOINTS ===================
+def insights(frame, params):
+    filtered = _filtered(frame, params)
+    return {
+        "audits": len(filtered),
+        "insights": generate_ai_insights(
+            filtered, params.get("consultant"), params.get("team_leader"), params.get("department")
+        ),
+    }
+
+
+def coaching_plan(frame, params):
+    consultant = params.get("consultant")
+    if not consultant:
+        raise BadRequest("consultant is required")
+    if frame.empty:
+        return {"consultant": consultant, "plan": ["Select a consultant with audit history"]}
+    return {"consultant": consultant, "plan": generate_coaching_plan(frame, consultant)}
+
+
+def prediction(frame, params):
+    try:
+        days_ahead = int(params.get("days_ahead", 30))
+    except ValueError:
+        raise BadRequest("days_ahead must be an integer") from None
+    consultant = params.get("consultant") or None
+    predicted, confidence = predict_future_scores(frame, consultant, days_ahead)
+    return {
+        "consultant": consultant,
+        "days_ahead": days_ahead,
+        "predicted_score": None if predicted is None else round(float(predicted), 1),
+        "confidence": None if confidence is None else round(float(confidence), 1),
+    }
+
+
+ENDPOINTS = {
+    "/insights": insights,
+    "/coaching-plan": coaching_plan,
+    "/prediction": prediction,
+}
+
+
+# =================== RESPONSE CACHE ===================
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def respond(path, params):
+    """JSON-ready body for an endpoint, from cache when the data has not changed"""
+    handler = ENDPOINTS[path]
+    version, frame = _audits()
+    key = (path, tuple(sorted(params.items())), version)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    body = {"data_version": version, **handler(frame, params)}
+    with _cache_lock:
+        _cache[key] = body
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+        if url.path == "/health":
+            self._send(200, {"status": "ok", "data_version": store.version(AUDITS)})
+            return
+        if url.path not in ENDPOINTS:
+            self._send(404, {"error": f"unknown endpoint {url.path}"})
+            return
+        try:
+            self._send(200, respond(url.path, params))
+        except BadRequest as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet; WFM tooling polls frequently
+
+
+def serve(host="127.0.0.1", port=8765):
+    # Always follow the change feed: nothing else refreshes this process's store
+    ensure_change_feed(load_settings()["refresh_interval"] * 60)
+    server = ThreadingHTTPServer((host, port), _Handler)
+    print(f"QA analytics API on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve QA analytics as JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
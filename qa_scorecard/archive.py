@@ -0,0 +1,308 @@
+"""Cold storage for old audits: monthly Parquet partitions plus a manifest.
+
+The ``audits`` table keeps only recent ("hot") audits. The archival job moves
+audits older than the ``archive_after_days`` setting into one compressed
+Parquet file per month and deletes them from the table:
+
+    python -m qa_scorecard.archive [--days 365] [--dry-run]
+
+``manifest.json`` records each partition's row count, min/max audit date
+and per-department / per-team-leader statistics, so readers can skip
+partitions outside a requested date range without opening them. Partitions
+are rewritten atomically and rows are deleted from the table only after
+their partition and the manifest are on disk, so an interrupted run can
+simply be repeated. A row is deleted only while it still has the
+``updated_at`` that was archived; rows edited meanwhile stay in the table
+and are dropped from the archive again.
+
+Hard deletes are invisible to the change feed, so the manifest
+``generation`` is bumped once more after the delete; running servers
+compare it before handing out audits and reload when it moved (see
+``data_store.follow_archive``).
+"""
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from qa_scorecard.db import get_client
+from qa_scorecard.result_cache import ResultCache
+from qa_scorecard.scorecards import COMMON_CRITICAL_COLUMNS
+from qa_scorecard.settings import STATE_DIR, load_settings
+
+ARCHIVE_DIR = Path(os.environ.get("QA_ARCHIVE_DIR", STATE_DIR / "archive"))
+MANIFEST_PATH = ARCHIVE_DIR / "manifest.json"
+GROUP_COLUMNS = ("department", "team_leader")
+FETCH_PAGE_SIZE = 1000  # PostgREST's default max-rows per response
+DELETE_BATCH_SIZE = 500
+
+_manifest_lock = threading.Lock()
+_manifest_cache = (None, None)  # (mtime, manifest)
+# Partitions read by pages, keyed by month and file mtime so rewrites are picked up
+_partition_cache = ResultCache(max_bytes=512 * 1024 * 1024)
+
+
+# =================== MANIFEST ===================
+def read_manifest():
+    """The archive manifest (``{"generation": n, "partitions": {month: entry}}``)"""
+    global _manifest_cache
+    try:
+        mtime = MANIFEST_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {"generation": 0, "partitions": {}}
+    with _manifest_lock:
+        if _manifest_cache[0] != mtime:
+            with open(MANIFEST_PATH, encoding="utf-8") as f:
+                _manifest_cache = (mtime, json.load(f))
+        return _manifest_cache[1]
+
+
+def _write_manifest(manifest):
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = MANIFEST_PATH.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def archive_generation():
+    """Bumps whenever archived data or the set of archived audits changes; part of cache keys for archived results"""
+    return read_manifest()["generation"]
+
+
+def partition_stats(frame):
+    """Manifest entry for one partition: row count, date bounds and per-group score statistics"""
+    scores = pd.to_numeric(frame["score"], errors="coerce")
+    critical = [c for c in COMMON_CRITICAL_COLUMNS if c in frame.columns]
+    critical_failures = (frame[critical] == "No").any(axis=1) if critical else pd.Series(False, index=frame.index)
+    stats = pd.DataFrame({"score": scores, "critical": critical_failures.astype(int)})
+    groups = {}
+    for column in GROUP_COLUMNS:
+        if column not in frame.columns:
+            continue
+        grouped = stats.groupby(frame[column].fillna("Not Assigned"))
+        summary = grouped["score"].agg(["count", "mean", "min", "max"]).join(grouped["critical"].sum())
+        groups[column] = {
+            name: {
+                "count": int(row["count"]),
+                "mean_score": round(float(row["mean"]), 2),
+                "min_score": float(row["min"]),
+                "max_score": float(row["max"]),
+                "critical_failures": int(row["critical"]),
+            }
+            for name, row in summary.iterrows()
+        }
+    dates = frame["audit_date"].astype(str)
+    return {
+        "rows": len(frame),
+        "min_date": dates.min(),
+        "max_date": dates.max(),
+        "groups": groups,
+    }
+
+
+def archive_summary():
+    """One row per archived month for display"""
+    partitions = read_manifest()["partitions"]
+    return pd.DataFrame([
+        {
+            "Month": month,
+            "Audits": entry["rows"],
+            "First Audit": entry["min_date"][:10],
+            "Last Audit": entry["max_date"][:10],
+            "Size (MB)": round(entry.get("bytes", 0) / 2**20, 2),
+        }
+        for month, entry in sorted(partitions.items())
+    ])
+
+
+# =================== PARTITIONS ===================
+def _partition_path(month):
+    return ARCHIVE_DIR / f"audits_{month}.parquet"
+
+
+def _arrow_safe(frame):
+    """Stringify object columns holding mixed types (e.g. numeric and text client IDs)"""
+    frame = frame.copy()
+    for column in frame.columns[frame.dtypes == object]:
+        if pd.api.types.infer_dtype(frame[column], skipna=True).startswith("mixed"):
+            frame[column] = frame[column].map(lambda v: v if v is None or v != v else str(v))
+    return frame
+
+
+def _sort_newest_first(frame):
+    return frame.sort_values(["audit_date", "id"], ascending=[False, True], ignore_index=True)
+
+
+def write_partition(month, rows, manifest):
+    """Merge ``rows`` into the month's partition (re-archived ids replace older copies)"""
+    path = _partition_path(month)
+    if path.exists():
+        rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+    rows = _sort_newest_first(rows.drop_duplicates("id", keep="last"))
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    _arrow_safe(rows).to_parquet(tmp_path, compression="zstd", index=False)
+    os.replace(tmp_path, path)
+    manifest["partitions"][month] = {"file": path.name, "bytes": path.stat().st_size, **partition_stats(rows)}
+
+
+def partitions_between(start_date=None, end_date=None):
+    """Months whose audits overlap ``[start_date, end_date]`` (inclusive dates); the rest are pruned"""
+    start = start_date.isoformat() if start_date else None
+    end = (end_date + timedelta(days=1)).isoformat() if end_date else None
+    return [
+        month for month, entry in sorted(read_manifest()["partitions"].items())
+        if (start is None or entry["max_date"] >= start) and (end is None or entry["min_date"] < end)
+    ]
+
+
+def _drop_from_partition(month, ids, manifest):
+    """Remove ``ids`` from the month's partition (deleting it once empty)"""
+    path = _partition_path(month)
+    rows = pd.read_parquet(path)
+    rows = rows[~rows["id"].isin(ids)]
+    if rows.empty:
+        path.unlink()
+        del manifest["partitions"][month]
+        return
+    tmp_path = path.with_suffix(".tmp")
+    rows.to_parquet(tmp_path, compression="zstd", index=False)
+    os.replace(tmp_path, path)
+    manifest["partitions"][month] = {"file": path.name, "bytes": path.stat().st_size, **partition_stats(rows)}
+
+
+def _read_partition(month):
+    path = _partition_path(month)
+    return _partition_cache.get_or_compute((month, path.stat().st_mtime_ns), lambda: pd.read_parquet(path))
+
+
+def read_archive(start_date=None, end_date=None, department=None):
+    """Archived audits between the dates (inclusive), newest first, reading only overlapping partitions.
+
+    With a department, only that department's audits.
+    """
+    frames = [_read_partition(month) for month in partitions_between(start_date, end_date)]
+    if not frames:
+        return pd.DataFrame()
+    frame = pd.concat(frames, ignore_index=True)
+    dates = frame["audit_date"].astype(str)
+    mask = pd.Series(True, index=frame.index)
+    if start_date:
+        mask &= dates >= start_date.isoformat()
+    if end_date:
+        mask &= dates < (end_date + timedelta(days=1)).isoformat()
+    if department is not None:
+        mask &= frame["department"] == department
+    return _sort_newest_first(frame[mask])
+
+
+def read_archive_columns(columns):
+    """``columns`` (those present) of every archived audit, read straight from the partitions"""
+    frames = []
+    for month in sorted(read_manifest()["partitions"]):
+        path = _partition_path(month)
+        schema = pq.read_schema(path).names
+        frames.append(pd.read_parquet(path, columns=[c for c in columns if c in schema]))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+def archive_bounds():
+    """``(first, last)`` archived audit dates, or None when nothing is archived"""
+    partitions = read_manifest()["partitions"].values()
+    if not partitions:
+        return None
+    return (
+        pd.Timestamp(min(p["min_date"] for p in partitions)).date(),
+        pd.Timestamp(max(p["max_date"] for p in partitions)).date(),
+    )
+
+
+# =================== ARCHIVAL JOB ===================
+def fetch_cold_rows(client, cutoff):
+    """Every audit dated before ``cutoff``, oldest first"""
+    rows = []
+    start = 0
+    while True:
+        response = (
+            client.table("audits").select("*")
+            .lt("audit_date", cutoff.isoformat())
+            .order("audit_date")
+            .order("id")
+            .range(start, start + FETCH_PAGE_SIZE - 1)
+            .execute()
+        )
+        batch = response.data or []
+        rows.extend(batch)
+        if len(batch) < FETCH_PAGE_SIZE:
+            break
+        start += FETCH_PAGE_SIZE
+    return pd.DataFrame(rows)
+
+
+def delete_archived(client, cold):
+    """Delete archived rows still at the archived ``updated_at``; returns the ids deleted"""
+    archived = [
+        {"id": int(audit_id), "updated_at": updated_at}
+        for audit_id, updated_at in zip(cold["id"], cold["updated_at"])
+    ]
+    deleted = []
+    for start in range(0, len(archived), DELETE_BATCH_SIZE):
+        response = client.rpc(
+            "delete_archived_audits", {"archived": archived[start:start + DELETE_BATCH_SIZE]}
+        ).execute()
+        deleted.extend(response.data or [])
+    return deleted
+
+
+def run(days=None, client=None, dry_run=False, log=print):
+    """Archive audits older than ``days`` (default: the ``archive_after_days`` setting)"""
+    days = days if days is not None else load_settings()["archive_after_days"]
+    client = client or get_client()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    cold = fetch_cold_rows(client, cutoff)
+    if cold.empty:
+        log(f"No audits before {cutoff:%Y-%m-%d}; nothing to archive")
+        return 0
+    months = pd.to_datetime(cold["audit_date"], format="ISO8601", utc=True).dt.strftime("%Y-%m")
+    log(f"{len(cold)} audits before {cutoff:%Y-%m-%d} across {months.nunique()} month(s)")
+    if dry_run:
+        return len(cold)
+
+    manifest = json.loads(json.dumps(read_manifest()))  # private copy to update
+    for month, rows in cold.groupby(months, sort=True):
+        write_partition(month, rows.reset_index(drop=True), manifest)
+        log(f"  {month}: {len(rows)} audits archived")
+    manifest["generation"] += 1
+    _write_manifest(manifest)
+
+    deleted = delete_archived(client, cold)
+    # Rows edited since they were read stay hot; drop their stale archived copies
+    edited = ~cold["id"].isin(deleted)
+    for month, rows in cold[edited].groupby(months[edited], sort=True):
+        _drop_from_partition(month, rows["id"], manifest)
+    if edited.any():
+        log(f"  {int(edited.sum())} audits changed during archival and stay in the audits table")
+    # Tell running servers the rows have left the table (see data_store.follow_archive)
+    manifest["generation"] += 1
+    _write_manifest(manifest)
+    log(f"Removed {len(deleted)} archived audits from the audits table")
+    return len(deleted)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old audits into monthly Parquet archives.")
+    parser.add_argument("--days", type=int, help="archive audits older than this many days "
+                                                 "(default: the archive_after_days setting)")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be archived")
+    args = parser.parse_args(argv)
+    run(args.days, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
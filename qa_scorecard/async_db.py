@@ -0,0 +1,99 @@
+"""Concurrent Supabase reads on a shared asyncio loop.
+
+Streamlit script threads are synchronous, so the async client lives on one
+background event loop per process. Sync callers hand coroutines to that
+loop with ``run()`` and block only for the result. ``fetch_all_rows``
+fans a table's pages out with ``gather_bounded``: at most
+``MAX_CONCURRENCY`` requests are in flight at once, so a full load waits
+for its slowest page rather than the sum of them, without flooding
+PostgREST.
+"""
+import asyncio
+import threading
+
+import pandas as pd
+from supabase import acreate_client
+
+from qa_scorecard.db import credentials
+from qa_scorecard.resilience import acall
+
+MAX_CONCURRENCY = 8
+PAGE_SIZE = 1000  # PostgREST's default max-rows per response
+
+_loop = None
+_lock = threading.Lock()
+_client = None
+_client_lock = asyncio.Lock()  # only ever used on the background loop
+
+
+def _event_loop():
+    """The process-wide background loop, started on first use"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-db", daemon=True).start()
+        return _loop
+
+
+def run(coro):
+    """Run a coroutine on the background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+
+async def get_async_client():
+    """The process-wide async client, created on the background loop"""
+    global _client
+    async with _client_lock:
+        if _client is None:
+            url, key = credentials()
+            _client = await acreate_client(url, key)
+    return _client
+
+
+def set_async_client(client):
+    """Use ``client`` for async reads instead of connecting (see ``db.set_client``)"""
+    global _client
+    _client = client
+
+
+async def gather_bounded(coros, limit=MAX_CONCURRENCY):
+    """``asyncio.gather`` with at most ``limit`` coroutines running at once"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(bounded(c) for c in coros))
+
+
+async def _fetch_all_pages(table, order, limit, columns, filters):
+    client = await get_async_client()
+
+    def page(start):
+        query = client.table(table).select(columns, count="exact" if start == 0 else None)
+        for operator, column, value in filters:
+            query = getattr(query, operator)(column, value)
+        for column, desc in order:
+            query = query.order(column, desc=desc)
+        return query.range(start, start + PAGE_SIZE - 1)
+
+    def fetch(start):
+        return acall("audits.load_page", lambda: page(start).execute())
+
+    first = await fetch(0)
+    rows = list(first.data or [])
+    total = first.count or len(rows)
+    rest = await gather_bounded([fetch(start) for start in range(PAGE_SIZE, total, PAGE_SIZE)], limit)
+    for response in rest:
+        rows.extend(response.data or [])
+    return rows
+
+
+def fetch_all_rows(table, order, limit=MAX_CONCURRENCY, columns="*", filters=()):
+    """Every row of ``table`` matching the ``(operator, column, value)`` ``filters`` (e.g. ``("eq", ...)``).
+
+    The first page reports the total, the rest are fetched concurrently.
+    """
+    return pd.DataFrame(run(_fetch_all_pages(table, order, limit, columns, filters)))
@@ -0,0 +1,92 @@
+"""Batched edits of stored audits with optimistic concurrency.
+
+The Data Management grid hands over the rows it showed and the rows as
+edited. ``diff_edits`` keeps only the changed cells of changed rows (plus a
+re-calculated score when answers changed, and a new dedupe key when the
+consultant, client or time changed), each tagged with the ``updated_at``
+revision the editor saw. ``apply_edits`` sends the whole batch to the
+``apply_audit_edits`` function in one round trip; rows someone else changed
+in the meantime are left alone and reported back as conflicts.
+"""
+import pandas as pd
+
+from qa_scorecard.answer_masks import pack_answers
+from qa_scorecard.data_store import record_audits
+from qa_scorecard.db import get_client
+from qa_scorecard.dedupe import QUESTION_COLUMNS, dedupe_key
+from qa_scorecard.scorecards import SCORING_CARDS, calculate_score, scorecard_version
+
+IDENTITY_COLUMNS = ["consultant", "client_id", "audit_date"]
+EDITABLE_COLUMNS = IDENTITY_COLUMNS + QUESTION_COLUMNS + ["comments"]
+ANSWER_OPTIONS = ["Yes", "No", "NA"]
+
+
+def _to_json(value):
+    """A cell value as the JSON the database function expects"""
+    if value is None or value != value:  # None, NaN or NaT
+        return None
+    if isinstance(value, pd.Timestamp):
+        if value.tzinfo is None:
+            value = value.tz_localize("UTC")
+        return value.isoformat()
+    return value.item() if hasattr(value, "item") else value
+
+
+def diff_edits(original, edited):
+    """Edits for every row of ``edited`` that differs from ``original``.
+
+    Both frames hold ``id``, ``updated_at``, ``department`` and the editable
+    columns. Each edit is ``{"id", "updated_at", "changes"}`` with only the
+    changed columns; rows missing from ``edited`` are ignored.
+    """
+    columns = [c for c in EDITABLE_COLUMNS if c in edited.columns]
+    before = original.set_index("id")
+    after = edited.set_index("id")
+    ids = after.index.intersection(before.index)
+    old, new = before.loc[ids, columns], after.loc[ids, columns]
+    changed = (old != new) & ~(old.isna() & new.isna())
+    changed = changed[changed.any(axis=1)]
+
+    edits = []
+    for audit_id, cells in changed.iterrows():
+        row = after.loc[audit_id]
+        changes = {c: _to_json(row[c]) for c in cells.index[cells]}
+        if any(q in changes for q in QUESTION_COLUMNS):
+            department = before.at[audit_id, "department"]
+            critical = SCORING_CARDS.get(department, {}).get("critical_questions", [])
+            answers = {q: row[q] for q in QUESTION_COLUMNS}
+            changes["score"] = calculate_score(answers, critical)
+            changes["scorecard_version"] = scorecard_version(department)
+            changes["yes_mask"], changes["na_mask"] = pack_answers(answers)
+        if any(c in changes for c in IDENTITY_COLUMNS):
+            changes["dedupe_key"] = dedupe_key({c: _to_json(row[c]) for c in IDENTITY_COLUMNS})
+        edits.append({
+            "id": int(audit_id),
+            "updated_at": before.at[audit_id, "updated_at"],
+            "changes": changes,
+        })
+    return edits
+
+
+def apply_edits(edits, client=None):
+    """Write ``edits`` in one call; returns ``(updated rows, ids of conflicting rows)``.
+
+    An edit conflicts when its row no longer has the ``updated_at`` the
+    editor saw (or was deleted). Conflicting rows are re-read and applied to
+    the shared store as well, so the editor reloads with their current state.
+    """
+    if not edits:
+        return [], []
+    client = client or get_client()
+    updated = client.rpc("apply_audit_edits", {"edits": edits}).execute().data or []
+    written = {row["id"] for row in updated}
+    conflicts = [edit["id"] for edit in edits if edit["id"] not in written]
+
+    current, deleted = list(updated), []
+    if conflicts:
+        fresh = client.table("audits").select("*").in_("id", conflicts).execute().data or []
+        current.extend(fresh)
+        deleted = sorted(set(conflicts) - {row["id"] for row in fresh})
+    if current or deleted:
+        record_audits(current, deleted)
+    return updated, conflicts
@@ -0,0 +1,159 @@
+"""Building audit rows, bulk CSV import with duplicate screening, and batched upserts."""
+import pandas as pd
+
+from qa_scorecard.answer_masks import pack_answers
+from qa_scorecard.data_store import record_audits
+from qa_scorecard.db import get_client
+from qa_scorecard.dedupe import CONFLICT, DUPLICATE, QUESTION_COLUMNS, dedupe_key, get_duplicate_index, is_archived
+from qa_scorecard.scorecards import SCORING_CARDS, TEAM_DEPARTMENT_MAP, calculate_score, scorecard_version
+
+REQUIRED_COLUMNS = ["team_leader", "consultant", "client_id", "audit_date"] + QUESTION_COLUMNS
+UPSERT_BATCH_SIZE = 500
+
+_ANSWERS = {"yes": "Yes", "y": "Yes", "no": "No", "n": "No", "na": "NA", "n/a": "NA", "": "NA"}
+_ANSWER_KEYS = {"y": "Yes", "n": "No", "a": "NA", "-": "NA"}
+
+
+def build_audit(team_leader, department, consultant, client_id, audit_date, answers, comments=""):
+    """A scored audit row ready to insert, with its scorecard version, answer masks and dedupe key"""
+    scoring_card = SCORING_CARDS[department]
+    row = {
+        "team_leader": team_leader,
+        "department": department,
+        "consultant": consultant,
+        "client_id": client_id,
+        "audit_date": audit_date,
+        "score": calculate_score(answers, scoring_card.get("critical_questions", [])),
+        "scorecard_version": scorecard_version(department),
+        "comments": comments,
+        **answers,
+    }
+    row["yes_mask"], row["na_mask"] = pack_answers(answers)
+    row["dedupe_key"] = dedupe_key(row)
+    return row
+
+
+def parse_answer_keys(text):
+    """Twelve answers from a typed key string such as ``yyny-yyyayyy``.
+
+    ``y`` = Yes, ``n`` = No, ``a`` or ``-`` = NA; spaces and commas are
+    ignored. Raises ``ValueError`` describing what is wrong.
+    """
+    keys = [k for k in text.lower() if k not in " ,"]
+    bad = sorted({k for k in keys if k not in _ANSWER_KEYS})
+    if bad:
+        raise ValueError(f"Unknown answer key(s): {' '.join(bad)} (use y, n, a or -)")
+    if len(keys) != len(QUESTION_COLUMNS):
+        raise ValueError(f"Expected {len(QUESTION_COLUMNS)} answers, got {len(keys)}")
+    return {q: _ANSWER_KEYS[k] for q, k in zip(QUESTION_COLUMNS, keys)}
+
+
+def read_import_csv(file):
+    """An uploaded CSV with every cell as text, so client IDs keep leading zeros and blanks stay ``""``"""
+    return pd.read_csv(file, dtype=str, keep_default_na=False)
+
+
+def _text(value):
+    """A cell as stripped text; blank for missing values"""
+    if isinstance(value, str):
+        return value.strip()
+    return "" if value is None or pd.isna(value) else str(value)
+
+
+def prepare_import(frame):
+    """Validate and score uploaded rows; returns ``(rows, errors)``"""
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    rows, errors = [], []
+    for line, record in enumerate(frame.to_dict("records"), start=2):  # header is line 1
+        team_leader = record["team_leader"]
+        consultant, client_id = _text(record["consultant"]), _text(record["client_id"])
+        if not consultant or not client_id:
+            errors.append(f"Line {line}: consultant and client_id are required")
+            continue
+        department = record.get("department")
+        if not isinstance(department, str) or not department:
+            department = TEAM_DEPARTMENT_MAP.get(team_leader)
+        scoring_card = SCORING_CARDS.get(department)
+        if not scoring_card:
+            errors.append(f"Line {line}: no scorecard for team leader '{team_leader}'")
+            continue
+
+        answers = {}
+        for q in QUESTION_COLUMNS:
+            raw = record[q]
+            answer = _ANSWERS.get(str(raw).strip().lower() if isinstance(raw, str) else "")
+            if answer is None:
+                errors.append(f"Line {line}: {q} must be Yes, No or NA (got '{raw}')")
+                break
+            answers[q] = answer
+        else:
+            try:
+                audit_date = pd.Timestamp(record["audit_date"]) if _text(record["audit_date"]) else pd.NaT
+            except (TypeError, ValueError):
+                errors.append(f"Line {line}: unreadable audit_date '{record['audit_date']}'")
+                continue
+            if pd.isna(audit_date):  # blank (or "NaT") cells parse as NaT without raising
+                errors.append(f"Line {line}: audit_date is required")
+                continue
+            audit_date = audit_date.isoformat()
+            comments = record.get("comments")
+            rows.append(build_audit(
+                team_leader, department, consultant, client_id,
+                audit_date, answers, comments if isinstance(comments, str) else "",
+            ))
+    return rows, errors
+
+
+def plan_import(rows, merge_conflicts=False, index=None):
+    """Split rows into those to write and counts of what was skipped.
+
+    Exact duplicates (same call, same answers) are always skipped. Rows for a
+    call that is already stored with different answers are skipped, or merged
+    into the stored audit when ``merge_conflicts`` is set; archived audits
+    are never merged into (the upsert would re-insert them as new rows).
+    Each row is checked against its own department's duplicate index (or
+    ``index``, if given), so only those departments' audits are loaded.
+    """
+    to_write = []
+    summary = {"new": 0, "merged": 0, "duplicates": 0, "conflicts": 0, "repeated_in_file": 0}
+    seen = set()
+    for row in rows:
+        if row["dedupe_key"] in seen:
+            summary["repeated_in_file"] += 1
+            continue
+        seen.add(row["dedupe_key"])
+        status, _ = (index or get_duplicate_index(row.get("department"))).classify(row)
+        if status == DUPLICATE:
+            summary["duplicates"] += 1
+        elif status == CONFLICT:
+            if merge_conflicts and not is_archived(row):
+                summary["merged"] += 1
+                to_write.append(row)
+            else:
+                summary["conflicts"] += 1
+        else:
+            summary["new"] += 1
+            to_write.append(row)
+    return to_write, summary
+
+
+def write_audits(rows, client=None, ignore_duplicates=False):
+    """Upsert rows on ``dedupe_key`` in batches and apply them to the shared store.
+
+    With ``ignore_duplicates`` rows whose key is already stored are skipped
+    rather than merged; only the rows actually written are returned.
+    """
+    client = client or get_client()
+    stored = []
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        response = client.table("audits").upsert(
+            batch, on_conflict="dedupe_key", ignore_duplicates=ignore_duplicates
+        ).execute()
+        stored.extend(response.data or [])
+    if stored:
+        record_audits(stored)
+    return stored
@@ -0,0 +1,165 @@
+"""Headless weekly report run: one workbook per team leader plus department roll-ups.
+
+Usage::
+
+    python -m qa_scorecard.batch_reports [--start 2026-10-05] [--end 2026-10-11]
+                                         [--out reports] [--workers 8]
+
+Without dates the previous full week (Monday to Sunday) is reported. Only
+the period's audits are fetched (older parts of it come from the archive),
+once, sliced per team leader and department in the parent process, and each slice is turned into an Excel workbook in a process pool,
+so a worker only receives the rows of the report it builds.
+
+Every team leader in ``TEAM_DEPARTMENT_MAP`` and every department gets a
+workbook, including those without audits in the period.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from qa_scorecard.data_store import fetch_all_audits, with_archive
+from qa_scorecard.scorecards import COMMON_CRITICAL_COLUMNS, SCORING_CARDS, TEAM_DEPARTMENT_MAP
+
+QUESTION_COLUMNS = [f"q{i}" for i in range(1, 13)]
+AUDIT_COLUMNS = ["audit_date", "department", "team_leader", "consultant", "client_id", "score"] + \
+    QUESTION_COLUMNS + ["comments"]
+
+
+def previous_week(today=None):
+    """Monday and Sunday of the last complete week"""
+    today = today or date.today()
+    start = today - timedelta(days=today.weekday() + 7)
+    return start, start + timedelta(days=6)
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
+
+
+def _in_period(frame, start, end):
+    if frame.empty:
+        return frame
+    dates = pd.to_datetime(frame["audit_date"], format="ISO8601", utc=True).dt.tz_localize(None)
+    mask = (dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end) + pd.Timedelta(days=1))
+    return frame[mask]
+
+
+def _summary(frame, title, start, end):
+    total = len(frame)
+    if total:
+        critical = [c for c in COMMON_CRITICAL_COLUMNS if c in frame.columns]
+        failures = int((frame[critical] == "No").any(axis=1).sum()) if critical else 0
+        average = round(float(frame["score"].mean()), 1)
+    else:
+        failures, average = 0, None
+    return pd.DataFrame({
+        "Metric": ["Report", "Period", "Total Audits", "Average Score", "Critical Failures", "Pass Rate"],
+        "Value": [
+            title, f"{start} to {end}", total, average, failures,
+            round((total - failures) / total * 100, 1) if total else None,
+        ],
+    })
+
+
+def _breakdown(frame, column, label):
+    if frame.empty:
+        return pd.DataFrame(columns=[label, "Avg Score", "Audit Count", "Min Score", "Max Score"])
+    grouped = frame.groupby(column)["score"].agg(["mean", "count", "min", "max"]).round(1).reset_index()
+    grouped.columns = [label, "Avg Score", "Audit Count", "Min Score", "Max Score"]
+    return grouped.sort_values("Avg Score", ascending=False)
+
+
+def _question_rates(frame):
+    records = []
+    for q in QUESTION_COLUMNS:
+        if q not in frame.columns:
+            continue
+        answered = int((frame[q] != "NA").sum())
+        records.append({
+            "Question": q.upper(),
+            "Yes": int((frame[q] == "Yes").sum()),
+            "No": int((frame[q] == "No").sum()),
+            "NA": int((frame[q] == "NA").sum()),
+            "Pass Rate (%)": round((frame[q] == "Yes").sum() / answered * 100, 1) if answered else None,
+        })
+    return pd.DataFrame(records)
+
+
+def build_report(kind, name, frame, start, end, out_dir):
+    """Write one workbook (runs in a worker); returns ``(path, audit count)``"""
+    if kind == "team":
+        title = f"Team Report - {name} ({TEAM_DEPARTMENT_MAP.get(name, 'Not Assigned')})"
+        breakdown = _breakdown(frame, "consultant", "Consultant")
+    else:
+        title = f"Department Report - {name}"
+        breakdown = _breakdown(frame, "team_leader", "Team Leader")
+    audits = frame[[c for c in AUDIT_COLUMNS if c in frame.columns]].sort_values("audit_date")
+
+    path = Path(out_dir) / f"{kind}_{_slug(name)}.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        _summary(frame, title, start, end).to_excel(writer, sheet_name="Summary", index=False)
+        breakdown.to_excel(writer, sheet_name="Breakdown", index=False)
+        _question_rates(frame).to_excel(writer, sheet_name="Questions", index=False)
+        audits.to_excel(writer, sheet_name="Audits", index=False)
+    return str(path), len(frame)
+
+
+def _jobs(frame):
+    """``(kind, name, slice)`` for every team leader and department"""
+    empty = frame.iloc[0:0]
+    teams = dict(tuple(frame.groupby("team_leader"))) if not frame.empty else {}
+    departments = dict(tuple(frame.groupby("department"))) if not frame.empty else {}
+    for team_leader in TEAM_DEPARTMENT_MAP:
+        yield "team", team_leader, teams.get(team_leader, empty)
+    for department in sorted(set(SCORING_CARDS) | set(TEAM_DEPARTMENT_MAP.values())):
+        yield "department", department, departments.get(department, empty)
+
+
+def run(start=None, end=None, out_dir="reports", workers=None, client=None, log=print):
+    if start is None or end is None:
+        start, end = previous_week()
+    started = time.monotonic()
+    out_dir = Path(out_dir) / f"{start}_{end}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    hot = fetch_all_audits(client, start_date=start, end_date=end)
+    frame = _in_period(with_archive(hot, start, end), start, end)
+    log(f"{len(frame)} audits between {start} and {end}")
+
+    written = []
+    # Spawned, not forked: the backend client and async loop threads are already running
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(build_report, kind, name, rows, start, end, out_dir)
+            for kind, name, rows in _jobs(frame)
+        ]
+        for future in as_completed(futures):
+            path, count = future.result()
+            written.append(path)
+            log(f"  {path} ({count} audits)")
+    log(f"{len(written)} reports written to {out_dir} in {time.monotonic() - started:.1f}s")
+    return sorted(written)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate every team and department report for a period.")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day (default: Monday of last week)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day, inclusive (default: the Sunday after)")
+    parser.add_argument("--out", default="reports", help="output directory (a subfolder per period is created)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+    if (args.start is None) != (args.end is None):
+        parser.error("--start and --end must be given together")
+    run(args.start, args.end, args.out, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Polled ``updated_at`` change feed that patches the shared data store.
+
+One background thread per server process follows the audits table by its
+``updated_at`` cursor and applies only the changed rows to the store (and
+so to the department shards they belong to, see ``record_audits``). Open
+dashboards then notice the new store version in memory (see
+``qa_scorecard.ui.live_updates``), so no session polls the backend itself.
+
+Hard deletes are not visible through an ``updated_at`` cursor; code that
+deletes audits should call ``data_store.record_audits(deletes=...)`` itself.
+The archival job runs in its own process, so each poll also checks its
+manifest generation (``data_store.follow_archive``).
+"""
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from qa_scorecard.data_store import AUDITS, FETCH_PAGE_SIZE, audit_datasets, follow_archive, record_audits, store
+from qa_scorecard.db import get_client
+from qa_scorecard.resilience import call
+
+logger = logging.getLogger(__name__)
+
+# Re-read this far behind the cursor so rows committed slightly out of
+# order by concurrent transactions are not skipped.
+CURSOR_OVERLAP = timedelta(seconds=5)
+
+
+def _parse(ts):
+    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+class ChangeFeed:
+    """Background poller applying ``updated_at > cursor`` rows to the store"""
+
+    def __init__(self, interval_seconds, client=None):
+        self.interval_seconds = interval_seconds
+        self._client = client
+        self._cursor = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            if not self._stop.is_set():
+                return
+            self._thread.join()  # let a stopping poller finish before replacing it
+        self._stop.clear()
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def set_interval(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self._wake.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def _initial_cursor(self):
+        # Follow on from the oldest data held rather than loading every audit;
+        # datasets loaded later are fetched fresh anyway
+        held = [store.peek(name) for name in audit_datasets()]
+        latest = [_parse(frame["updated_at"].max()) for frame in held
+                  if frame is not None and not frame.empty and "updated_at" in frame.columns]
+        return min(latest) if latest else datetime.now(timezone.utc)
+
+    def poll(self):
+        """Fetch rows changed since the cursor and apply them; returns the number applied"""
+        client = self._client or get_client()
+        follow_archive()
+        if self._cursor is None:
+            self._cursor = self._initial_cursor()
+        since = (self._cursor - CURSOR_OVERLAP).isoformat()
+        rows = []
+        start = 0
+        while True:
+            query = (
+                client.table(AUDITS).select("*")
+                .gt("updated_at", since)
+                .order("updated_at")
+                .order("id")
+                .range(start, start + FETCH_PAGE_SIZE - 1)
+            )
+            response = call("audits.changes", query.execute)
+            batch = response.data or []
+            rows.extend(batch)
+            if len(batch) < FETCH_PAGE_SIZE:
+                break
+            start += FETCH_PAGE_SIZE
+        if not rows:
+            return 0
+        self._cursor = max(self._cursor, _parse(rows[-1]["updated_at"]))
+        # Rows re-read through the overlap window are dropped by the store
+        # because it already holds them at the same updated_at.
+        record_audits(rows)
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Change feed poll failed")
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def ensure_change_feed(interval_seconds):
+    """Start the process-wide feed, or retune its interval if it is already running"""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = ChangeFeed(interval_seconds)
+        elif _feed.interval_seconds != interval_seconds:
+            _feed.set_interval(interval_seconds)
+        _feed.start()
+        return _feed
+
+
+def stop_change_feed():
+    with _feed_lock:
+        if _feed is not None:
+            _feed.stop()
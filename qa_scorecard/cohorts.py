@@ -0,0 +1,174 @@
+"""Consultants grouped by similar weakness profiles, for group coaching.
+
+Question ``qN`` means something different on each department's scorecard,
+so every department is clustered on its own: each consultant's pass rate
+on each of the department's questions comes from one vectorized group-by
+over the department's audits (no per-consultant loops), consultants with
+enough audits are clustered on those rates with k-means in NumPy, and each
+cluster is described by the questions where it falls furthest below the
+department's overall pass rate. The members of a cluster form a suggested
+coaching cohort.
+"""
+import numpy as np
+import pandas as pd
+
+from qa_scorecard.answer_masks import ALL_QUESTIONS, QUESTION_COLUMNS, pack_frame
+from qa_scorecard.scorecards import SCORING_CARDS
+
+MIN_AUDITS = 5  # fewer audits give too noisy a profile to cluster
+DEFAULT_CLUSTERS = 4
+FOCUS_QUESTIONS = 3
+FOCUS_MIN_GAP = 1.0  # points below the overall pass rate before a question is a focus
+
+
+def pass_rate_matrix(frame):
+    """Consultant x question pass rates (%) and each consultant's audit count.
+
+    Pass only one department's audits: the rates are per question number.
+    A question a consultant never had answered (all NA) is NaN.
+    """
+    questions = [q for q in QUESTION_COLUMNS if q in frame.columns]
+    bits = np.array([QUESTION_COLUMNS.index(q) for q in questions])
+    yes, na = pack_frame(frame)
+    passed = (yes[:, None] >> bits) & 1
+    answered = ((~na & ALL_QUESTIONS)[:, None] >> bits) & 1
+    counts = pd.DataFrame(
+        np.hstack([passed, answered]).astype(np.int32),
+        columns=[f"{q}_yes" for q in questions] + [f"{q}_answered" for q in questions],
+    )
+    counts["audits"] = 1
+    counts["consultant"] = frame["consultant"].to_numpy()
+    totals = counts.groupby("consultant", sort=True).sum()
+
+    yes = totals[[f"{q}_yes" for q in questions]].to_numpy(dtype=float)
+    answered = totals[[f"{q}_answered" for q in questions]].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = np.where(answered > 0, yes / answered * 100, np.nan)
+    matrix = pd.DataFrame(rates, index=totals.index, columns=[q.upper() for q in questions])
+    return matrix, totals["audits"]
+
+
+def kmeans(points, k, n_init=5, max_iter=100, seed=0):
+    """Lloyd's k-means with k-means++ seeding; returns ``(labels, centroids, inertia)`` of the best run.
+
+    Clusters that end up empty are dropped, so every returned centroid has members.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(points)
+    # Never more clusters than distinct points: seeds are then always distinct
+    k = min(k, len(np.unique(points, axis=0)))
+    best = None
+    for _ in range(n_init):
+        # k-means++: each new centre drawn with probability proportional to squared distance
+        centroids = points[[rng.integers(n)]]
+        for _ in range(1, k):
+            nearest = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+            total = nearest.sum()
+            pick = rng.choice(n, p=nearest / total) if total > 0 else rng.integers(n)
+            centroids = np.vstack([centroids, points[pick]])
+
+        labels = None
+        for _ in range(max_iter):
+            distances = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+            new_labels = distances.argmin(axis=1)
+            if labels is not None and np.array_equal(labels, new_labels):
+                break
+            labels = new_labels
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, points)
+            sizes = np.bincount(labels, minlength=k)[:, None]
+            centroids = np.where(sizes > 0, sums / np.maximum(sizes, 1), centroids)  # empty clusters stay put
+
+        inertia = float(distances[np.arange(n), labels].sum())
+        if best is None or inertia < best[2]:
+            best = (labels, centroids, inertia)
+    labels, centroids, inertia = best
+    used = np.unique(labels)
+    renumber = np.zeros(len(centroids), dtype=labels.dtype)
+    renumber[used] = np.arange(len(used))
+    return renumber[labels], centroids[used], inertia
+
+
+def consultant_clusters(frame, k=DEFAULT_CLUSTERS, min_audits=MIN_AUDITS, seed=0):
+    """Cluster each department's consultants on their pass rates for that department's questions.
+
+    Returns ``{department: clusters}`` for every department where at least
+    two consultants have ``min_audits`` audits there (see
+    ``department_clusters``).
+    """
+    if frame.empty:
+        return {}
+    department = frame["department"].fillna("Not Assigned").to_numpy() if "department" in frame.columns \
+        else np.full(len(frame), "Not Assigned", dtype=object)
+    results = {}
+    for dept, positions in pd.Series(department).groupby(department, sort=True).indices.items():
+        clusters = department_clusters(frame.iloc[positions], k, min_audits, seed)
+        if clusters is not None:
+            results[dept] = clusters
+    return results
+
+
+def department_clusters(frame, k=DEFAULT_CLUSTERS, min_audits=MIN_AUDITS, seed=0):
+    """Cluster consultants on their question pass rates within one department's audits.
+
+    Returns a dict with ``matrix`` (pass rates of the clustered consultants,
+    ordered by cluster), ``labels``, ``audits``, ``centroids`` (mean pass
+    rate per cluster and question), ``sizes`` and ``focus`` (the weakest
+    questions of each cluster relative to the whole department). Returns
+    None when fewer than two consultants have ``min_audits`` audits.
+    """
+    matrix, audits = pass_rate_matrix(frame)
+    keep = audits >= min_audits
+    matrix, audits = matrix[keep], audits[keep]
+    if len(matrix) < 2:
+        return None
+
+    # A question a consultant was never scored on counts as the question's overall rate
+    overall = matrix.mean()
+    filled = matrix.fillna(overall).fillna(100.0)
+    labels, centroids, _ = kmeans(filled.to_numpy(), k, seed=seed)
+
+    # Number clusters from weakest to strongest average so labels read naturally
+    order = np.argsort(centroids.mean(axis=1))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    labels = pd.Series(rank[labels] + 1, index=matrix.index, name="cluster")
+    centroids = pd.DataFrame(centroids[order], index=pd.RangeIndex(1, len(order) + 1, name="cluster"),
+                             columns=matrix.columns).round(1)
+
+    deficit = centroids.sub(overall.fillna(100.0), axis=1)
+    focus = {
+        cluster: [q for q in deficit.loc[cluster].nsmallest(FOCUS_QUESTIONS).index
+                  if deficit.loc[cluster, q] <= -FOCUS_MIN_GAP]
+        for cluster in centroids.index
+    }
+    ordered = labels.sort_values(kind="stable").index
+    return {
+        "matrix": matrix.loc[ordered].round(1),
+        "labels": labels.loc[ordered],
+        "audits": audits.loc[ordered],
+        "centroids": centroids,
+        "sizes": pd.Series(np.bincount(labels - 1, minlength=len(centroids)), index=centroids.index),
+        "focus": focus,
+    }
+
+
+def coaching_cohorts(clusters, department=None):
+    """Suggested group-coaching cohorts: the clusters of each (or one) department of ``consultant_clusters``"""
+    rows = []
+    for dept, result in sorted(clusters.items()):
+        if department is not None and dept != department:
+            continue
+        questions = SCORING_CARDS.get(dept, {}).get("questions", {})
+        avg_pass = result["matrix"].mean(axis=1)
+        for cluster, group in avg_pass.groupby(result["labels"], sort=True):
+            focus = result["focus"][cluster]
+            rows.append({
+                "Department": dept,
+                "Cohort": f"Cluster {cluster}",
+                "Focus": "; ".join(f"{q}: {questions.get(int(q[1:]), q)}" for q in focus) or "No weak questions",
+                "Size": len(group),
+                "Avg Pass Rate (%)": round(group.mean(), 1),
+                "Consultants": ", ".join(sorted(group.index)),
+            })
+    return pd.DataFrame(rows)
@@ -0,0 +1,403 @@
+"""Process-wide, single-flight cache of datasets shared by every session and page.
+
+Streamlit runs each browser session in its own script thread, but all of them
+live in one Python process. The store keeps one loaded frame per dataset and
+version, and makes concurrent callers that miss the cache wait on a single
+in-flight backend fetch instead of each issuing their own.
+
+Frames handed out by the store are shared between sessions: treat them as
+read-only and ``.copy()`` before adding or changing columns.
+
+If a load fails while an earlier frame is held, that frame is served and the
+dataset is flagged stale (``is_stale``) instead of failing every page; a
+fresh load is retried at most every ``STALE_RETRY_SECONDS``.
+
+Audits are also available per department (``load_audits(department)``):
+each department is its own dataset, fetched with a ``department = ...``
+filter, so a session that only looks at one department never downloads or
+holds the others, and a write touches only the shard of the audit's
+department.
+"""
+import functools
+import logging
+import threading
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from qa_scorecard.answer_masks import COMPACT_COLUMNS, expand_answers
+from qa_scorecard.archive import archive_generation, read_archive
+from qa_scorecard.async_db import fetch_all_rows
+from qa_scorecard.db import get_client
+
+AUDITS = "audits"
+DEPARTMENT_PREFIX = "audits:"
+FETCH_PAGE_SIZE = 1000  # PostgREST's default max-rows per response
+STALE_RETRY_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One in-progress load that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.version = None
+        self.result = None
+        self.error = None
+
+
+class DataStore:
+    """Versioned dataset cache with single-flight loading"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaders = {}
+        self._versions = {}
+        self._frames = {}
+        self._flights = {}
+        self._stale = {}  # name -> monotonic time of the last failed or retried load
+        self._subscribers = []
+
+    def register(self, name, loader):
+        """Register ``loader()`` as the source of dataset ``name``"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._versions.setdefault(name, 0)
+
+    def version(self, name):
+        """Current version of a dataset; bumps on every invalidation"""
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def get(self, name):
+        """Return the frame for ``name``, loading it at most once per version"""
+        return self.get_versioned(name)[1]
+
+    def get_versioned(self, name):
+        """``(version, frame)`` for ``name``: the frame as ``get`` returns it and the version it is held under.
+
+        Key anything derived from the frame on this version rather than a
+        separate ``version()`` call, which may already have moved on.
+        """
+        with self._lock:
+            version = self._versions[name]
+            cached = self._frames.get(name)
+            if cached is not None and cached[0] == version:
+                failed_at = self._stale.get(name)
+                if failed_at is None or time.monotonic() - failed_at < STALE_RETRY_SECONDS:
+                    return cached
+                self._stale[name] = time.monotonic()  # this caller retries; others keep the stale frame
+            flight_key = (name, version)
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[flight_key] = flight
+            loader = self._loaders[name]
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.version, flight.result
+
+        flight.version = version
+        recovered = False
+        try:
+            flight.result = loader()
+        except Exception as e:
+            with self._lock:
+                fallback = self._frames.get(name)
+                if fallback is not None:
+                    # Serve the last good frame under the current version so
+                    # derived caches stay consistent with what pages show
+                    self._stale[name] = time.monotonic()
+                    if self._versions[name] == version:
+                        self._frames[name] = (version, fallback[1])
+            if fallback is None:
+                flight.error = e
+                raise
+            logger.warning("Loading %s failed (%s); serving the last loaded data", name, e)
+            flight.result = fallback[1]
+        else:
+            with self._lock:
+                recovered = self._stale.pop(name, None) is not None
+                if self._versions[name] == version:
+                    if recovered:
+                        version = self._versions[name] = version + 1  # replaces stale data
+                        flight.version = version
+                    self._frames[name] = (version, flight.result)
+                subscribers = list(self._subscribers)
+        finally:
+            with self._lock:
+                self._flights.pop(flight_key, None)
+            flight.done.set()
+        if recovered:
+            for callback in subscribers:
+                callback(name, None, None)
+        return flight.version, flight.result
+
+    def peek(self, name):
+        """The frame held for ``name`` if it is loaded at its current version, else None (never loads)"""
+        with self._lock:
+            cached = self._frames.get(name)
+            if cached is not None and cached[0] == self._versions.get(name):
+                return cached[1]
+            return None
+
+    def is_stale(self, name):
+        """Whether ``get(name)`` is serving older data because the last load failed"""
+        with self._lock:
+            return name in self._stale
+
+    def invalidate(self, name=None):
+        """Bump the version of ``name`` (or every dataset) so the next reader reloads it.
+
+        The outdated frame is kept only as the fallback for a failed reload.
+        """
+        with self._lock:
+            names = [name] if name is not None else list(self._versions)
+            for n in names:
+                self._versions[n] = self._versions.get(n, 0) + 1
+            subscribers = list(self._subscribers)
+        for n in names:
+            for callback in subscribers:
+                callback(n, None, None)
+
+    def touch(self, name):
+        """Bump the version of ``name`` without notifying subscribers.
+
+        For a dataset that is not loaded: nothing derived from it is held, but
+        caches keyed on its version (e.g. pages fetched from the database)
+        should still see the change.
+        """
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def subscribe(self, callback):
+        """Call ``callback(name, previous, current)`` after every applied change.
+
+        ``previous`` holds the replaced or deleted rows as they were before the
+        change and ``current`` the new versions of upserted rows, so listeners
+        can retract and re-apply just those rows. Both are ``None`` when the
+        dataset was invalidated and listeners should rebuild from the next load.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def apply_changes(self, name, upserts=(), deletes=(), key="id"):
+        """Patch the cached frame with changed rows instead of reloading everything.
+
+        If the dataset is not loaded there is nothing to patch; the change is
+        treated as an invalidation and the next reader fetches fresh rows.
+        """
+        upserts = upserts if isinstance(upserts, pd.DataFrame) else pd.DataFrame(list(upserts))
+        deletes = list(deletes)
+
+        with self._lock:
+            cached = self._frames.get(name)
+            loaded = cached is not None and cached[0] == self._versions[name]
+            if loaded:
+                frame = cached[1]
+                has_key = not frame.empty and key in frame.columns
+                if has_key and not upserts.empty and "updated_at" in frame.columns \
+                        and "updated_at" in upserts.columns:
+                    # Rows we already hold at the same revision are not changes
+                    known = frame.set_index(key)["updated_at"].reindex(upserts[key])
+                    upserts = upserts[known.to_numpy() != upserts["updated_at"].to_numpy()]
+                if upserts.empty and not deletes:
+                    return False
+
+                current = upserts[~upserts[key].isin(deletes)] if not upserts.empty else upserts
+                if has_key:
+                    changed_ids = set(deletes).union(upserts[key] if not upserts.empty else ())
+                    stale = frame[key].isin(changed_ids)
+                    previous = frame[stale]
+                    patched = pd.concat([current, frame[~stale]], ignore_index=True)
+                else:
+                    previous = frame.iloc[0:0]
+                    patched = current.reset_index(drop=True)
+                if "audit_date" in patched.columns:
+                    patched = patched.sort_values("audit_date", ascending=False, kind="stable", ignore_index=True)
+
+                version = self._versions[name] + 1
+                self._versions[name] = version
+                self._frames[name] = (version, patched)
+                subscribers = list(self._subscribers)
+
+        if not loaded:
+            self.invalidate(name)
+            return True
+        for callback in subscribers:
+            callback(name, previous, current)
+        return True
+
+
+# =================== LOADERS ===================
+def fetch_all_audits(client=None, department=None, start_date=None, end_date=None):
+    """Fetch every audit (of one department, if given), newest first, paging past PostgREST's row limit.
+
+    With dates, only audits between them (inclusive) are fetched.
+
+    Without an explicit client the pages are requested concurrently through
+    the async client; a given (sync) client pages through them in turn.
+    Answers travel as the two bit masks and are expanded into ``q1``-``q12``.
+    """
+    filters = [("eq", "department", department)] if department is not None else []
+    if start_date is not None:
+        filters.append(("gte", "audit_date", start_date.isoformat()))
+    if end_date is not None:
+        filters.append(("lt", "audit_date", (end_date + timedelta(days=1)).isoformat()))
+    if client is None:
+        return expand_answers(fetch_all_rows(
+            "audits", order=[("audit_date", True), ("id", False)], columns=COMPACT_COLUMNS, filters=filters
+        ))
+    rows = []
+    start = 0
+    while True:
+        query = client.table("audits").select(COMPACT_COLUMNS)
+        for operator, column, value in filters:
+            query = getattr(query, operator)(column, value)
+        response = (
+            query
+            .order("audit_date", desc=True)
+            .order("id")
+            .range(start, start + FETCH_PAGE_SIZE - 1)
+            .execute()
+        )
+        batch = response.data or []
+        rows.extend(batch)
+        if len(batch) < FETCH_PAGE_SIZE:
+            break
+        start += FETCH_PAGE_SIZE
+    return expand_answers(pd.DataFrame(rows))
+
+
+store = DataStore()
+store.register(AUDITS, fetch_all_audits)
+
+_departments = set()
+_departments_lock = threading.Lock()
+_archive_seen = None  # archive generation the held audits reflect
+
+
+def audits_dataset(department=None):
+    """Store dataset name of all audits, or of one department's shard (registered on first use)"""
+    if department is None:
+        return AUDITS
+    name = DEPARTMENT_PREFIX + department
+    with _departments_lock:
+        if department not in _departments:
+            store.register(name, functools.partial(fetch_all_audits, department=department))
+            _departments.add(department)
+    return name
+
+
+def audit_datasets():
+    """Names of the all-audits dataset and every department shard used so far"""
+    with _departments_lock:
+        return [AUDITS] + [DEPARTMENT_PREFIX + d for d in sorted(_departments)]
+
+
+def is_audit_dataset(name):
+    """Whether store dataset ``name`` holds audits (all of them or a department's)"""
+    return name == AUDITS or name.startswith(DEPARTMENT_PREFIX)
+
+
+def follow_archive():
+    """Reload every audits dataset once an archival run (in any process) has moved rows out of the table.
+
+    Those deletes never reach the change feed; the archive job bumps the
+    manifest generation afterwards instead, and this compares it (one
+    ``stat`` of the manifest) with the generation last seen.
+    """
+    global _archive_seen
+    generation = archive_generation()
+    with _departments_lock:
+        previous, _archive_seen = _archive_seen, generation
+    if previous is not None and previous != generation:
+        invalidate_audits()
+
+
+def load_audits(department=None):
+    """All audits, or only ``department``'s, as a shared, read-only DataFrame"""
+    follow_archive()
+    return store.get(audits_dataset(department))
+
+
+def load_versioned_audits(department=None):
+    """``(version, frame)``: ``load_audits(department)`` and the store version it is held under"""
+    follow_archive()
+    return store.get_versioned(audits_dataset(department))
+
+
+def with_archive(hot, start_date=None, end_date=None, department=None):
+    """``hot`` audits plus archived ones between the dates (of ``department``, if given), newest first.
+
+    Only archive partitions overlapping the range are read; hot rows are not
+    date-filtered. An audit in both (mid-archival) is taken from ``hot``.
+    """
+    cold = read_archive(start_date, end_date, department)
+    if cold.empty:
+        return hot
+    if not hot.empty and "id" in hot.columns:
+        cold = cold[~cold["id"].isin(hot["id"])]
+    combined = pd.concat([hot, cold], ignore_index=True)
+    return combined.sort_values("audit_date", ascending=False, kind="stable", ignore_index=True)
+
+
+def load_audits_between(start_date=None, end_date=None, department=None):
+    """Hot audits plus any archived audits in the date range, as a read-only DataFrame"""
+    return with_archive(load_audits(department), start_date, end_date, department)
+
+
+def invalidate_audits(department=None):
+    """Call after writing audits so the next reader fetches fresh data.
+
+    With a department only its shard is reloaded; without one, every
+    audits dataset is.
+    """
+    if department is not None:
+        store.invalidate(audits_dataset(department))
+        return
+    for name in audit_datasets():
+        store.invalidate(name)
+
+
+def record_audits(rows, deletes=()):
+    """Apply audits just written (or deleted) by this process without a full reload.
+
+    Only the shards of the rows' departments change, plus any loaded shard
+    that held a deleted row or one that moved to another department. The
+    all-audits dataset is patched only when it is loaded; otherwise only its
+    version moves (when the shards saw a change, or the rows belong to no
+    shard), so a process serving department sessions never loads it.
+    """
+    rows = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    deletes = list(deletes)
+    held_all = store.peek(AUDITS) is not None
+    changed = store.apply_changes(AUDITS, rows, deletes) if held_all else False
+    routed = not rows.empty and "department" in rows.columns
+    with _departments_lock:
+        departments = sorted(_departments)
+    for department in departments:
+        name = DEPARTMENT_PREFIX + department
+        mine = rows[rows["department"] == department] if routed else rows.iloc[0:0]
+        held = store.peek(name)
+        leaving = []
+        if held is not None and not held.empty and "id" in held.columns:
+            gone = set(deletes)
+            if routed and "id" in rows.columns:
+                gone.update(rows.loc[rows["department"] != department, "id"])
+            leaving = held.loc[held["id"].isin(gone), "id"].tolist()
+        if not mine.empty or leaving:
+            changed = store.apply_changes(name, mine, leaving) or changed
+    if not held_all:
+        unrouted = not rows.empty and (not routed or not rows["department"].isin(departments).all())
+        if changed or deletes or unrouted:
+            store.touch(AUDITS)
+            changed = True
+    return changed
@@ -0,0 +1,40 @@
+"""Supabase connection shared by every page and headless job."""
+import os
+import threading
+
+from supabase import create_client
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def credentials():
+    """Read credentials from the environment, falling back to Streamlit secrets"""
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    if url and key:
+        return url, key
+    import streamlit as st
+    return st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"]
+
+
+def get_client():
+    """Return the process-wide Supabase client, creating it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            url, key = credentials()
+            _client = create_client(url, key)
+        return _client
+
+
+def set_client(client):
+    """Use ``client`` as the process-wide client instead of connecting to Supabase.
+
+    For load tests and local runs against a stand-in such as
+    ``qa_scorecard.fake_backend.FakeClient``; call before any page or job
+    fetches data.
+    """
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,159 @@
+"""Duplicate-audit detection.
+
+An audit's identity is the normalized (consultant, client ID, audit minute)
+triple, hashed into ``dedupe_key``; the database enforces it with a unique
+index so storage stays clean even if two servers race. A second hash over
+the twelve answers tells an exact resubmission (same answers) apart from a
+conflicting one (same call, different answers).
+
+The in-memory index maps ``dedupe_key -> (audit id, content hash)`` for one
+department's audits (or the whole table), so submit and bulk import can
+classify every row with a dict lookup instead of a query per row, holding
+only the shards of the departments they write to. Archived audits have left the table and
+its unique index, so keys missing from it are also looked up in a second
+index over the archive, rebuilt when the archive generation changes.
+"""
+import hashlib
+import re
+import threading
+
+import pandas as pd
+
+from qa_scorecard.archive import archive_generation, read_archive_columns
+from qa_scorecard.data_store import audits_dataset, is_audit_dataset, load_audits, store
+
+QUESTION_COLUMNS = [f"q{i}" for i in range(1, 13)]
+
+NEW = "new"
+DUPLICATE = "duplicate"
+CONFLICT = "conflict"
+
+_SPACES = re.compile(r"\s+")
+
+
+def _normalize_text(value):
+    if value is None or value != value:  # None or NaN
+        return ""
+    return _SPACES.sub(" ", str(value)).strip().lower()
+
+
+def normalize_audit_minute(value):
+    """Audit timestamp as naive-UTC ``YYYY-MM-DDTHH:MM``"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.strftime("%Y-%m-%dT%H:%M")
+
+
+def dedupe_key(audit):
+    """Hash of the normalized consultant, client ID and audit minute.
+
+    Must stay in step with the SQL backfill in the dedupe_key migration.
+    """
+    identity = "|".join([
+        _normalize_text(audit.get("consultant")),
+        _normalize_text(audit.get("client_id")),
+        normalize_audit_minute(audit["audit_date"]),
+    ])
+    return hashlib.md5(identity.encode("utf-8")).hexdigest()
+
+
+def content_hash(audit):
+    """Hash of the twelve answers"""
+    answers = "|".join(str(audit.get(q) or "NA") for q in QUESTION_COLUMNS)
+    return hashlib.sha1(answers.encode("utf-8")).hexdigest()
+
+
+class DuplicateIndex:
+    """``dedupe_key -> (audit id, content hash)`` for every stored audit"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def from_frame(cls, frame):
+        index = cls()
+        if not frame.empty:
+            for audit in frame.to_dict("records"):
+                index._entries[dedupe_key(audit)] = (audit.get("id"), content_hash(audit))
+        return index
+
+    def apply_change(self, previous, current):
+        with self._lock:
+            for audit in previous.to_dict("records"):
+                key = dedupe_key(audit)
+                if self._entries.get(key, (None,))[0] == audit.get("id"):
+                    del self._entries[key]
+            for audit in current.to_dict("records"):
+                self._entries[dedupe_key(audit)] = (audit.get("id"), content_hash(audit))
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def classify(self, audit):
+        """``(NEW | DUPLICATE | CONFLICT, existing audit id or None)``, checking archived audits too"""
+        key = dedupe_key(audit)
+        existing = self.get(key)
+        if existing is None:
+            existing = get_archived_index().get(key)
+        if existing is None:
+            return NEW, None
+        existing_id, existing_hash = existing
+        return (DUPLICATE if existing_hash == content_hash(audit) else CONFLICT), existing_id
+
+
+# =================== SHARED INDEXES ===================
+_indexes = {}  # dataset -> index
+_index_lock = threading.Lock()
+
+
+def _on_store_change(name, previous, current):
+    if not is_audit_dataset(name):
+        return
+    with _index_lock:
+        index = _indexes.get(name)
+        if index is None:
+            return
+        if previous is None:
+            del _indexes[name]  # invalidated; rebuilt from the next load
+            return
+        index.apply_change(previous, current)
+
+
+store.subscribe(_on_store_change)
+
+
+def get_duplicate_index(department=None):
+    """The shared duplicate index of all audits (or one department's), built from the data store on first use"""
+    dataset = audits_dataset(department)
+    with _index_lock:
+        index = _indexes.get(dataset)
+        if index is None:
+            index = _indexes[dataset] = DuplicateIndex.from_frame(load_audits(department))
+        return index
+
+
+# =================== ARCHIVED AUDITS ===================
+_archived = (None, None)  # (archive generation, DuplicateIndex)
+_archived_lock = threading.Lock()
+
+
+def get_archived_index():
+    """Duplicate index over the archive partitions, rebuilt when the archive generation changes"""
+    global _archived
+    generation = archive_generation()
+    with _archived_lock:
+        if _archived[0] != generation:
+            columns = ["id", "consultant", "client_id", "audit_date"] + QUESTION_COLUMNS
+            _archived = (generation, DuplicateIndex.from_frame(read_archive_columns(columns)))
+        return _archived[1]
+
+
+def is_archived(audit):
+    """Whether the audit's call is already in the archive (which is read-only)"""
+    return get_archived_index().get(dedupe_key(audit)) is not None
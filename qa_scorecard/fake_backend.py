@@ -0,0 +1,329 @@
+"""In-process stand-in for the Supabase client, for load tests and offline runs.
+
+``FakeClient`` and ``AsyncFakeClient`` implement the slice of the
+PostgREST query-builder surface this app uses -- ``table().select()``,
+the ``eq``/``gt``/``gte``/``lt``/``lte``/``in_``/``or_`` filters, ``order``,
+``range``/``limit``, ``upsert``/``insert``/``update``/``delete`` and
+``execute()`` returning ``.data`` and ``.count`` -- over rows held in memory,
+plus the ``apply_audit_edits`` database function.
+Every ``execute()`` sleeps for the configured latency first, so page timings
+include a realistic network round trip.
+
+Install one with ``db.set_client`` / ``async_db.set_async_client`` before
+any page or job loads data.
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from qa_scorecard.audit_import import build_audit
+from qa_scorecard.dedupe import QUESTION_COLUMNS
+from qa_scorecard.scorecards import TEAM_CONSULTANTS_MAP, TEAM_DEPARTMENT_MAP
+
+_ILIKE_CONDITION = re.compile(r'(\w+)\.ilike\."?\*?(.*?)\*?"?$')
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeDatabase:
+    """Tables of row dicts shared by every fake client, with a simulated latency"""
+
+    def __init__(self, tables=None, latency=0.0, jitter=0.0):
+        self._lock = threading.Lock()
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._next_id = 1 + max((r.get("id", 0) for rows in self.tables.values() for r in rows), default=0)
+
+    def delay(self):
+        """Seconds the next request should take"""
+        with self._lock:
+            self.requests += 1
+        return max(self.latency + random.uniform(-self.jitter, self.jitter), 0.0)
+
+    def rows(self, table):
+        with self._lock:
+            return list(self.tables.get(table, []))
+
+    def write(self, table, apply):
+        """Run ``apply(rows, next_id)`` under the lock; it returns ``(new_rows, next_id, written)``"""
+        with self._lock:
+            rows, self._next_id, written = apply(list(self.tables.get(table, [])), self._next_id)
+            self.tables[table] = rows
+            return written
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _sort_key(value):
+    # PostgREST sorts NULLs last ascending (first descending), like Postgres
+    return (value is None, value if value is not None else 0)
+
+
+class FakeQuery:
+    """Chainable query over one table; filters are applied on ``execute()``"""
+
+    def __init__(self, database, table):
+        self._db = database
+        self._table = table
+        self._columns = None
+        self._count = None
+        self._filters = []
+        self._order = []
+        self._offset = 0
+        self._limit = None
+        self._write = None
+
+    # ---- reads ----
+    def select(self, columns="*", count=None):
+        if columns.strip() != "*":
+            self._columns = [c.strip() for c in columns.split(",")]
+        self._count = count
+        return self
+
+    def _filter(self, column, test):
+        self._filters.append(lambda row: row.get(column) is not None and test(row.get(column)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: v == value)
+
+    def neq(self, column, value):
+        return self._filter(column, lambda v: v != value)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v > value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v >= value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v < value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v <= value)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._filter(column, lambda v: v in values)
+
+    def or_(self, conditions):
+        """Only ``col.ilike."*term*"`` alternatives, as built by ``queries._search_filter``"""
+        tests = []
+        for condition in conditions.split(","):
+            match = _ILIKE_CONDITION.match(condition.strip())
+            if match is None:
+                raise NotImplementedError(f"FakeQuery.or_ does not support {condition!r}")
+            tests.append((match.group(1), match.group(2).lower()))
+        self._filters.append(lambda row: any(
+            term in str(row.get(column) or "").lower() for column, term in tests
+        ))
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def limit(self, size):
+        self._limit = size
+        return self
+
+    # ---- writes ----
+    def insert(self, rows):
+        return self.upsert(rows, on_conflict=None)
+
+    def upsert(self, rows, on_conflict="id", ignore_duplicates=False):
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        self._write = ("upsert", rows, on_conflict, ignore_duplicates)
+        return self
+
+    def update(self, values):
+        self._write = ("update", values)
+        return self
+
+    def delete(self):
+        self._write = ("delete",)
+        return self
+
+    # ---- execution ----
+    def _matches(self, row):
+        return all(test(row) for test in self._filters)
+
+    def _run(self):
+        if self._write is not None:
+            return FakeResponse(self._db.write(self._table, self._apply_write))
+        rows = [row for row in self._db.rows(self._table) if self._matches(row)]
+        total = len(rows)
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+        end = None if self._limit is None else self._offset + self._limit
+        rows = rows[self._offset:end]
+        if self._columns is not None:
+            rows = [{c: row.get(c) for c in self._columns} for row in rows]
+        else:
+            rows = [dict(row) for row in rows]
+        return FakeResponse(rows, total if self._count else None)
+
+    def _apply_write(self, rows, next_id):
+        kind = self._write[0]
+        written = []
+        if kind == "upsert":
+            _, new_rows, on_conflict, ignore_duplicates = self._write
+            positions = {row.get(on_conflict): i for i, row in enumerate(rows)} if on_conflict else {}
+            for new in new_rows:
+                at = positions.get(new.get(on_conflict)) if on_conflict else None
+                if at is not None:
+                    if ignore_duplicates:
+                        continue
+                    rows[at] = {**rows[at], **new, "updated_at": _now()}
+                    written.append(dict(rows[at]))
+                else:
+                    row = {"created_at": _now(), **new, "updated_at": _now()}
+                    if row.get("id") is None:
+                        row["id"] = next_id
+                        next_id += 1
+                    if on_conflict:
+                        positions[row.get(on_conflict)] = len(rows)
+                    rows.append(row)
+                    written.append(dict(row))
+        elif kind == "update":
+            for i, row in enumerate(rows):
+                if self._matches(row):
+                    rows[i] = {**row, **self._write[1], "updated_at": _now()}
+                    written.append(dict(rows[i]))
+        else:
+            kept = []
+            for row in rows:
+                (written if self._matches(row) else kept).append(row)
+            rows = kept
+        return rows, next_id, written
+
+    def execute(self):
+        time.sleep(self._db.delay())
+        return self._run()
+
+
+class AsyncFakeQuery(FakeQuery):
+    async def execute(self):
+        await asyncio.sleep(self._db.delay())
+        return self._run()
+
+
+def _apply_audit_edits(database, params):
+    """``apply_audit_edits``: update rows still at the edit's ``updated_at``"""
+    edits = {edit["id"]: edit for edit in params["edits"]}
+
+    def apply(rows, next_id):
+        written = []
+        for i, row in enumerate(rows):
+            edit = edits.get(row.get("id"))
+            if edit is not None and row.get("updated_at") == edit["updated_at"]:
+                rows[i] = {**row, **edit["changes"], "updated_at": _now()}
+                written.append(dict(rows[i]))
+        return rows, next_id, written
+
+    return database.write("audits", apply)
+
+
+def _delete_archived_audits(database, params):
+    """``delete_archived_audits``: delete rows still at the archived ``updated_at``; returns their ids"""
+    archived = {entry["id"]: entry["updated_at"] for entry in params["archived"]}
+
+    def apply(rows, next_id):
+        kept, deleted = [], []
+        for row in rows:
+            if row.get("id") in archived and row.get("updated_at") == archived[row["id"]]:
+                deleted.append(row["id"])
+            else:
+                kept.append(row)
+        return kept, next_id, deleted
+
+    return database.write("audits", apply)
+
+
+class FakeRpc:
+    """A call to one of the database functions in ``FakeClient.functions``"""
+
+    def __init__(self, database, function, params):
+        self._db = database
+        self._function = function
+        self._params = params
+
+    def execute(self):
+        time.sleep(self._db.delay())
+        return FakeResponse(self._function(self._db, self._params))
+
+
+class AsyncFakeRpc(FakeRpc):
+    async def execute(self):
+        await asyncio.sleep(self._db.delay())
+        return FakeResponse(self._function(self._db, self._params))
+
+
+class FakeClient:
+    """Drop-in for ``supabase.Client`` backed by a ``FakeDatabase``"""
+
+    query_class = FakeQuery
+    rpc_class = FakeRpc
+    functions = {"apply_audit_edits": _apply_audit_edits, "delete_archived_audits": _delete_archived_audits}
+
+    def __init__(self, database):
+        self.database = database
+
+    def table(self, name):
+        return self.query_class(self.database, name)
+
+    def rpc(self, name, params=None):
+        if name not in self.functions:
+            raise NotImplementedError(f"FakeClient has no stored procedure {name!r}")
+        return self.rpc_class(self.database, self.functions[name], params or {})
+
+
+class AsyncFakeClient(FakeClient):
+    """Drop-in for ``supabase.AsyncClient``"""
+
+    query_class = AsyncFakeQuery
+    rpc_class = AsyncFakeRpc
+
+
+# =================== SYNTHETIC DATA ===================
+def generate_audits(count, days=365, seed=0):
+    """``count`` scored audits spread over the last ``days`` days, newest first"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    team_leaders = [tl for tl in TEAM_DEPARTMENT_MAP if TEAM_CONSULTANTS_MAP.get(tl)]
+    rows = []
+    for i in range(count):
+        team_leader = rng.choice(team_leaders)
+        audit_date = now - timedelta(minutes=rng.randrange(days * 24 * 60))
+        answers = {
+            q: rng.choices(["Yes", "No", "NA"], weights=[85, 8, 7])[0] for q in QUESTION_COLUMNS
+        }
+        row = build_audit(
+            team_leader,
+            TEAM_DEPARTMENT_MAP[team_leader],
+            rng.choice(TEAM_CONSULTANTS_MAP[team_leader]),
+            str(rng.randrange(10_000_000, 99_999_999)),
+            audit_date.isoformat(),
+            answers,
+        )
+        row["id"] = i + 1
+        row["created_at"] = row["updated_at"] = audit_date.isoformat()
+        rows.append(row)
+    rows.sort(key=lambda row: row["audit_date"], reverse=True)
+    return rows
@@ -0,0 +1,190 @@
+"""Concurrent-session load test against the in-process fake backend.
+
+Runs N headless Streamlit sessions (``streamlit.testing`` AppTest) at once,
+each walking the dashboard, Analytics and Reports pages for a number of
+rounds, with every backend call served by ``fake_backend`` at a chosen
+latency and dataset size. Reports p50/p99 render time per page, overall
+throughput and memory per session:
+
+    python -m qa_scorecard.load_test --sessions 20 --rounds 3 --rows 50000 --latency 0.05
+
+Sessions share one process, as they do under ``streamlit run``, so shared
+caches (the data store, rollups, section cache) behave as in production.
+The first round includes the cold load. State files go to a temporary
+directory unless QA_STATE_DIR is set.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent.parent
+PAGES = {
+    "dashboard": "Scoring_Dashboard.py",
+    "analytics": "pages/1_📈_Analytics.py",
+    "reports": "pages/3_📄_Reports.py",
+}
+RENDER_TIMEOUT = 120
+
+
+def rss_bytes():
+    """Resident memory of this process (Linux /proc; peak RSS elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def install_fake_backend(rows, latency, jitter=0.0, seed=0):
+    """Point every client at a fresh ``FakeDatabase`` of ``rows`` synthetic audits"""
+    from qa_scorecard.async_db import set_async_client
+    from qa_scorecard.db import set_client
+    from qa_scorecard.fake_backend import AsyncFakeClient, FakeClient, FakeDatabase, generate_audits
+
+    database = FakeDatabase({"audits": generate_audits(rows, seed=seed)}, latency=latency, jitter=jitter)
+    set_client(FakeClient(database))
+    set_async_client(AsyncFakeClient(database))
+    return database
+
+
+@contextmanager
+def concurrent_app_tests():
+    """Let AppTest sessions run side by side the way server sessions do.
+
+    AppTest assumes one test at a time: each run installs a mock ``Runtime``
+    and clears it when done, and compiles the script into a fresh cache
+    (concurrent compiles can fail on Python 3.11). Inside this block every
+    session shares one script cache, compiled before any session starts, as
+    a server's sessions do; a session whose runtime was cleared by another
+    session's teardown keeps using the latest one.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+
+    script_cache = ScriptCache()
+    for script in PAGES.values():
+        script_cache.get_bytecode(str(APP_DIR / script))  # compile up front, one at a time
+    latest = []
+    plain_instance = Runtime.instance.__func__
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+        elif latest:
+            return latest[0]
+        return plain_instance(cls)
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(app_test, "ScriptCache", lambda: script_cache))
+        stack.enter_context(patch.object(Runtime, "instance", classmethod(instance)))
+        yield
+
+
+def _session(number, pages, rounds, start, results, memory):
+    from streamlit.testing.v1 import AppTest
+
+    from qa_scorecard.result_cache import estimate_size
+
+    app = AppTest.from_file(str(APP_DIR / PAGES["dashboard"]), default_timeout=RENDER_TIMEOUT)
+    start.wait()
+    for round_number in range(rounds):
+        for page in pages:
+            error = None
+            began = time.perf_counter()
+            try:
+                if round_number or page != "dashboard":
+                    app.switch_page(PAGES[page])
+                app.run()
+                if app.exception:
+                    error = app.exception[0].value
+            except Exception as e:
+                error = repr(e)
+            results.append({
+                "session": number,
+                "round": round_number,
+                "page": page,
+                "seconds": time.perf_counter() - began,
+                "error": error,
+            })
+    state = {key: app.session_state[key] for key in app.session_state}
+    memory.append(estimate_size(state))
+
+
+def run(sessions=10, rounds=3, rows=20000, latency=0.05, jitter=0.0, pages=tuple(PAGES)):
+    """Drive ``sessions`` concurrent sessions; returns ``(renders, summary)`` DataFrames"""
+    database = install_fake_backend(rows, latency, jitter)
+    baseline = rss_bytes()
+    results, memory = [], []
+    start = threading.Barrier(sessions)
+    threads = [
+        threading.Thread(target=_session, args=(n, pages, rounds, start, results, memory),
+                         name=f"load-session-{n}", daemon=True)
+        for n in range(sessions)
+    ]
+    with concurrent_app_tests():
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+    after = rss_bytes()
+
+    renders = pd.DataFrame(results)
+    ok = renders[renders["error"].isna()]
+    by_page = ok.groupby("page")["seconds"]
+    summary = pd.DataFrame({
+        "Renders": renders.groupby("page").size(),
+        "Errors": renders.groupby("page")["error"].count(),
+        "p50 (ms)": by_page.median() * 1000,
+        "p99 (ms)": by_page.quantile(0.99) * 1000,
+        "Max (ms)": by_page.max() * 1000,
+    }).reindex(list(pages)).round(1)
+    totals = {
+        "sessions": sessions,
+        "wall_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else float("nan"),
+        "backend_requests": database.requests,
+        "rss_mb_per_session": round((after - baseline) / sessions / 2**20, 2),
+        "session_state_kb": round(float(np.mean(memory)) / 1024, 1) if memory else float("nan"),
+    }
+    summary.attrs["totals"] = totals
+    return renders, summary
+
+
+# =================== CLI ===================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test concurrent sessions against a fake backend.")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions (default 10)")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the pages per session (default 3)")
+    parser.add_argument("--rows", type=int, default=20000, help="audits in the fake database (default 20000)")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per backend request (default 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds of random latency (default 0)")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--csv", help="also write every render's timing to this CSV file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QA_STATE_DIR", tempfile.mkdtemp(prefix="qa-load-"))
+    renders, summary = run(args.sessions, args.rounds, args.rows, args.latency, args.jitter, args.pages)
+    print(summary.to_string())
+    for name, value in summary.attrs["totals"].items():
+        print(f"{name}: {value}")
+    errors = renders["error"].dropna()
+    if not errors.empty:
+        print(f"\n{len(errors)} render(s) failed, e.g.: {errors.iloc[0]}")
+    if args.csv:
+        renders.to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
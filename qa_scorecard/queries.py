@@ -0,0 +1,58 @@
+"""Server-side paged queries: filtering, sorting and counting happen in Postgres."""
+import re
+
+import pandas as pd
+
+from qa_scorecard.db import get_client
+from qa_scorecard.resilience import call
+
+SORTABLE_COLUMNS = {
+    "Audit Date": "audit_date",
+    "Score": "score",
+    "Consultant": "consultant",
+    "Team Leader": "team_leader",
+    "Department": "department",
+    "Client ID": "client_id",
+}
+SEARCH_COLUMNS = ["client_id", "consultant", "comments"]
+
+# Characters with meaning inside a PostgREST or=() filter or an ILIKE pattern
+_UNSAFE_SEARCH_CHARS = re.compile(r'[,()"*%\\:]')
+
+
+def _search_filter(term):
+    term = _UNSAFE_SEARCH_CHARS.sub(" ", term).strip()
+    if not term:
+        return None
+    return ",".join(f'{col}.ilike."*{term}*"' for col in SEARCH_COLUMNS)
+
+
+def fetch_audit_page(page, page_size, sort_by="audit_date", descending=True,
+                     filters=None, search=None, start_date=None, end_date=None, client=None):
+    """Return ``(rows, total)`` for one page of audits.
+
+    Only ``page_size`` rows cross the wire; ``total`` comes from PostgREST's
+    ``count=exact`` so the pager knows how many pages exist.
+    """
+    client = client or get_client()
+    query = client.table("audits").select("*", count="exact")
+    for column, value in (filters or {}).items():
+        if value:
+            query = query.eq(column, value)
+    if start_date:
+        query = query.gte("audit_date", start_date.isoformat())
+    if end_date:
+        query = query.lt("audit_date", (pd.Timestamp(end_date) + pd.Timedelta(days=1)).date().isoformat())
+    if search:
+        search_filter = _search_filter(search)
+        if search_filter:
+            query = query.or_(search_filter)
+
+    offset = (page - 1) * page_size
+    query = (
+        query.order(sort_by, desc=descending)
+        .order("id", desc=descending)  # stable order across pages
+        .range(offset, offset + page_size - 1)
+    )
+    response = call("audits.view_page", query.execute)
+    return pd.DataFrame(response.data or []), response.count or 0
@@ -0,0 +1,159 @@
+"""Re-score historical audits after a scorecard change.
+
+Usage::
+
+    python -m qa_scorecard.rescore [--workers 8] [--chunk-size 5000] [--department ARQ]
+                                   [--dry-run] [--restart]
+
+Audits are read in id order with keyset pagination, answers as their two bit
+masks. Each chunk is re-scored in a process pool with ``score_masks``, the
+popcount form of ``calculate_score`` (same critical-question zeroing and NA
+rules). Only rows whose score or scorecard
+version actually changes are sent back, one ``apply_rescores`` call per
+chunk. Progress is checkpointed after every written chunk, so an
+interrupted run resumes where it stopped. A run started after the
+scorecards changed again starts over.
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from qa_scorecard.answer_masks import critical_masks, pack_frame, score_masks
+from qa_scorecard.data_store import FETCH_PAGE_SIZE
+from qa_scorecard.db import get_client
+from qa_scorecard.scorecards import SCORING_CARDS, scorecard_version
+from qa_scorecard.settings import STATE_DIR
+
+CHECKPOINT_PATH = STATE_DIR / "rescore_checkpoint.json"
+RESCORE_COLUMNS = "id,department,score,scorecard_version,yes_mask,na_mask"
+
+
+def current_versions():
+    return {department: scorecard_version(department) for department in SCORING_CARDS}
+
+
+def rescore_chunk(rows):
+    """Changed ``{id, score, scorecard_version}`` entries for one chunk (runs in a worker)"""
+    frame = pd.DataFrame(rows)
+    frame = frame[frame["department"].isin(list(SCORING_CARDS))]
+    if frame.empty:
+        return []
+    yes, na = pack_frame(frame)
+    scores = score_masks(yes, na, critical_masks(frame["department"]))
+    versions = frame["department"].map(current_versions()).to_numpy()
+    old_scores = pd.to_numeric(frame["score"], errors="coerce").to_numpy(dtype=float)
+    changed = np.isnan(old_scores) | (np.abs(old_scores - scores) > 1e-9) \
+        | (frame["scorecard_version"].to_numpy() != versions)
+    return [
+        {"id": int(audit_id), "score": float(score), "scorecard_version": version}
+        for audit_id, score, version in zip(frame["id"].to_numpy()[changed], scores[changed], versions[changed])
+    ]
+
+
+def _load_checkpoint(versions, department):
+    """Last written id of an interrupted run over the same rules and scope"""
+    try:
+        with open(CHECKPOINT_PATH, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if checkpoint.get("versions") != versions or checkpoint.get("department") != department:
+        return None
+    return checkpoint["last_id"]
+
+
+def _save_checkpoint(last_id, versions, department, stats):
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = CHECKPOINT_PATH.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"last_id": last_id, "versions": versions, "department": department, **stats}, f)
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+
+def _fetch_chunks(client, after_id, chunk_size, department=None):
+    """Yield lists of up to ``chunk_size`` audits in id order, starting after ``after_id``"""
+    chunk = []
+    while True:
+        query = client.table("audits").select(RESCORE_COLUMNS).order("id").limit(FETCH_PAGE_SIZE)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        if department:
+            query = query.eq("department", department)
+        page = query.execute().data or []
+        chunk.extend(page)
+        if page:
+            after_id = page[-1]["id"]
+        if len(chunk) >= chunk_size or (len(page) < FETCH_PAGE_SIZE and chunk):
+            yield chunk
+            chunk = []
+        if len(page) < FETCH_PAGE_SIZE:
+            return
+
+
+def register_versions(client):
+    """Record the rules behind every current scorecard version"""
+    client.table("scorecard_versions").upsert([
+        {"version": scorecard_version(d), "department": d,
+         "critical_questions": sorted(card.get("critical_questions", []))}
+        for d, card in SCORING_CARDS.items()
+    ], on_conflict="version", ignore_duplicates=True).execute()
+
+
+def run(workers=None, chunk_size=5000, department=None, dry_run=False, restart=False, client=None, log=print):
+    client = client or get_client()
+    versions = current_versions()
+    after_id = None if restart else _load_checkpoint(versions, department)
+    if after_id is not None:
+        log(f"Resuming after audit id {after_id}")
+    if not dry_run:
+        register_versions(client)
+
+    stats = {"scanned": 0, "changed": 0}
+    started = time.monotonic()
+    workers = workers or os.cpu_count()
+    pending = deque()  # (last id in chunk, size, future), written in submission order
+
+    def drain(limit):
+        while len(pending) > limit:
+            last_id, size, future = pending.popleft()
+            changes = future.result()
+            if changes and not dry_run:
+                client.rpc("apply_rescores", {"changes": changes}).execute()
+            stats["scanned"] += size
+            stats["changed"] += len(changes)
+            if not dry_run:
+                _save_checkpoint(last_id, versions, department, stats)
+            rate = stats["scanned"] / max(time.monotonic() - started, 1e-9)
+            log(f"{stats['scanned']} scanned, {stats['changed']} re-scored ({rate:,.0f} audits/s)")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in _fetch_chunks(client, after_id, chunk_size, department):
+            pending.append((chunk[-1]["id"], len(chunk), pool.submit(rescore_chunk, chunk)))
+            drain(limit=workers * 2)  # keep workers busy while bounding memory
+        drain(limit=0)
+
+    if not dry_run:
+        CHECKPOINT_PATH.unlink(missing_ok=True)  # finished; the next run scans from the start
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score audits with the current scorecards.")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="audits per chunk")
+    parser.add_argument("--department", help="only re-score this department")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing them")
+    parser.add_argument("--restart", action="store_true", help="ignore any saved checkpoint")
+    args = parser.parse_args(argv)
+    stats = run(args.workers, args.chunk_size, args.department, args.dry_run, args.restart)
+    print(f"Done: {stats['scanned']} audits scanned, {stats['changed']} re-scored.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Latency budgets, hedged reads and a circuit breaker for backend calls.
+
+Every PostgREST call made through ``call`` (sync) or ``acall`` (async) is
+named and gets:
+
+* a latency budget: the caller gets ``BudgetExceeded`` instead of waiting
+  on a stuck response;
+* for idempotent reads, a hedge: if no answer arrived by the operation's
+  recent p95, a second identical request is sent and the first answer
+  wins (hedges are capped at ``HEDGE_RATIO`` of calls so a slow backend
+  is not sent double the load);
+* a shared circuit breaker: after ``FAILURE_THRESHOLD`` consecutive
+  failures or timeouts calls fail fast with ``CircuitOpen`` for
+  ``RESET_SECONDS``, then one trial call decides whether to close it.
+
+Callers catch ``BackendDegraded`` (the base of both errors) and fall back
+to the last data they have, flagged as stale. ``latency_report`` shows
+p50/p95/p99 per operation so the effect is visible.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+LATENCY_BUDGETS = {  # seconds
+    "audits.load_page": 10.0,
+    "audits.view_page": 5.0,
+    "audits.changes": 10.0,
+}
+DEFAULT_BUDGET = 8.0
+WINDOW = 500  # recent calls kept per operation
+MIN_SAMPLES = 20  # no hedging until the p95 means something
+MIN_HEDGE_DELAY = 0.2
+HEDGE_RATIO = 0.1
+FAILURE_THRESHOLD = 5
+RESET_SECONDS = 30
+
+
+class BackendDegraded(Exception):
+    """The backend is too slow or failing; use cached data if there is any"""
+
+
+class BudgetExceeded(BackendDegraded, TimeoutError):
+    """A call did not finish within its latency budget"""
+
+
+class CircuitOpen(BackendDegraded):
+    """Calls are short-circuited while the backend recovers"""
+
+
+# =================== CIRCUIT BREAKER ===================
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open trial -> closed"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+        self._lock = threading.Lock()
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half-open"
+            if self.state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+breaker = CircuitBreaker()
+
+
+# =================== OPERATIONS ===================
+class Operation:
+    """Latency history and counters for one named backend call"""
+
+    def __init__(self, name, budget):
+        self._lock = threading.Lock()
+        self.name = name
+        self.budget = budget
+        self.latencies = deque(maxlen=WINDOW)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    def hedge_delay(self):
+        """The recent p95, or None while there is too little history or hedging is over its cap"""
+        with self._lock:
+            if len(self.latencies) < MIN_SAMPLES or self.hedges >= HEDGE_RATIO * self.calls:
+                return None
+            p95 = float(np.percentile(self.latencies, 95))
+        return max(p95, MIN_HEDGE_DELAY) if p95 < self.budget else None
+
+    def _admit(self):
+        with self._lock:
+            self.calls += 1
+        if not breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise CircuitOpen(f"{self.name}: backend unavailable, retrying in {breaker.reset_seconds}s")
+
+    def _finish(self, started, outcome, hedged=False, hedge_won=False):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.latencies.append(min(elapsed, self.budget))
+            self.hedges += hedged
+            self.hedge_wins += hedge_won
+            self.timeouts += outcome == "timeout"
+            self.failures += outcome == "error"
+        if outcome == "ok":
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+    def call(self, fn, hedge=True):
+        """Run ``fn()`` in the shared pool within the budget, hedging it if allowed"""
+        self._admit()
+        started = time.monotonic()
+        deadline = started + self.budget
+        delay = self.hedge_delay() if hedge else None
+        attempts = [_pool.submit(fn)]
+        pending = set(attempts)
+        error = None
+        while pending:
+            now = time.monotonic()
+            hedge_at = started + delay if delay is not None and len(attempts) == 1 else None
+            timeout = min(deadline, hedge_at) - now if hedge_at else deadline - now
+            if timeout <= 0 and not hedge_at:
+                break
+            done, pending = wait(pending, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._finish(started, "ok", len(attempts) > 1, future is not attempts[0])
+                    return future.result()
+                error = future.exception()
+            if hedge_at and not done and time.monotonic() >= hedge_at:
+                attempts.append(_pool.submit(fn))
+                pending.add(attempts[-1])
+        if pending:
+            self._finish(started, "timeout", len(attempts) > 1)
+            raise BudgetExceeded(f"{self.name}: no response within {self.budget:.0f}s")
+        self._finish(started, "error", len(attempts) > 1)
+        raise error
+
+    async def acall(self, factory, hedge=True):
+        """Await ``factory()`` within the budget, hedging it if allowed; losers are cancelled"""
+        self._admit()
+        started = time.monotonic()
+        delay = self.hedge_delay() if hedge else None
+        attempts = [asyncio.ensure_future(factory())]
+        pending = set(attempts)
+        error = None
+        try:
+            while pending:
+                now = time.monotonic()
+                hedge_at = started + delay if delay is not None and len(attempts) == 1 else None
+                deadline = started + self.budget
+                timeout = min(deadline, hedge_at) - now if hedge_at else deadline - now
+                if timeout <= 0 and not hedge_at:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=max(timeout, 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._finish(started, "ok", len(attempts) > 1, task is not attempts[0])
+                        return task.result()
+                    error = task.exception()
+                if hedge_at and not done and time.monotonic() >= hedge_at:
+                    attempts.append(asyncio.ensure_future(factory()))
+                    pending.add(attempts[-1])
+        finally:
+            for task in pending:
+                task.cancel()
+        if pending:
+            self._finish(started, "timeout", len(attempts) > 1)
+            raise BudgetExceeded(f"{self.name}: no response within {self.budget:.0f}s")
+        self._finish(started, "error", len(attempts) > 1)
+        raise error
+
+    def summary(self):
+        with self._lock:
+            latencies = np.array(self.latencies) * 1000
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (np.nan,) * 3
+            return {
+                "Operation": self.name,
+                "Calls": self.calls,
+                "p50 (ms)": round(float(p50), 1),
+                "p95 (ms)": round(float(p95), 1),
+                "p99 (ms)": round(float(p99), 1),
+                "Max (ms)": round(float(latencies.max()), 1) if len(latencies) else np.nan,
+                "Hedged": self.hedges,
+                "Hedge Wins": self.hedge_wins,
+                "Timeouts": self.timeouts,
+                "Errors": self.failures,
+                "Short-circuited": self.short_circuited,
+            }
+
+
+# Calls that outlive their budget keep their thread until the HTTP client
+# gives up, so the pool is sized well above normal concurrency.
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="backend-call")
+_operations = {}
+_operations_lock = threading.Lock()
+
+
+def operation(name):
+    """The shared ``Operation`` for ``name``"""
+    with _operations_lock:
+        op = _operations.get(name)
+        if op is None:
+            op = _operations[name] = Operation(name, LATENCY_BUDGETS.get(name, DEFAULT_BUDGET))
+        return op
+
+
+def call(name, fn, hedge=True):
+    """``fn()`` under the budget, hedging and breaker of operation ``name``"""
+    return operation(name).call(fn, hedge)
+
+
+async def acall(name, factory, hedge=True):
+    """Async counterpart of ``call``; ``factory()`` must return a fresh awaitable per attempt"""
+    return await operation(name).acall(factory, hedge)
+
+
+def latency_report():
+    """Tail latency and resilience counters per operation, plus the breaker state"""
+    with _operations_lock:
+        ops = list(_operations.values())
+    return pd.DataFrame([op.summary() for op in ops]), breaker.state
@@ -0,0 +1,158 @@
+"""Memory-bounded LRU cache for computed page sections.
+
+Entries are keyed by whatever identifies a result -- typically the section
+name, the data version and the filter selection -- so a result is reused
+until the data changes and then simply ages out. Each entry's size is
+estimated when it is stored (deep DataFrame memory, array buffers, string
+lengths), and least-recently-used entries are evicted once the total passes
+the byte budget. Hit, miss and eviction counters show how well it works.
+
+A background computation that fails is remembered: for
+``FAILURE_BACKOFF_SECONDS`` the key is not rescheduled and ``failure()``
+reports the error, so pollers stop instead of retrying every tick.
+
+Cached values are shared between sessions: treat them as read-only.
+"""
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+FAILURE_BACKOFF_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value):
+    """Approximate memory held by ``value``, in bytes"""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe LRU with a byte budget"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._scheduled = set()  # keys being computed in the background
+        self._failures = {}  # key -> (monotonic time, error) of its last failed background computation
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """The cached value for ``key``, computing and storing it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = compute()  # outside the lock; a concurrent duplicate compute is harmless
+        self.put(key, value)
+        return value
+
+    def get_or_schedule(self, key, compute):
+        """The cached value for ``key``, or None after starting ``compute`` in a background thread.
+
+        The result lands in the cache when it finishes; callers poll until it
+        is there, or until ``failure(key)`` reports an error. At most one
+        computation runs per key, and a failed key is not retried within
+        ``FAILURE_BACKOFF_SECONDS``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if key in self._scheduled or self._recent_failure(key) is not None:
+                return None
+            self._failures.pop(key, None)
+            self.misses += 1
+            self._scheduled.add(key)
+
+        def work():
+            try:
+                self.put(key, compute())
+            except Exception as e:
+                logger.exception("Background computation of %r failed", key)
+                with self._lock:
+                    now = time.monotonic()
+                    self._failures = {k: f for k, f in self._failures.items()
+                                      if now - f[0] < FAILURE_BACKOFF_SECONDS}
+                    self._failures[key] = (now, e)
+            finally:
+                with self._lock:
+                    self._scheduled.discard(key)
+
+        threading.Thread(target=work, name="result-cache", daemon=True).start()
+        return None
+
+    def failure(self, key):
+        """The error of ``key``'s last background computation if it failed within the back-off, else None"""
+        with self._lock:
+            return self._recent_failure(key)
+
+    def _recent_failure(self, key):
+        failed = self._failures.get(key)
+        if failed is None or time.monotonic() - failed[0] >= FAILURE_BACKOFF_SECONDS:
+            return None
+        return failed[1]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return  # would evict everything else; recompute instead
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._failures.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+# Process-wide cache for the Analytics page's sections
+section_cache = ResultCache()
@@ -0,0 +1,325 @@
+"""Running per-group aggregates kept in step with the audits data.
+
+Every audit contributes to a handful of groups: the whole organisation, its
+department, team leader and consultant, plus the department/team x
+consultant pairs the leaderboards need. Each group holds a count, score sum,
+Welford mean/M2, the number of critical failures and Yes/No/NA counters per
+question. Adding or retracting an audit is O(1) per group, so inserts,
+edits (retract old, add new) and deletes keep the figures exact without
+rescanning history.
+
+The rollups are snapshotted to disk together with a watermark of the data
+they describe. After a restart the snapshot is reused as long as the loaded
+data still matches the watermark; otherwise they are rebuilt once.
+"""
+import json
+import math
+import os
+import threading
+
+import pandas as pd
+
+from qa_scorecard.data_store import AUDITS, load_audits, store
+from qa_scorecard.scorecards import COMMON_CRITICAL_COLUMNS
+from qa_scorecard.settings import STATE_DIR
+
+ROLLUPS_PATH = STATE_DIR / "rollups.json"
+QUESTION_COLUMNS = [f"q{i}" for i in range(1, 13)]
+
+# Group level -> the columns that identify a group at that level
+GROUP_LEVELS = {
+    "all": ["_all"],
+    "department": ["department"],
+    "team_leader": ["team_leader"],
+    "consultant": ["consultant"],
+    "department_team": ["department", "team_leader"],
+    "department_consultant": ["department", "consultant"],
+    "team_consultant": ["team_leader", "consultant"],
+}
+
+
+class RunningStats:
+    """Mergeable, retractable aggregates for one group"""
+
+    __slots__ = ("count", "total", "mean", "m2", "critical_failures", "answers")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.critical_failures = 0
+        self.answers = {q: [0, 0, 0] for q in QUESTION_COLUMNS}  # Yes, No, NA
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def pass_rate(self):
+        """Share of audits without a critical failure, in %"""
+        return (self.count - self.critical_failures) / self.count * 100 if self.count else 0.0
+
+    def question_pass_rate(self, q):
+        """Yes answers over non-NA answers, in %, or None when all were NA"""
+        yes, _, na = self.answers[q]
+        answered = self.count - na
+        return yes / answered * 100 if answered > 0 else None
+
+    def add(self, score, critical_failure, answers):
+        self.count += 1
+        self.total += score
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (score - self.mean)
+        self.critical_failures += critical_failure
+        self._count_answers(answers, 1)
+
+    def remove(self, score, critical_failure, answers):
+        if self.count <= 1:
+            self.__init__()
+            return
+        old_mean = self.mean
+        self.count -= 1
+        self.total -= score
+        self.mean = (old_mean * (self.count + 1) - score) / self.count
+        self.m2 = max(0.0, self.m2 - (score - old_mean) * (score - self.mean))
+        self.critical_failures -= critical_failure
+        self._count_answers(answers, -1)
+
+    def _count_answers(self, answers, step):
+        for q, answer in answers.items():
+            slot = {"Yes": 0, "No": 1, "NA": 2}.get(answer)
+            if slot is not None:
+                self.answers[q][slot] += step
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for name in cls.__slots__:
+            setattr(stats, name, data[name])
+        return stats
+
+
+def group_keys(audit):
+    """Every group an audit contributes to"""
+    dept = audit.get("department") or "Not Assigned"
+    team = audit.get("team_leader")
+    consultant = audit.get("consultant")
+    return [
+        ("all",),
+        ("department", dept),
+        ("team_leader", team),
+        ("consultant", consultant),
+        ("department_team", dept, team),
+        ("department_consultant", dept, consultant),
+        ("team_consultant", team, consultant),
+    ]
+
+
+def scope_key(department=None, team_leader=None, consultant=None):
+    """The single group key that matches a filter selection"""
+    if consultant:
+        if team_leader:
+            return ("team_consultant", team_leader, consultant)
+        if department:
+            return ("department_consultant", department, consultant)
+        return ("consultant", consultant)
+    if team_leader:
+        if department:
+            return ("department_team", department, team_leader)
+        return ("team_leader", team_leader)
+    if department:
+        return ("department", department)
+    return ("all",)
+
+
+def _contribution(audit):
+    score = audit.get("score")
+    score = float(score) if score is not None and not pd.isna(score) else 0.0
+    critical_failure = int(any(audit.get(c) == "No" for c in COMMON_CRITICAL_COLUMNS))
+    answers = {q: audit.get(q) for q in QUESTION_COLUMNS if q in audit}
+    return score, critical_failure, answers
+
+
+def _watermark(frame):
+    """Cheap fingerprint of a loaded audits frame"""
+    if frame.empty:
+        return {"rows": 0}
+    mark = {"rows": int(len(frame)), "id_sum": int(frame["id"].sum()) if "id" in frame.columns else 0}
+    if "updated_at" in frame.columns:
+        mark["max_updated_at"] = str(frame["updated_at"].max())
+    return mark
+
+
+class Rollups:
+    """All group aggregates for the audits dataset"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.groups = {}
+
+    def _apply(self, audit, sign):
+        score, critical_failure, answers = _contribution(audit)
+        for key in group_keys(audit):
+            stats = self.groups.get(key)
+            if stats is None:
+                if sign < 0:
+                    continue
+                stats = self.groups[key] = RunningStats()
+            if sign > 0:
+                stats.add(score, critical_failure, answers)
+            else:
+                stats.remove(score, critical_failure, answers)
+                if stats.count == 0:
+                    del self.groups[key]
+
+    def apply_change(self, previous, current):
+        """Retract the old versions of changed rows and add the new ones"""
+        with self._lock:
+            for audit in previous.to_dict("records"):
+                self._apply(audit, -1)
+            for audit in current.to_dict("records"):
+                self._apply(audit, +1)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build every group with vectorized group-bys instead of row by row"""
+        rollups = cls()
+        if frame.empty:
+            return rollups
+        df = frame.copy()
+        df["department"] = df["department"].fillna("Not Assigned") if "department" in df.columns else "Not Assigned"
+        df["_all"] = "all"
+        df["_score"] = pd.to_numeric(df["score"], errors="coerce").fillna(0.0)
+        critical = [c for c in COMMON_CRITICAL_COLUMNS if c in df.columns]
+        df["_critical"] = (df[critical] == "No").any(axis=1).astype(int) if critical else 0
+        questions = [q for q in QUESTION_COLUMNS if q in df.columns]
+        for q in questions:
+            for answer in ("Yes", "No", "NA"):
+                df[f"_{q}_{answer}"] = (df[q] == answer).astype(int)
+        answer_cols = [f"_{q}_{a}" for q in questions for a in ("Yes", "No", "NA")]
+
+        for level, columns in GROUP_LEVELS.items():
+            grouped = df.groupby(columns, dropna=False)
+            agg = grouped["_score"].agg(["count", "sum", "mean", "var"])
+            sums = grouped[["_critical"] + answer_cols].sum()
+            for group, row in agg.iterrows():
+                group = group if isinstance(group, tuple) else (group,)
+                key = (level,) if level == "all" else (level, *group)
+                stats = RunningStats()
+                stats.count = int(row["count"])
+                stats.total = float(row["sum"])
+                stats.mean = float(row["mean"])
+                stats.m2 = float(row["var"]) * (stats.count - 1) if stats.count > 1 else 0.0
+                counts = sums.loc[group if len(group) > 1 else group[0]]
+                stats.critical_failures = int(counts["_critical"])
+                for q in questions:
+                    stats.answers[q] = [int(counts[f"_{q}_{a}"]) for a in ("Yes", "No", "NA")]
+                rollups.groups[key] = stats
+        return rollups
+
+    # ------------------- reading -------------------
+    def get(self, key):
+        return self.groups.get(key)
+
+    def scope(self, department=None, team_leader=None, consultant=None):
+        """Stats for a filter selection (empty stats if nothing matches it)"""
+        return self.groups.get(scope_key(department, team_leader, consultant), RunningStats())
+
+    def breakdown(self, level, department=None, team_leader=None):
+        """``{name: stats}`` for every department, team leader or consultant in scope"""
+        if level == "department":
+            return {k[1]: s for k, s in self.groups.items() if k[0] == "department"}
+        if level == "team_leader":
+            if department:
+                return {k[2]: s for k, s in self.groups.items()
+                        if k[0] == "department_team" and k[1] == department}
+            return {k[1]: s for k, s in self.groups.items() if k[0] == "team_leader"}
+        if level == "consultant":
+            if team_leader:
+                return {k[2]: s for k, s in self.groups.items()
+                        if k[0] == "team_consultant" and k[1] == team_leader}
+            if department:
+                return {k[2]: s for k, s in self.groups.items()
+                        if k[0] == "department_consultant" and k[1] == department}
+            return {k[1]: s for k, s in self.groups.items() if k[0] == "consultant"}
+        raise ValueError(f"Unknown breakdown level: {level}")
+
+    # ------------------- persistence -------------------
+    def save(self, watermark, path=ROLLUPS_PATH):
+        with self._lock:
+            payload = {
+                "watermark": watermark,
+                "groups": [[list(key), stats.to_dict()] for key, stats in self.groups.items()],
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=ROLLUPS_PATH):
+        """``(rollups, watermark)`` from disk, or ``(None, None)`` if there is no usable snapshot"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+        rollups = cls()
+        for key, stats in payload["groups"]:
+            rollups.groups[tuple(key)] = RunningStats.from_dict(stats)
+        return rollups, payload["watermark"]
+
+
+# =================== SHARED ROLLUPS ===================
+_rollups = None
+_rollups_lock = threading.Lock()
+
+
+def _on_store_change(name, previous, current):
+    global _rollups
+    if name != AUDITS:
+        return
+    with _rollups_lock:
+        if _rollups is None:
+            return
+        if previous is None:
+            _rollups = None  # invalidated; rebuilt or reloaded on next use
+            return
+        _rollups.apply_change(previous, current)
+        _rollups.save(_watermark(store.get(AUDITS)))
+
+
+store.subscribe(_on_store_change)
+
+
+def get_rollups():
+    """Process-wide rollups, from the on-disk snapshot when it still matches the data"""
+    global _rollups
+    with _rollups_lock:
+        if _rollups is None:
+            frame = load_audits()
+            watermark = _watermark(frame)
+            rollups, saved_watermark = Rollups.load()
+            if rollups is None or saved_watermark != watermark:
+                rollups = Rollups.from_frame(frame)
+                rollups.save(watermark)
+            _rollups = rollups
+        return _rollups
+
+
+def breakdown_frame(breakdown, label):
+    """``[label, 'Avg Score', 'Audit Count']`` table, as the leaderboards expect"""
+    return pd.DataFrame(
+        [(name, round(stats.mean, 1), stats.count) for name, stats in breakdown.items()],
+        columns=[label, "Avg Score", "Audit Count"],
+    )
@@ -0,0 +1,234 @@
+"""Team structure, scoring cards and the scoring rules shared by every page and job."""
+import hashlib
+import json
+
+# =================== DATA STRUCTURES ===================
+TEAM_DEPARTMENT_MAP = {
+    "Sipho Ramashiya": "Digital Support",
+    "Anita Maharaj": "ARQ",
+    "Palesa Maponya": "ARQ",
+    "Neo Thobejane": "ARQ",
+    "Garth Masekele": "ARQ",
+    "Sue Darrol": "DVQ (KYC)",
+    "Rethabile Nkadimeng": "Assessment",
+    "Theo Sambinda": "Confirmations",
+    "Pacience Mashigo": "Dialler",
+    "Bradlee Naidoo": "ARQ"
+}
+
+TEAM_CONSULTANTS_MAP = {
+    "Sipho Ramashiya": [
+        "Aobakwe Peter", "Daychannel Jasson", "Diyajal Ramesar",
+        "Golden Raphulu", "Karabo Ratau", "Moreen Nkosi"
+    ],
+    "Anita Maharaj": [
+        "Bongani Sekese", "Chriselda Silubane", "Jeanerty Jiyane",
+        "Martin Kwinda", "Molatelo Mohlapamaswi", "Nokwethaba Buthelezi",
+        "Ntudiseng Komane", "Qaqamba Somdakakazi", "Rudzani Ratshumana",
+        "Ryle Basaviah", "Shamla Shilubane"
+    ],
+    "Palesa Maponya": [
+        "Kgosietsile Seleke", "Lerato Lepuru", "Matome Sekhaolelo",
+        "Mpho Ramadwa", "Precious Tlaka", "Pumzile Siko",
+        "Refilwe Mokgonyana", "Sholeen Franklin", "Sylvia Letsiane",
+        "Thulie Khumalo", "Vuyelwa Mayekiso"
+    ],
+    "Neo Thobejane": [ 
+        "Anna Sekhaolelo", "Joseph Rameetse", "Neria Mohlapamaswi", 
+        "Ndifhadza Modau", "Nirvana Rampersad", "Nonkqubela Maganga", 
+        "Phelepine Mogaila", "Prince Mabuza", "Refiloe Mohlokoone", 
+        "Thando Simelane", "Busi Khanyeza" 
+    ], 
+    "Garth Masekele": [ 
+        "Bandile Khumalo", "Basetsana Eva Masombuka", "Bathabile Mathunjwa", 
+        "Charmaine Sambo", "Charmaine Samuel", "Gadija Wilson", 
+        "Gladys Thembi Matshiga", "Emily Thandzwane", "Mpho Makgoba", 
+        "Sibonelo Phakathi", "Terence Dyssel" 
+    ],
+    "Sue Darrol": [
+        "Bafikile Bungane", "Candice Julius", "Constance Mashele", 
+        "Dimpho Gaoletswe (Maaroganye)", "Lindiwe Mazwe", 
+        "Moleboheng Mafereka", "Portia Mashego", "Tirsa Wentzel", 
+        "Veronicque Wilson", "Prince Masengane", "Thabiso Mokgotsi", 
+        "Velancia Parker"
+    ],
+    "Rethabile Nkadimeng": [
+        "Bafedile Komane", "Celine Kelly", "Constantia Makgalia", 
+        "Ernest Mthembu", "Eulenda Mduli", "Londeka Mdodana", 
+        "Mathabo Makgopa", "Memory Mpofu", "Ndamulelo Makhado", 
+        "Pheladi Rameetse", "Margaret Matlala" 
+    ],
+    "Theo Sambinda": [ 
+        "Choene Mojela (Jenny)", "Cynthia Masiya", "Gracious Tshabalala", 
+        "Jeanette Thobane", "Kwena Mojela (Lilian)", "Martha Sangweni", 
+        "Metlholo Koki", "Thembi Hlongwane", "Unathi Mbuli", 
+        "Nokuthela Mashiloane", "Phikisiwe Mthembu"
+    ], 
+    "Pacience Mashigo": [ 
+        "Ayanda Booi", "Claudia Malatji", "Dineo Maija", 
+        "Kelly Leso", "Keseabetswe Sebatakgomo", 
+        "Thando Ngcanga", "Wiseman Zimemo", 
+        "Faith Sekano", "Marika Redelinghuys"
+    ], 
+    "Bradlee Naidoo": [ 
+        "Kekeletso Tokeng", "Kgotso Mavhunga", 
+        "Lerato Mongolo", "Maud Phosa", "Nwabisa Mjobo", 
+        "Vincent Bhengu", "Zwanga Nndwammbi", 
+        "Claudia Malatji", "Qondile Zulu"
+    ]
+}
+    
+    # ... add other team leader consultants similarly
+
+SCORING_CARDS = {
+    "Digital Support": {
+        "name": "Digital Support QA Scorecard",
+        "questions": {
+            1: "Was the consultant Friendly & Professional towards the customer?",
+            2: "Did the consultant correctly validate the customer? (POPI Act)",
+            3: "Was the consultant Actively Listening to the customer?",
+            4: "Did the consultant display Empathy?",
+            5: "Were notes placed on every interaction?",
+            6: "Was the Hold Process followed correctly?",
+            7: "Was the call transferred to the appropriate Dept?",
+            8: "Did the consultant assist the client to navigate correctly?",
+            9: "Was the Pin/Password reset process followed?",
+            10: "Was the Branch referral correct?",
+            11: "Did the agent call back the client?",
+            12: "Was Self-Service Promoted?"
+        },
+        "critical_questions": [2, 10]
+    },
+    "ARQ": {
+        "name": "ARQ Department QA Scorecard",
+        "questions": {
+            1: "Were all documents verified to be in the customers name?",
+            2: "Was the payslip and bank statement information clear and visible?",
+            3: "Was the bank statement validated with OBS/SkyQR/FNB Website?",
+            4: "Did the agent write clear notes when suspending the application?",
+            5: "Did the agent confirm flags before approving?",
+            6: "Was income captured correctly?",
+            7: "Was all incomes captured correctly according to the payslip?",
+            8: "Were the documents checked for fraudulent indications?",
+            9: "Was the application suspended correctly?",
+            10: "Was Net2/Net3 salary captured correctly?",
+            11: "Were all required signatures obtained?",
+            12: "Was the ARQ checklist fully completed?"
+        },
+        "critical_questions": [3, 6, 10]
+    },
+    "DVQ (KYC)": {
+        "name": "DVQ (KYC) Department QA Scorecard",
+        "questions": {
+            1: "Were the customers names and surnames captured?",
+            2: "Was the application approved/suspended correctly?",
+            3: "Was the ID Document run through Sprint Hive?",
+            4: "Does the Sprint Hive outcome and suspension reason match?",
+            5: "Were there clear notes made when suspending for additional documents?",
+            6: "Bank Statements: 3 salary deposits verified?",
+            7: "OBS Banks: consultant reference checked Sybrin?",
+            8: "Were all documents verified to be in the customers name?",
+            9: "Was the employment confirmation letter requested?",
+            10: "Did the agent refer the application correctly?",
+            11: "Was the payslip and bank statement information clear?",
+            12: "Were any red flags properly escalated?"
+        },
+        "critical_questions": [3, 4, 7]
+    },
+    "Assessment": { 
+        "name": "Assessment Department QA Scorecard", 
+        "questions": { 
+            1: "Q1: Was the assessment scope clearly defined?", 
+            2: "Q2: Were assessment criteria applied correctly?", 
+            3: "Q3: Was the assessment thorough and complete?", 
+            4: "Q4: Were findings properly documented?", 
+            5: "Q5: Were recommendations clear and actionable?", 
+            6: "Q6: Was the assessment delivered on time?", 
+            7: "Q7: Was client feedback incorporated?", 
+            8: "Q8: Were risks properly evaluated?", 
+            9: "Q9: Was the assessment report professional?", 
+            10: "Q10: Were follow-up assessments scheduled if needed?", 
+            11: "Q11: Was the assessment methodology appropriate?", 
+            12: "Q12: Were all stakeholders properly informed?" 
+        }, 
+        "critical_questions": []
+    },
+    "Confirmations": { 
+        "name": "Confirmations Department QA Scorecard", 
+        "questions": { 
+            1: "Q1: Did the Agent validate clients ID and employee numbers to HR?", 
+            2: "Q2: Did the Agent verify client's employment status i.e. perm or temp?", 
+            3: "Q3: Did the Agent verify client company name?", 
+            4: "Q4: Did the Agent verify client's employment dates?", 
+            5: "Q5: Did the Agent verify client's salary payment dates including when they get paid when it falls on weekend and public holiday?", 
+            6: "Q6: Did the Agent verify if there is any possible retrenchment within the company?", 
+            7: "Q7: Did the Agent obtain HR/manager/payroll personnel name and surname explaining the significance in obtain the particulars?", 
+            8: "Q8: Did the agent confirm the company email address?", 
+            9: "Q9: Were follow-ups documented?", 
+            10: "Q10: Was feedback from confirmations actioned?", 
+            11: "Q11: Were all compliance requirements met?", 
+            12: "Q12: Was the confirmation process efficient?" 
+        }, 
+        "critical_questions": []
+    },
+    "Dialler": { 
+        "name": "Dialler Department QA Scorecard", 
+        "questions": { 
+            1: "Q1: Regulatory statement (African is a financial services provider…) ⚠️", 
+            2: "Q2: ID & V (authenticate the customer correctly) ⚠️", 
+            3: "Q3: Did the consultant speak clear, audible and polite tone/accent without interruptions?", 
+            4: "Q4: Did the consultant inform/assist with different platforms of sending documents?", 
+            5: "Q5: Did the consultant confirm receival of documents?", 
+            6: "Q6: Did the consultant confirm and communicate clearly what is outstanding? Referred to the notes on Exactus?", 
+            7: "Q7: Defining what will be the next steps to the application?", 
+            8: "Q8: How the customer can check on the status of their application?", 
+            9: "Q9: Was call disposition accurately recorded?", 
+           10: "Q10: Were customer objections handled professionally?", 
+           11: "Q11: Was the customer experience positive?", 
+           12: "Q12: Were all compliance requirements met during calls?" 
+        }, 
+        "critical_questions": [1, 2]
+    }
+    # Add other departments similarly...
+}
+
+# Questions the analytics treat as critical regardless of department when
+# counting "critical failures" across mixed-department selections
+COMMON_CRITICAL_COLUMNS = ['q2', 'q10', 'q3', 'q6', 'q7']
+
+# =================== SCORING ===================
+def calculate_score(answers, critical_questions):
+    """ Calculate total score; total = 0 if any critical = 'No' """
+    for q in critical_questions:
+        if answers.get(f"q{q}") == "No":
+            return 0
+    total = 0
+    max_possible = 0
+    for i in range(1, 13):
+        ans = answers.get(f"q{i}", "NA")
+        if ans == "NA":
+            continue
+        max_possible += 1
+        if ans == "Yes":
+            total += 1
+    return round((total / max_possible) * 100, 2) if max_possible else 0
+
+
+def scorecard_version(department):
+    """Short fingerprint of the rules that affect a department's scores.
+
+    Editing a card's critical questions (or its question numbers) yields a new
+    version, so audits scored under older rules can be found and re-scored.
+    The department is part of the rules, so two cards with the same rules
+    still get distinct versions (``scorecard_versions`` is keyed on version).
+    """
+    card = SCORING_CARDS.get(department)
+    if card is None:
+        return None
+    rules = {
+        "department": department,
+        "questions": sorted(card["questions"]),
+        "critical_questions": sorted(card.get("critical_questions", [])),
+    }
+    digest = hashlib.sha1(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+    return digest[:12]
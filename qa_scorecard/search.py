@@ -0,0 +1,182 @@
+"""In-memory search index over audit client IDs and comments.
+
+Client IDs are kept in a sorted list so a prefix lookup is two binary
+searches. Comments are tokenized into an inverted index (token -> audit ids);
+a query matches audits containing every token, with the last token treated
+as a prefix so results narrow while the user is still typing.
+
+There is one index per department shard (or over all audits), built once
+from the shared data store and then kept in step with it through store
+change notifications, so new or edited audits are searchable without a
+rebuild.
+"""
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+from qa_scorecard.data_store import audits_dataset, is_audit_dataset, load_audits, store
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_MAX_PREFIX = "\uffff"
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower()) if isinstance(text, str) else []
+
+
+def _client_key(client_id):
+    if client_id is None or client_id != client_id:  # None or NaN
+        return ""
+    return str(client_id).strip().lower()
+
+
+class AuditSearchIndex:
+    """Client-ID prefix index plus an inverted index over comment tokens"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(set)
+        self._vocabulary = []  # sorted tokens, for prefix expansion
+        self._doc_tokens = {}
+        self._client_keys = []  # sorted (client_id, audit id)
+        self._doc_client = {}
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def add(self, audit_id, client_id, comments):
+        with self._lock:
+            self.remove(audit_id)
+            tokens = set(tokenize(comments))
+            for token in tokens:
+                postings = self._postings[token]
+                if not postings:
+                    insort(self._vocabulary, token)
+                postings.add(audit_id)
+            self._doc_tokens[audit_id] = tokens
+            client_key = (_client_key(client_id), audit_id)
+            insort(self._client_keys, client_key)
+            self._doc_client[audit_id] = client_key
+
+    def remove(self, audit_id):
+        with self._lock:
+            for token in self._doc_tokens.pop(audit_id, ()):
+                postings = self._postings[token]
+                postings.discard(audit_id)
+                if not postings:
+                    del self._postings[token]
+                    del self._vocabulary[bisect_left(self._vocabulary, token)]
+            client_key = self._doc_client.pop(audit_id, None)
+            if client_key is not None:
+                del self._client_keys[bisect_left(self._client_keys, client_key)]
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Bulk-build an index, sorting once instead of inserting row by row"""
+        index = cls()
+        if frame is None or frame.empty:
+            return index
+        comments = frame["comments"] if "comments" in frame.columns else [None] * len(frame)
+        for audit_id, client_id, text in zip(frame["id"], frame["client_id"], comments):
+            tokens = set(tokenize(text))
+            for token in tokens:
+                index._postings[token].add(audit_id)
+            index._doc_tokens[audit_id] = tokens
+            index._doc_client[audit_id] = (_client_key(client_id), audit_id)
+        index._vocabulary = sorted(index._postings)
+        index._client_keys = sorted(index._doc_client.values())
+        return index
+
+    def add_frame(self, frame):
+        if frame is None or frame.empty:
+            return
+        comments = frame["comments"] if "comments" in frame.columns else [None] * len(frame)
+        for audit_id, client_id, text in zip(frame["id"], frame["client_id"], comments):
+            self.add(audit_id, client_id, text)
+
+    def client_prefix(self, prefix):
+        """Audit ids whose client ID starts with ``prefix``"""
+        prefix = prefix.strip().lower()
+        with self._lock:
+            lo = bisect_left(self._client_keys, (prefix,))
+            hi = bisect_right(self._client_keys, (prefix + _MAX_PREFIX,))
+            return {audit_id for _, audit_id in self._client_keys[lo:hi]}
+
+    def _token_prefix(self, prefix):
+        lo = bisect_left(self._vocabulary, prefix)
+        hi = bisect_right(self._vocabulary, prefix + _MAX_PREFIX)
+        matches = set()
+        for token in self._vocabulary[lo:hi]:
+            matches |= self._postings[token]
+        return matches
+
+    def comment_search(self, query):
+        """Audit ids whose comments contain every query token (last one as a prefix)"""
+        tokens = tokenize(query)
+        if not tokens:
+            return set()
+        with self._lock:
+            *exact, last = tokens
+            candidate_sets = [self._postings.get(t, set()) for t in exact]
+            candidate_sets.append(self._token_prefix(last))
+            candidate_sets.sort(key=len)
+            result = set(candidate_sets[0])
+            for postings in candidate_sets[1:]:
+                if not result:
+                    break
+                result &= postings
+            return result
+
+    def search(self, query):
+        """Client-ID prefix matches plus comment matches for a free-text query"""
+        query = query.strip()
+        if not query:
+            return set()
+        ids = self.comment_search(query)
+        if " " not in query:
+            ids |= self.client_prefix(query)
+        return ids
+
+
+# =================== SHARED INDEXES ===================
+_indexes = {}  # dataset -> index
+_index_lock = threading.Lock()
+
+
+def _on_store_change(name, previous, current):
+    if not is_audit_dataset(name):
+        return
+    with _index_lock:
+        index = _indexes.get(name)
+        if index is None:
+            return
+        if previous is None:
+            del _indexes[name]  # invalidated; rebuild from the next load
+            return
+        for audit_id in previous["id"] if "id" in previous.columns else ():
+            index.remove(audit_id)
+        index.add_frame(current)
+
+
+store.subscribe(_on_store_change)
+
+
+def get_search_index(department=None):
+    """The shared index of all audits (or one department's), built from the data store on first use"""
+    dataset = audits_dataset(department)
+    with _index_lock:
+        index = _indexes.get(dataset)
+        if index is None:
+            index = _indexes[dataset] = AuditSearchIndex.from_frame(load_audits(department))
+        return index
+
+
+def search_audits(query, limit=None, department=None):
+    """Matching audits (of ``department``, if given) from the shared data store, newest first"""
+    ids = get_search_index(department).search(query)
+    frame = load_audits(department)
+    if not ids or frame.empty:
+        return frame.iloc[0:0]
+    matches = frame[frame["id"].isin(ids)]
+    return matches.head(limit) if limit else matches
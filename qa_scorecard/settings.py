@@ -0,0 +1,42 @@
+"""Application settings persisted on the server, shared by all sessions."""
+import json
+import os
+import threading
+from pathlib import Path
+
+STATE_DIR = Path(os.environ.get("QA_STATE_DIR", Path(__file__).resolve().parent.parent / ".qa_state"))
+SETTINGS_PATH = STATE_DIR / "settings.json"
+
+DEFAULT_SETTINGS = {
+    "notifications": True,
+    "auto_refresh": False,
+    "refresh_interval": 5,  # minutes
+    "theme": "Light",
+    "timezone": "UTC",
+    "archive_after_days": 365,  # older audits move to the Parquet archive
+}
+
+_lock = threading.Lock()
+
+
+def load_settings():
+    """Saved settings merged over the defaults"""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(SETTINGS_PATH, encoding="utf-8") as f:
+            settings.update(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return settings
+
+
+def save_settings(settings):
+    """Persist settings atomically so readers never see a half-written file"""
+    merged = {**load_settings(), **settings}
+    with _lock:
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = SETTINGS_PATH.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2)
+        os.replace(tmp_path, SETTINGS_PATH)
+    return merged
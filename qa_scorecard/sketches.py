@@ -0,0 +1,416 @@
+"""Mergeable sketches for instant, approximate overviews of large selections.
+
+Audits are partitioned by (department, team leader, month). Each partition
+holds its exact audit count plus:
+
+* a t-digest of scores (percentiles and the score distribution),
+* HyperLogLog counters of distinct clients and consultants,
+* a fixed-size random sample of (consultant, score), so the partitions act
+  as strata for stratified estimates of averages and leaderboards.
+
+All of these merge, so any department / team leader / month-range view is
+answered by combining a few hundred small partitions instead of scanning
+every audit. Estimates carry 95% error bars; the page replaces them with
+exact figures once a background computation finishes.
+
+The shared indexes follow the data store's row changes: only the
+partitions a changed audit leaves or joins are rebuilt, from their own
+audits, so a submit costs one month's sketches rather than every one.
+"""
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from qa_scorecard.data_store import audits_dataset, is_audit_dataset, load_audits, store
+
+SAMPLE_PER_PARTITION = 64
+HISTOGRAM_EDGES = np.linspace(0, 100, 21)
+Z_95 = 1.96
+
+
+# =================== T-DIGEST ===================
+class TDigest:
+    """Merging t-digest (k1 scale function) over float values.
+
+    Each centroid also keeps the lowest and highest value it absorbed and is
+    read as mass spread evenly over that range, so repeated values -- like
+    the zeros of critical failures -- stay exact point masses.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.lows = np.empty(0)
+        self.highs = np.empty(0)
+
+    @classmethod
+    def from_values(cls, values, compression=100):
+        digest = cls(compression)
+        values, counts = np.unique(np.asarray(values, dtype=float), return_counts=True)
+        if len(values):
+            digest._absorb(values, counts.astype(float), values, values)
+        return digest
+
+    @classmethod
+    def merged(cls, digests, compression=100):
+        """One digest over several, combined in a single pass"""
+        digest = cls(compression)
+        digests = [d for d in digests if len(d.means)]
+        if digests:
+            digest._absorb(*(np.concatenate([getattr(d, a) for d in digests])
+                             for a in ("means", "weights", "lows", "highs")))
+        return digest
+
+    @property
+    def total(self):
+        return float(self.weights.sum())
+
+    def merge(self, other):
+        if len(other.means):
+            self._absorb(other.means, other.weights, other.lows, other.highs)
+        return self
+
+    def _absorb(self, means, weights, lows, highs):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        lows = np.concatenate([self.lows, lows])
+        highs = np.concatenate([self.highs, highs])
+        # Coalesce point masses of the same value so a heavy one stays a single centroid
+        point = lows == highs
+        values, inverse = np.unique(means[point], return_inverse=True)
+        point_weights = np.bincount(inverse, weights=weights[point], minlength=len(values))
+        means = np.concatenate([values, means[~point]])
+        weights = np.concatenate([point_weights, weights[~point]])
+        lows = np.concatenate([values, lows[~point]])
+        highs = np.concatenate([values, highs[~point]])
+        order = np.argsort(means, kind="stable")
+        means, weights, lows, highs = means[order], weights[order], lows[order], highs[order]
+        starts = self._group_starts(weights)
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+        self.lows = np.minimum.reduceat(lows, starts)
+        self.highs = np.maximum.reduceat(highs, starts)
+
+    def _group_starts(self, weights):
+        """Greedily group sorted centroids so each group spans at most one unit of the scale function"""
+        scale = self.compression / (2 * math.pi)
+        total = weights.sum()
+        starts = [0]
+        q_limit = (math.sin(1 / scale - math.pi / 2) + 1) / 2  # quantile one unit above q=0
+        so_far = 0.0
+        for i, weight in enumerate(weights.tolist()):
+            so_far += weight
+            if i > starts[-1] and so_far / total > q_limit:
+                starts.append(i)
+                q_start = (so_far - weight) / total
+                q_limit = (math.sin(min(math.asin(2 * q_start - 1) + 1 / scale, math.pi / 2)) + 1) / 2
+        return np.array(starts)
+
+    def quantile(self, q):
+        if not len(self.means):
+            return float("nan")
+        cumulative = np.cumsum(self.weights)
+        target = q * cumulative[-1]
+        i = min(int(np.searchsorted(cumulative, target)), len(cumulative) - 1)
+        share = (target - (cumulative[i] - self.weights[i])) / self.weights[i]
+        return float(self.lows[i] + share * (self.highs[i] - self.lows[i]))
+
+    def cdf(self, x, inclusive=True):
+        """Share of values at or below ``x`` (strictly below unless ``inclusive``); vectorized"""
+        x = np.asarray(x, dtype=float)
+        if not len(self.means):
+            return np.zeros_like(x)
+        x = x[..., None]
+        span = self.highs - self.lows
+        point = (x >= self.lows) if inclusive else (x > self.lows)
+        spread = np.clip((x - self.lows) / np.where(span > 0, span, 1), 0, 1)
+        share = np.where(span > 0, spread, point)
+        return (share * self.weights).sum(axis=-1) / self.total
+
+    def histogram(self, edges):
+        """Counts per bin, half-open like ``np.histogram`` (the last bin includes its top edge)"""
+        below = np.append(self.cdf(edges[:-1], inclusive=False), self.cdf(edges[-1]))
+        return np.diff(below) * self.total
+
+
+# =================== HYPERLOGLOG ===================
+def hash_values(values):
+    """64-bit hashes of values (as strings), ignoring missing ones"""
+    values = pd.Series(values).dropna().astype(str)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(values):
+    length = np.zeros(len(values), dtype=np.int64)
+    values = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (np.uint64(1) << np.uint64(shift))
+        length[high] += shift
+        values[high] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+class HyperLogLog:
+    """Distinct-count sketch with 2**p registers (about 1.6% error at p=12)"""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    @classmethod
+    def from_hashes(cls, hashes, p=12):
+        sketch = cls(p)
+        sketch.add_hashes(hashes)
+        return sketch
+
+    def add(self, values):
+        self.add_hashes(hash_values(values))
+
+    def add_hashes(self, hashes):
+        if not len(hashes):
+            return
+        p = np.uint64(self.p)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))  # guard bit bounds the run
+        rank = (65 - _bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(float)))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small cardinalities
+        return raw
+
+
+# =================== PARTITIONS ===================
+class Partition:
+    """Sketches for the audits of one department, team leader and month"""
+
+    __slots__ = ("count", "digest", "clients", "consultants", "sample_scores", "sample_consultants", "ids")
+
+
+def _partition_keys(frame):
+    """Row-aligned ``department``, ``team_leader`` and ``month`` partition columns"""
+    department = frame["department"].fillna("Not Assigned").to_numpy() if "department" in frame.columns \
+        else np.full(len(frame), "Not Assigned", dtype=object)
+    return pd.DataFrame({
+        "department": department,
+        "team_leader": frame["team_leader"].to_numpy(),
+        "month": frame["audit_date"].astype(str).str[:7].to_numpy(),  # ISO dates: "YYYY-MM"
+    })
+
+
+def _column_hashes(frame, column):
+    """Row-aligned hashes of ``column`` and a mask of the rows that have a value"""
+    if column not in frame.columns:
+        return np.zeros(len(frame), dtype=np.uint64), np.zeros(len(frame), dtype=bool)
+    present = frame[column].notna().to_numpy()
+    hashes = np.zeros(len(frame), dtype=np.uint64)
+    hashes[present] = hash_values(frame[column])
+    return hashes, present
+
+
+class SketchIndex:
+    """Every partition's sketches, and estimates over any selection of them"""
+
+    def __init__(self):
+        self.partitions = {}
+
+    @classmethod
+    def from_frame(cls, frame, seed=0):
+        index = cls()
+        if frame.empty:
+            return index
+        rng = np.random.default_rng(seed)
+        ids = frame["id"].to_numpy() if "id" in frame.columns else np.arange(len(frame))
+        scores = pd.to_numeric(frame["score"], errors="coerce").fillna(0.0).to_numpy()
+        consultants = frame["consultant"].to_numpy()
+        # Hash once; missing values get no hash and are never counted
+        consultant_hashes, has_consultant = _column_hashes(frame, "consultant")
+        client_hashes, has_client = _column_hashes(frame, "client_id")
+        keys = _partition_keys(frame)
+        for key, positions in keys.groupby(["department", "team_leader", "month"], dropna=False,
+                                           sort=False).indices.items():
+            part = Partition()
+            part.count = len(positions)
+            part.digest = TDigest.from_values(scores[positions])
+            part.clients = HyperLogLog.from_hashes(client_hashes[positions[has_client[positions]]])
+            part.consultants = HyperLogLog.from_hashes(consultant_hashes[positions[has_consultant[positions]]])
+            sample = rng.choice(positions, min(SAMPLE_PER_PARTITION, len(positions)), replace=False)
+            part.sample_scores = scores[sample]
+            part.sample_consultants = consultants[sample]
+            part.ids = ids[positions]
+            index.partitions[key] = part
+        return index
+
+    def apply_change(self, previous, current, frame, seed=0):
+        """Rebuild just the partitions ``previous`` audits left and ``current`` ones joined.
+
+        ``frame`` is the dataset after the change; the partitions' other
+        audits are taken from it by id.
+        """
+        touched = set()
+        changed = []
+        for rows in (previous, current):
+            if rows is not None and not rows.empty:
+                touched.update(_partition_keys(rows).itertuples(index=False, name=None))
+                changed.append(rows["id"].to_numpy())
+        if not touched:
+            return
+        changed = np.concatenate(changed)
+        members = [changed]
+        for key in touched:
+            part = self.partitions.pop(key, None)
+            if part is not None:
+                members.append(part.ids)
+        # Changed audits that now live elsewhere land in their own (touched) partitions
+        rows = frame[frame["id"].isin(np.concatenate(members))]
+        self.partitions.update(SketchIndex.from_frame(rows, seed).partitions)
+
+    def select(self, department=None, team_leader=None, start_month=None, end_month=None):
+        return [
+            part for (dept, team, month), part in self.partitions.items()
+            if (department is None or dept == department)
+            and (team_leader is None or team == team_leader)
+            and (start_month is None or month >= start_month)
+            and (end_month is None or month <= end_month)
+        ]
+
+    def estimate(self, department=None, team_leader=None, start_date=None, end_date=None):
+        """Approximate overview of a selection (months overlapping the dates are included)"""
+        parts = self.select(
+            department, team_leader,
+            start_date.strftime("%Y-%m") if start_date else None,
+            end_date.strftime("%Y-%m") if end_date else None,
+        )
+        return _estimate(parts)
+
+
+def _estimate(parts):
+    total = sum(p.count for p in parts)
+    digest = TDigest.merged([p.digest for p in parts])
+    clients, consultants = HyperLogLog(), HyperLogLog()
+    for part in parts:
+        clients.merge(part.clients)
+        consultants.merge(part.consultants)
+
+    # Stratified mean: each partition is a stratum weighted by its true size
+    mean, variance = 0.0, 0.0
+    for part in parts:
+        n = len(part.sample_scores)
+        if not n:
+            continue
+        w = part.count / total
+        mean += w * part.sample_scores.mean()
+        if n > 1 and n < part.count:
+            variance += w * w * (1 - n / part.count) * part.sample_scores.var(ddof=1) / n
+
+    return {
+        "exact": False,
+        "count": total,
+        "mean": mean if total else float("nan"),
+        "mean_error": Z_95 * math.sqrt(variance),
+        "percentiles": {q: digest.quantile(q / 100) for q in (10, 50, 90)},
+        "histogram": digest.histogram(HISTOGRAM_EDGES),
+        "clients": clients.estimate(),
+        "clients_error": Z_95 * clients.relative_error * clients.estimate(),
+        "consultants": consultants.estimate(),
+        "consultants_error": Z_95 * consultants.relative_error * consultants.estimate(),
+        "leaderboard": _sample_leaderboard(parts),
+    }
+
+
+def _sample_leaderboard(parts):
+    """Per-consultant weighted sample means with approximate 95% error bars"""
+    parts = [p for p in parts if len(p.sample_scores)]
+    if not parts:
+        return pd.DataFrame(columns=["Consultant", "Avg Score", "±", "Audits"])
+    sample = pd.DataFrame({
+        "consultant": np.concatenate([p.sample_consultants for p in parts]),
+        "score": np.concatenate([p.sample_scores for p in parts]),
+        "w": np.concatenate([np.full(len(p.sample_scores), p.count / len(p.sample_scores)) for p in parts]),
+    })
+    sample["wy"] = sample["w"] * sample["score"]
+    sample["w2"] = sample["w"] ** 2
+    grouped = sample.groupby("consultant")
+    sums = grouped[["w", "wy", "w2"]].sum()
+    mean = sums["wy"] / sums["w"]
+    sample["dev2"] = sample["w"] * (sample["score"] - sample["consultant"].map(mean)) ** 2
+    spread = np.sqrt(grouped["dev2"].sum() / sums["w"])
+    effective_n = sums["w"] ** 2 / sums["w2"]
+    board = pd.DataFrame({
+        "Consultant": sums.index,
+        "Avg Score": mean.round(1).to_numpy(),
+        "±": (Z_95 * spread / np.sqrt(effective_n)).round(1).to_numpy(),
+        "Audits": sums["w"].round().astype(int).to_numpy(),  # estimated
+    })
+    return board.sort_values("Avg Score", ascending=False).reset_index(drop=True)
+
+
+def exact_overview(frame):
+    """The same overview as ``SketchIndex.estimate``, computed exactly from audit rows"""
+    scores = pd.to_numeric(frame["score"], errors="coerce").dropna().to_numpy()
+    counts, _ = np.histogram(scores, bins=HISTOGRAM_EDGES)
+    board = frame.groupby("consultant")["score"].agg(["mean", "count"]).reset_index()
+    board.columns = ["Consultant", "Avg Score", "Audits"]
+    board["Avg Score"] = board["Avg Score"].round(1)
+    board.insert(2, "±", 0.0)
+    return {
+        "exact": True,
+        "count": len(frame),
+        "mean": float(scores.mean()) if len(scores) else float("nan"),
+        "mean_error": 0.0,
+        "percentiles": {q: float(np.percentile(scores, q)) if len(scores) else float("nan") for q in (10, 50, 90)},
+        "histogram": counts.astype(float),
+        "clients": frame["client_id"].nunique() if "client_id" in frame.columns else 0,
+        "clients_error": 0.0,
+        "consultants": frame["consultant"].nunique(),
+        "consultants_error": 0.0,
+        "leaderboard": board.sort_values("Avg Score", ascending=False).reset_index(drop=True),
+    }
+
+
+# =================== SHARED INDEX ===================
+_indexes = {}  # dataset -> index
+_index_lock = threading.Lock()
+
+
+def _on_store_change(name, previous, current):
+    if not is_audit_dataset(name):
+        return
+    with _index_lock:
+        index = _indexes.get(name)
+        if index is None:
+            return
+        frame = store.peek(name)
+        if previous is None or frame is None or "id" not in frame.columns:
+            del _indexes[name]  # invalidated; rebuilt from the next load
+            return
+        index.apply_change(previous, current, frame)
+
+
+store.subscribe(_on_store_change)
+
+
+def get_sketch_index(department=None):
+    """Shared partition sketches of all audits (or one department's), built on first use and kept current"""
+    dataset = audits_dataset(department)
+    with _index_lock:
+        index = _indexes.get(dataset)
+        if index is None:
+            index = _indexes[dataset] = SketchIndex.from_frame(load_audits(department))
+        return index
@@ -0,0 +1,194 @@
+"""Pre-rendered executive snapshots of the organisation-wide dashboard.
+
+A snapshot is one self-contained HTML file: the unfiltered Analytics
+headline metrics, score trend, score distribution, department comparison
+and question pass rates, with the Plotly library and every chart's data
+embedded, so it opens offline and viewing it runs no queries. Generate one
+(or keep generating on a schedule) with:
+
+    python -m qa_scorecard.snapshots [--every 60] [--out DIR]
+
+Snapshots are written atomically to ``SNAPSHOT_DIR``; ``latest.html`` is
+always the newest, and only the newest ``KEEP_SNAPSHOTS`` timestamped files
+are kept.
+"""
+import argparse
+import html
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from qa_scorecard.aggregates import aggregate
+from qa_scorecard.data_store import fetch_all_audits
+from qa_scorecard.settings import STATE_DIR
+
+SNAPSHOT_DIR = Path(os.environ.get("QA_SNAPSHOT_DIR", STATE_DIR / "snapshots"))
+LATEST_NAME = "latest.html"
+KEEP_SNAPSHOTS = 48
+HISTOGRAM_BINS = np.linspace(0, 100, 21)
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>QA Scorecard - Executive Snapshot</title>
+<style>
+body {{ font-family: "Source Sans Pro", Arial, sans-serif; margin: 24px; color: #31333f; }}
+.metrics {{ display: flex; gap: 16px; flex-wrap: wrap; margin: 16px 0 24px; }}
+.metric {{ flex: 1 1 160px; border: 1px solid #e6e9ef; border-radius: 8px; padding: 12px 16px; }}
+.metric .label {{ font-size: 14px; color: #6b6f7b; }}
+.metric .value {{ font-size: 32px; font-weight: 600; }}
+.charts {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(480px, 1fr)); gap: 16px; }}
+.caption {{ color: #6b6f7b; font-size: 14px; }}
+</style>
+</head>
+<body>
+<h1>📊 QA Scorecard - Executive Snapshot</h1>
+<p class="caption">All audits as of {generated} UTC ({count} audits). Pre-rendered; figures do not update until the next snapshot.</p>
+<div class="metrics">{metrics}</div>
+<div class="charts">{charts}</div>
+</body>
+</html>
+"""
+
+
+# =================== FIGURES ===================
+def _trend_figure(frame):
+    dates = pd.to_datetime(frame["audit_date"], format="ISO8601").dt.date
+    daily = frame["score"].groupby(dates).mean().rename_axis("date").reset_index()
+    daily["7_day_avg"] = daily["score"].rolling(window=7, min_periods=1).mean()
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=daily["date"], y=daily["score"].round(2), mode="lines+markers",
+                             name="Daily Score", line=dict(color="royalblue", width=2)))
+    fig.add_trace(go.Scatter(x=daily["date"], y=daily["7_day_avg"].round(2), mode="lines",
+                             name="7-Day Average", line=dict(color="firebrick", width=3, dash="dash")))
+    fig.update_layout(title="📈 Performance Trend", xaxis_title="Date", yaxis_title="Average Score (%)",
+                      height=400, hovermode="x unified")
+    return fig
+
+
+def _distribution_figure(frame):
+    # Binned here so the file carries 20 bars rather than every score
+    counts, edges = np.histogram(pd.to_numeric(frame["score"], errors="coerce").dropna(), bins=HISTOGRAM_BINS)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges) * 0.9,
+                           marker_color="lightseagreen"))
+    fig.update_layout(title="📊 Score Distribution", xaxis_title="Score (%)", yaxis_title="Number of Audits",
+                      height=400, xaxis_range=[0, 100])
+    return fig
+
+
+def _department_figure(sums):
+    dept_stats = sums.group_table("department", "Department")
+    fig = go.Figure(go.Bar(x=dept_stats["Avg Score"], y=dept_stats["Department"], orientation="h",
+                           text=dept_stats["Avg Score"].astype(str) + "%", textposition="outside",
+                           marker_color="cornflowerblue"))
+    fig.update_layout(title="📋 Department Performance", xaxis_title="Average Score (%)",
+                      yaxis_title="Department", height=400)
+    return fig
+
+
+def _question_figure(sums):
+    rates = pd.Series(sums.question_pass_rates()).round(1).sort_values()
+    fig = go.Figure(go.Bar(x=rates.to_numpy(), y=[q.upper() for q in rates.index], orientation="h",
+                           text=rates.astype(str) + "%", textposition="outside", marker_color="#4ecdc4"))
+    fig.update_layout(title="❓ Question Performance", xaxis_title="Pass Rate (%)", yaxis_title="Question",
+                      height=400)
+    return fig
+
+
+# =================== RENDERING ===================
+def render_snapshot(frame, generated_at=None):
+    """The snapshot HTML for an audits frame"""
+    generated_at = generated_at or datetime.now(timezone.utc)
+    sums = aggregate(frame)
+    metrics = {"Total Audits": f"{sums.count:,}"}
+    if sums.count:
+        metrics.update({
+            "Average Score": f"{sums.mean:.1f}%",
+            "Critical Failures": f"{sums.critical_failures:,}",
+            "Pass Rate": f"{100 - sums.critical_failure_rate:.1f}%",
+        })
+    metric_html = "".join(
+        f'<div class="metric"><div class="label">{html.escape(label)}</div>'
+        f'<div class="value">{html.escape(value)}</div></div>'
+        for label, value in metrics.items()
+    )
+
+    figures = []
+    if sums.count:
+        if sums.count >= 2:
+            figures.append(_trend_figure(frame))
+        figures.append(_distribution_figure(frame))
+        if len(sums.group_means("department")) > 1:
+            figures.append(_department_figure(sums))
+        if sums.question_pass_rates():
+            figures.append(_question_figure(sums))
+    # The first chart carries the Plotly library inline so the file works offline
+    charts = "".join(
+        f"<div>{fig.to_html(full_html=False, include_plotlyjs=(i == 0), config={'displaylogo': False})}</div>"
+        for i, fig in enumerate(figures)
+    )
+    return _PAGE.format(generated=f"{generated_at:%Y-%m-%d %H:%M}", count=f"{sums.count:,}",
+                        metrics=metric_html, charts=charts)
+
+
+def write_snapshot(page, out_dir=None, generated_at=None):
+    """Store a rendered snapshot and make it the latest; returns its path"""
+    out_dir = Path(out_dir or SNAPSHOT_DIR)
+    generated_at = generated_at or datetime.now(timezone.utc)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"executive_{generated_at:%Y%m%d-%H%M%S}.html"
+    for target in (path, out_dir / LATEST_NAME):
+        tmp_path = target.with_suffix(".tmp")
+        tmp_path.write_text(page, encoding="utf-8")
+        os.replace(tmp_path, target)
+    for old in sorted(out_dir.glob("executive_*.html"))[:-KEEP_SNAPSHOTS]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def latest_snapshot(out_dir=None):
+    """``(path, generated_at)`` of the newest snapshot, or None before the first one"""
+    path = Path(out_dir or SNAPSHOT_DIR) / LATEST_NAME
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    return path, datetime.fromtimestamp(mtime, timezone.utc)
+
+
+# =================== JOB ===================
+def run(out_dir=None, client=None, log=print):
+    """Fetch every hot audit and write a fresh snapshot"""
+    started = time.monotonic()
+    frame = fetch_all_audits(client)
+    generated_at = datetime.now(timezone.utc)
+    path = write_snapshot(render_snapshot(frame, generated_at), out_dir, generated_at)
+    log(f"Snapshot of {len(frame)} audits written to {path} in {time.monotonic() - started:.1f}s")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the executive dashboard to a static HTML snapshot.")
+    parser.add_argument("--out", help=f"directory for snapshots (default {SNAPSHOT_DIR})")
+    parser.add_argument("--every", type=float, help="keep running, taking a snapshot every this many minutes")
+    args = parser.parse_args(argv)
+    while True:
+        try:
+            run(args.out)
+        except Exception as e:
+            if args.every is None:
+                raise
+            print(f"Snapshot failed: {e}")
+        if args.every is None:
+            return
+        time.sleep(args.every * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Sorted time index with prefix sums for instant date-range metrics.
+
+For every group the rollups know about (organisation, department, team
+leader, consultant and the pairs) the index keeps the group's audit
+timestamps in sorted order alongside cumulative sums of scores and critical
+failures, plus per-day cumulative Yes and NA counts for each question. Any
+date range is then two binary searches and a subtraction, so range metrics,
+the first-half/second-half trend and period-over-period comparisons cost
+O(log n) regardless of history size.
+
+The index is built (vectorized) once per dataset and shared by all
+sessions. Afterwards it follows the data store's row changes: each changed
+audit is swapped in or out of just its groups' series, and their prefix
+sums are recomputed only from the first changed audit onwards, so a new
+audit (usually the latest) costs little however long the history is.
+Pages read the index without a lock, so a change never edits a series in
+place: the new series and group map are built aside and swapped in with a
+single assignment.
+"""
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from qa_scorecard.answer_masks import ALL_QUESTIONS, pack_frame, question_mask
+from qa_scorecard.data_store import audits_dataset, is_audit_dataset, load_audits, store
+from qa_scorecard.rollups import GROUP_LEVELS, QUESTION_COLUMNS, scope_key
+from qa_scorecard.scorecards import COMMON_CRITICAL_COLUMNS
+
+PERIODS = {
+    "Week over Week": 7,
+    "Month over Month": 30,
+    "Quarter over Quarter": 91,
+}
+
+_NS_PER_DAY = 86_400 * 10**9
+_CRITICAL_MASK = question_mask(c[1:] for c in COMMON_CRITICAL_COLUMNS)
+_ROW_FIELDS = {"ids": "_id", "ts": "_ts", "score": "_score", "critical": "_critical", "yes": "_yes", "na": "_na"}
+_PREFIX_FIELDS = ("score_cs", "critical_cs", "days", "yes_cs", "na_cs")
+
+
+class RangeStats:
+    """Aggregates for one group and date range, shaped like ``RunningStats``"""
+
+    __slots__ = ("count", "total", "critical_failures", "_yes", "_na")
+
+    def __init__(self, count, total, critical_failures, yes, na):
+        self.count = count
+        self.total = total
+        self.critical_failures = critical_failures
+        self._yes = yes
+        self._na = na
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float("nan")
+
+    @property
+    def pass_rate(self):
+        return (self.count - self.critical_failures) / self.count * 100 if self.count else 0.0
+
+    def question_pass_rate(self, q):
+        i = QUESTION_COLUMNS.index(q)
+        answered = self.count - self._na[i]
+        return self._yes[i] / answered * 100 if answered > 0 else None
+
+
+class _Series:
+    """One group's audits, oldest first, with their prefix sums"""
+
+    __slots__ = (*_ROW_FIELDS, *_PREFIX_FIELDS)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Series over time-sorted ``_rows`` output"""
+        series = cls()
+        for field, column in _ROW_FIELDS.items():
+            setattr(series, field, rows[column].to_numpy())
+        series.score_cs = np.zeros(1)
+        series.critical_cs = np.zeros(1, dtype=np.int64)
+        series.days = np.zeros(0, dtype=np.int64)
+        series.yes_cs = series.na_cs = np.zeros((1, len(QUESTION_COLUMNS)), dtype=np.int64)
+        series._resum(np.iinfo(np.int64).min)
+        return series
+
+    def apply(self, remove_ids, rows):
+        """A new series without the audits in ``remove_ids`` and with ``rows`` (time-sorted ``_rows`` output).
+
+        This series is left as it is for readers still holding it. Removing
+        every incoming id first makes re-applying a change harmless.
+        """
+        gone = np.isin(self.ids, remove_ids)
+        incoming = rows["_ts"].to_numpy()
+        changed = np.concatenate([self.ts[gone], incoming])
+        if not len(changed):
+            return self
+        series = _Series()
+        at = np.searchsorted(self.ts[~gone], incoming, "right")
+        for field, column in _ROW_FIELDS.items():
+            setattr(series, field, np.insert(getattr(self, field)[~gone], at, rows[column].to_numpy()))
+        for field in _PREFIX_FIELDS:
+            setattr(series, field, getattr(self, field))  # _resum replaces, never edits, these arrays
+        series._resum(changed.min())
+        return series
+
+    def _resum(self, first_changed):
+        """Recompute the prefix sums from the first audit at or after ``first_changed`` (ns).
+
+        Audits before it are unchanged, so the sums up to there are kept.
+        """
+        lo = int(np.searchsorted(self.ts, first_changed, "left"))
+        self.score_cs = np.concatenate([self.score_cs[:lo + 1], self.score_cs[lo] + np.cumsum(self.score[lo:])])
+        self.critical_cs = np.concatenate([
+            self.critical_cs[:lo + 1], self.critical_cs[lo] + np.cumsum(self.critical[lo:], dtype=np.int64)
+        ])
+        # Per-day question counts restart at the first changed day
+        first_day = first_changed // _NS_PER_DAY
+        d = int(np.searchsorted(self.days, first_day, "left"))
+        day_start = max(int(first_day) * _NS_PER_DAY, int(np.iinfo(np.int64).min))
+        r = int(np.searchsorted(self.ts, day_start, "left"))
+        days, first = np.unique(self.ts[r:] // _NS_PER_DAY, return_index=True)
+        bits = np.arange(len(QUESTION_COLUMNS))
+        yes = (self.yes[r:, None].astype(np.int64) >> bits) & 1
+        na = (self.na[r:, None].astype(np.int64) >> bits) & 1
+        self.days = np.concatenate([self.days[:d], days])
+        for name, values in (("yes_cs", yes), ("na_cs", na)):
+            head = getattr(self, name)[:d + 1]
+            per_day = np.add.reduceat(values, first, axis=0) if len(first) else values[:0]
+            setattr(self, name, np.concatenate([head, head[-1] + np.cumsum(per_day, axis=0)]))
+
+    def _bounds(self, start_date, end_date):
+        lo = 0 if start_date is None else np.searchsorted(self.ts, _day_ns(start_date), "left")
+        hi = len(self.ts) if end_date is None else np.searchsorted(self.ts, _day_ns(end_date) + _NS_PER_DAY, "left")
+        return int(lo), int(max(lo, hi))
+
+    def range(self, start_date=None, end_date=None):
+        lo, hi = self._bounds(start_date, end_date)
+        d_lo = 0 if start_date is None else np.searchsorted(self.days, _day_number(start_date), "left")
+        d_hi = len(self.days) if end_date is None else np.searchsorted(self.days, _day_number(end_date) + 1, "left")
+        d_hi = max(d_lo, d_hi)
+        return RangeStats(
+            hi - lo,
+            float(self.score_cs[hi] - self.score_cs[lo]),
+            int(self.critical_cs[hi] - self.critical_cs[lo]),
+            self.yes_cs[d_hi] - self.yes_cs[d_lo],
+            self.na_cs[d_hi] - self.na_cs[d_lo],
+        )
+
+    def halves_trend(self, start_date=None, end_date=None):
+        """Mean of the later half of audits minus the earlier half, or None"""
+        lo, hi = self._bounds(start_date, end_date)
+        if hi - lo < 2:
+            return None
+        mid = lo + (hi - lo) // 2
+        first = (self.score_cs[mid] - self.score_cs[lo]) / (mid - lo)
+        second = (self.score_cs[hi] - self.score_cs[mid]) / (hi - mid)
+        return float(second - first)
+
+
+def _day_ns(day):
+    return pd.Timestamp(day).value
+
+
+def _day_number(day):
+    return pd.Timestamp(day).value // _NS_PER_DAY
+
+
+def _rows(frame):
+    """Per-audit values the series are built from, oldest first"""
+    ts = pd.to_datetime(frame["audit_date"], format="ISO8601", utc=True).dt.tz_localize(None)
+    yes, na = pack_frame(frame)
+    rows = pd.DataFrame({
+        "_id": frame["id"].to_numpy() if "id" in frame.columns else np.arange(len(frame)),
+        "_ts": ts.to_numpy(dtype="datetime64[ns]").astype(np.int64),
+        "_score": pd.to_numeric(frame["score"], errors="coerce").fillna(0.0).to_numpy(),
+        "_critical": ((~yes & ~na & _CRITICAL_MASK & ALL_QUESTIONS) != 0).astype(np.int64),
+        "_yes": yes.astype(np.uint16),
+        "_na": na.astype(np.uint16),
+        "department": frame["department"].fillna("Not Assigned").to_numpy()
+        if "department" in frame.columns else "Not Assigned",
+        "team_leader": frame["team_leader"].to_numpy(),
+        "consultant": frame["consultant"].to_numpy(),
+        "_all": "all",
+    })
+    return rows.sort_values("_ts", kind="stable", ignore_index=True)
+
+
+def _groups(rows):
+    """``(key, positions)`` of every group the rows belong to, positions ascending"""
+    for level, columns in GROUP_LEVELS.items():
+        for group, positions in rows.groupby(columns, dropna=False, sort=False).indices.items():
+            group = group if isinstance(group, tuple) else (group,)
+            yield ((level,) if level == "all" else (level, *group)), positions
+
+
+class TimeIndex:
+    """Prefix-sum series for every group"""
+
+    def __init__(self):
+        self.series = {}
+        self.min_date = None
+        self.max_date = None
+
+    @classmethod
+    def from_frame(cls, frame):
+        index = cls()
+        if frame.empty:
+            return index
+        rows = _rows(frame)
+        for key, positions in _groups(rows):
+            index.series[key] = _Series.from_rows(rows.iloc[positions])
+        index._update_bounds()
+        return index
+
+    def apply_change(self, previous, current):
+        """Swap ``previous`` audits (as they were) for ``current`` ones in just the groups they touch"""
+        old = _rows(previous) if previous is not None and not previous.empty else None
+        new = _rows(current) if current is not None and not current.empty else None
+        touched = {}
+        if old is not None:
+            for key, _ in _groups(old):
+                touched[key] = []
+        if new is not None:
+            for key, positions in _groups(new):
+                touched[key] = positions
+        if not touched:
+            return
+        remove = np.concatenate([r["_id"].to_numpy() for r in (old, new) if r is not None])
+        empty = (old if old is not None else new).iloc[0:0]
+        groups = dict(self.series)
+        for key, positions in touched.items():
+            added = new.iloc[positions] if len(positions) else empty
+            series = groups.get(key)
+            if series is None:
+                if len(added):
+                    groups[key] = _Series.from_rows(added)
+                continue
+            series = groups[key] = series.apply(remove, added)
+            if not len(series.ts):
+                del groups[key]
+        self.series = groups
+        self._update_bounds()
+
+    def _update_bounds(self):
+        overall = self.series.get(("all",))
+        if overall is None:
+            self.min_date = self.max_date = None
+            return
+        self.min_date = pd.Timestamp(overall.ts[0]).date()
+        self.max_date = pd.Timestamp(overall.ts[-1]).date()
+
+    def _series(self, department=None, team_leader=None, consultant=None):
+        return self.series.get(scope_key(department, team_leader, consultant))
+
+    def range_stats(self, start_date=None, end_date=None, **scope):
+        series = self._series(**scope)
+        if series is None:
+            return RangeStats(0, 0.0, 0, np.zeros(len(QUESTION_COLUMNS)), np.zeros(len(QUESTION_COLUMNS)))
+        return series.range(start_date, end_date)
+
+    def trend(self, start_date=None, end_date=None, **scope):
+        series = self._series(**scope)
+        return series.halves_trend(start_date, end_date) if series is not None else None
+
+    def period_comparison(self, level, days, end_date, department=None, team_leader=None):
+        """Trailing ``days`` ending at ``end_date`` vs the ``days`` before, per group"""
+        current_start = end_date - timedelta(days=days - 1)
+        previous_end = current_start - timedelta(days=1)
+        previous_start = previous_end - timedelta(days=days - 1)
+        label = {"team_leader": "Team Leader", "consultant": "Consultant"}[level]
+        records = []
+        for key, series in self.series.items():
+            name = _member(key, level, department, team_leader)
+            if name is None:
+                continue
+            current = series.range(current_start, end_date)
+            previous = series.range(previous_start, previous_end)
+            if current.count == 0 and previous.count == 0:
+                continue
+            records.append({
+                label: name,
+                "Current Avg": round(current.mean, 1) if current.count else None,
+                "Previous Avg": round(previous.mean, 1) if previous.count else None,
+                "Change": round(current.mean - previous.mean, 1) if current.count and previous.count else None,
+                "Current Audits": current.count,
+                "Previous Audits": previous.count,
+            })
+        frame = pd.DataFrame(records, columns=[label, "Current Avg", "Previous Avg", "Change",
+                                               "Current Audits", "Previous Audits"])
+        return frame.sort_values("Change", na_position="last").reset_index(drop=True)
+
+
+def _member(key, level, department, team_leader):
+    """Name of the team leader / consultant ``key`` describes within the scope, if any"""
+    if level == "team_leader":
+        if department:
+            return key[2] if key[0] == "department_team" and key[1] == department else None
+        return key[1] if key[0] == "team_leader" else None
+    if team_leader:
+        return key[2] if key[0] == "team_consultant" and key[1] == team_leader else None
+    if department:
+        return key[2] if key[0] == "department_consultant" and key[1] == department else None
+    return key[1] if key[0] == "consultant" else None
+
+
+# =================== SHARED INDEX ===================
+_indexes = {}  # dataset -> index
+_index_lock = threading.Lock()
+
+
+def _on_store_change(name, previous, current):
+    if not is_audit_dataset(name):
+        return
+    with _index_lock:
+        index = _indexes.get(name)
+        if index is None:
+            return
+        if previous is None:
+            del _indexes[name]  # invalidated; rebuilt from the next load
+            return
+        index.apply_change(previous, current)
+
+
+store.subscribe(_on_store_change)
+
+
+def get_time_index(department=None):
+    """The shared index of all audits (or one department's), built on first use and kept current"""
+    dataset = audits_dataset(department)
+    with _index_lock:
+        index = _indexes.get(dataset)
+        if index is None:
+            index = _indexes[dataset] = TimeIndex.from_frame(load_audits(department))
+        return index
@@ -0,0 +1,41 @@
+"""Streamlit helpers shared by the dashboard pages."""
+import streamlit as st
+
+from qa_scorecard.change_feed import ensure_change_feed, stop_change_feed
+from qa_scorecard.data_store import AUDITS, store
+from qa_scorecard.settings import load_settings
+
+# How often an open page checks the in-memory store version. This never
+# touches the backend; only the shared change feed does.
+LIVE_CHECK_SECONDS = 15
+
+
+def apply_refresh_settings(settings):
+    """Start, retune or stop the shared change feed to match saved settings"""
+    if settings["auto_refresh"]:
+        ensure_change_feed(settings["refresh_interval"] * 60)
+    else:
+        stop_change_feed()
+
+
+def live_updates(dataset=AUDITS):
+    """Rerun the current page whenever the change feed applies new audits to ``dataset``"""
+    settings = load_settings()
+    if not settings["auto_refresh"]:
+        return
+    apply_refresh_settings(settings)
+    st.session_state["_rendered_audits_version"] = store.version(dataset)
+
+    @st.fragment(run_every=LIVE_CHECK_SECONDS)
+    def _watch_store():
+        if store.version(dataset) != st.session_state.get("_rendered_audits_version"):
+            st.rerun()
+
+    _watch_store()
+
+
+def stale_data_notice(dataset=AUDITS):
+    """Warn that the audits shown are the last ones loaded because the backend is degraded"""
+    if store.is_stale(dataset):
+        st.warning("⚠️ The database is not responding, so this page shows the last audits loaded. "
+                   "It will refresh automatically once the database recovers.")
@@ -0,0 +1,17 @@
+-- Change-feed cursor for auto-refresh: every insert/update stamps updated_at.
+alter table audits add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists audits_updated_at_id_idx on audits (updated_at, id);
+
+create or replace function set_updated_at() returns trigger
+language plpgsql as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$;
+
+drop trigger if exists audits_set_updated_at on audits;
+create trigger audits_set_updated_at
+    before update on audits
+    for each row execute function set_updated_at();
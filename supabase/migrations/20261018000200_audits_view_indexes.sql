@@ -0,0 +1,16 @@
+-- Indexes backing the paged View Audits grid: every sortable column gets an
+-- (column, id) index so ORDER BY ... LIMIT/OFFSET walks an index, and the
+-- filter columns are indexed for the equality predicates.
+create extension if not exists pg_trgm;
+
+create index if not exists audits_audit_date_id_idx on audits (audit_date, id);
+create index if not exists audits_score_id_idx on audits (score, id);
+create index if not exists audits_consultant_id_idx on audits (consultant, id);
+create index if not exists audits_team_leader_id_idx on audits (team_leader, id);
+create index if not exists audits_department_id_idx on audits (department, id);
+create index if not exists audits_client_id_id_idx on audits (client_id, id);
+
+-- Substring search (ILIKE '%term%') on the searchable text columns
+create index if not exists audits_client_id_trgm_idx on audits using gin (client_id gin_trgm_ops);
+create index if not exists audits_consultant_trgm_idx on audits using gin (consultant gin_trgm_ops);
+create index if not exists audits_comments_trgm_idx on audits using gin (comments gin_trgm_ops);
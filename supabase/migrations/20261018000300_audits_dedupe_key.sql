@@ -0,0 +1,30 @@
+-- One row per (consultant, client, audit minute). The key is computed by
+-- qa_scorecard.dedupe.dedupe_key on write; this backfills existing rows with
+-- the same normalization. Rows that are already duplicates keep a NULL key
+-- (only the lowest id of each group is keyed) so the unique index can be
+-- built; review them with: select * from audits where dedupe_key is null;
+set timezone = 'UTC';
+
+alter table audits add column if not exists dedupe_key text;
+
+with keyed as (
+    select id,
+           md5(concat_ws('|',
+               lower(btrim(regexp_replace(coalesce(consultant, ''), '\s+', ' ', 'g'))),
+               lower(btrim(regexp_replace(coalesce(client_id::text, ''), '\s+', ' ', 'g'))),
+               to_char(audit_date, 'YYYY-MM-DD"T"HH24:MI')
+           )) as k
+    from audits
+    where dedupe_key is null
+), ranked as (
+    select id, k, row_number() over (partition by k order by id) as rn
+    from keyed
+)
+update audits a
+set dedupe_key = r.k
+from ranked r
+where a.id = r.id
+  and r.rn = 1
+  and not exists (select 1 from audits b where b.dedupe_key = r.k);
+
+create unique index if not exists audits_dedupe_key_key on audits (dedupe_key);
@@ -0,0 +1,25 @@
+-- Which scorecard rules each audit was scored under, the rules behind every
+-- version, and a set-based writer the re-score job uses for batched updates.
+alter table audits add column if not exists scorecard_version text;
+create index if not exists audits_scorecard_version_idx on audits (department, scorecard_version);
+
+create table if not exists scorecard_versions (
+    version text primary key,
+    department text not null,
+    critical_questions integer[] not null,
+    created_at timestamptz not null default now()
+);
+
+create or replace function apply_rescores(changes jsonb) returns integer
+language sql as $$
+    with c as (
+        select * from jsonb_to_recordset(changes) as x(id bigint, score numeric, scorecard_version text)
+    ), updated as (
+        update audits a
+        set score = c.score, scorecard_version = c.scorecard_version
+        from c
+        where a.id = c.id
+        returning 1
+    )
+    select count(*)::integer from updated;
+$$;
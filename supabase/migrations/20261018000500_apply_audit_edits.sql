@@ -0,0 +1,29 @@
+-- Batched, optimistically locked edits from the Data Management grid.
+--
+-- Each edit is {"id": ..., "updated_at": <the revision the editor saw>,
+-- "changes": {column: value, ...}}. Only rows still at that revision are
+-- updated, all in one statement; the updated rows are returned, so any id
+-- missing from the result was changed or deleted by someone else meanwhile.
+-- The audits_set_updated_at trigger stamps the new revision.
+create or replace function apply_audit_edits(edits jsonb) returns setof audits
+language sql as $$
+    with e as (
+        select (x->>'id')::bigint as id,
+               (x->>'updated_at')::timestamptz as expected,
+               x->'changes' as changes
+        from jsonb_array_elements(edits) as x
+    )
+    update audits a
+    set (consultant, client_id, audit_date, comments,
+         q1, q2, q3, q4, q5, q6, q7, q8, q9, q10, q11, q12,
+         score, scorecard_version, dedupe_key) = (
+        select r.consultant, r.client_id, r.audit_date, r.comments,
+               r.q1, r.q2, r.q3, r.q4, r.q5, r.q6, r.q7, r.q8, r.q9, r.q10, r.q11, r.q12,
+               r.score, r.scorecard_version, r.dedupe_key
+        from jsonb_populate_record(a, e.changes) as r
+    )
+    from e
+    where a.id = e.id
+      and a.updated_at = e.expected
+    returning a.*;
+$$;
@@ -0,0 +1,90 @@
+-- Bit-packed answers (see qa_scorecard.answer_masks): bit i-1 of yes_mask is
+-- set when q<i> is 'Yes', of na_mask when it is 'NA' or blank; neither means
+-- 'No'. The app reads the two masks instead of the twelve text columns.
+alter table audits add column if not exists yes_mask smallint;
+alter table audits add column if not exists na_mask smallint;
+
+create or replace function answer_yes_mask(answers text[]) returns smallint
+language sql immutable as $$
+    select coalesce(sum(1 << (i - 1)::integer), 0)::smallint
+    from unnest(answers) with ordinality as a(answer, i)
+    where answer = 'Yes';
+$$;
+
+create or replace function answer_na_mask(answers text[]) returns smallint
+language sql immutable as $$
+    select coalesce(sum(1 << (i - 1)::integer), 0)::smallint
+    from unnest(answers) with ordinality as a(answer, i)
+    where answer is distinct from 'Yes' and answer is distinct from 'No';
+$$;
+
+create or replace function answer_text(yes_mask smallint, na_mask smallint, question integer) returns text
+language sql immutable as $$
+    select case
+        when na_mask & (1 << (question - 1)) <> 0 then 'NA'
+        when yes_mask & (1 << (question - 1)) <> 0 then 'Yes'
+        else 'No'
+    end;
+$$;
+
+-- Writers may send either form: text answers win, and a row written with
+-- masks only gets its text answers filled in.
+create or replace function set_answer_masks() returns trigger
+language plpgsql as $$
+declare
+    answers text[] := array[new.q1, new.q2, new.q3, new.q4, new.q5, new.q6,
+                            new.q7, new.q8, new.q9, new.q10, new.q11, new.q12];
+begin
+    if array_position(answers, null) is null or new.yes_mask is null or new.na_mask is null then
+        new.yes_mask = answer_yes_mask(answers);
+        new.na_mask = answer_na_mask(answers);
+    else
+        new.q1 = coalesce(new.q1, answer_text(new.yes_mask, new.na_mask, 1));
+        new.q2 = coalesce(new.q2, answer_text(new.yes_mask, new.na_mask, 2));
+        new.q3 = coalesce(new.q3, answer_text(new.yes_mask, new.na_mask, 3));
+        new.q4 = coalesce(new.q4, answer_text(new.yes_mask, new.na_mask, 4));
+        new.q5 = coalesce(new.q5, answer_text(new.yes_mask, new.na_mask, 5));
+        new.q6 = coalesce(new.q6, answer_text(new.yes_mask, new.na_mask, 6));
+        new.q7 = coalesce(new.q7, answer_text(new.yes_mask, new.na_mask, 7));
+        new.q8 = coalesce(new.q8, answer_text(new.yes_mask, new.na_mask, 8));
+        new.q9 = coalesce(new.q9, answer_text(new.yes_mask, new.na_mask, 9));
+        new.q10 = coalesce(new.q10, answer_text(new.yes_mask, new.na_mask, 10));
+        new.q11 = coalesce(new.q11, answer_text(new.yes_mask, new.na_mask, 11));
+        new.q12 = coalesce(new.q12, answer_text(new.yes_mask, new.na_mask, 12));
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists audits_set_answer_masks on audits;
+create trigger audits_set_answer_masks
+    before insert or update on audits
+    for each row execute function set_answer_masks();
+
+-- Backfill without bumping updated_at, so the change feed does not re-send every row
+alter table audits disable trigger audits_set_updated_at;
+update audits
+set yes_mask = answer_yes_mask(array[q1, q2, q3, q4, q5, q6, q7, q8, q9, q10, q11, q12]),
+    na_mask = answer_na_mask(array[q1, q2, q3, q4, q5, q6, q7, q8, q9, q10, q11, q12])
+where yes_mask is null or na_mask is null;
+alter table audits enable trigger audits_set_updated_at;
+
+-- Compatibility view: the text answers derived from the masks, for readers
+-- that should keep working once the q1-q12 columns are dropped.
+create or replace view audits_with_answers as
+select a.id, a.created_at, a.updated_at, a.audit_date, a.department, a.team_leader,
+       a.consultant, a.client_id, a.score, a.scorecard_version, a.comments, a.dedupe_key,
+       a.yes_mask, a.na_mask,
+       answer_text(a.yes_mask, a.na_mask, 1) as q1,
+       answer_text(a.yes_mask, a.na_mask, 2) as q2,
+       answer_text(a.yes_mask, a.na_mask, 3) as q3,
+       answer_text(a.yes_mask, a.na_mask, 4) as q4,
+       answer_text(a.yes_mask, a.na_mask, 5) as q5,
+       answer_text(a.yes_mask, a.na_mask, 6) as q6,
+       answer_text(a.yes_mask, a.na_mask, 7) as q7,
+       answer_text(a.yes_mask, a.na_mask, 8) as q8,
+       answer_text(a.yes_mask, a.na_mask, 9) as q9,
+       answer_text(a.yes_mask, a.na_mask, 10) as q10,
+       answer_text(a.yes_mask, a.na_mask, 11) as q11,
+       answer_text(a.yes_mask, a.na_mask, 12) as q12
+from audits a;
@@ -0,0 +1,5 @@
+-- Department shards: the app loads one department's audits with
+-- department = ... order by audit_date desc, id, paged. This index serves
+-- that filter and order together, so a shard load reads only its own rows.
+create index if not exists audits_department_audit_date_id_idx
+    on audits (department, audit_date desc, id);
@@ -0,0 +1,13 @@
+-- Archival deletes guarded by revision, like apply_audit_edits.
+--
+-- Each entry is {"id": ..., "updated_at": <the revision that was archived>}.
+-- Only rows still at that revision are deleted, so an audit edited after the
+-- archival job read it stays in the table. The deleted ids are returned.
+create or replace function delete_archived_audits(archived jsonb) returns setof bigint
+language sql as $$
+    delete from audits a
+    using jsonb_array_elements(archived) as x
+    where a.id = (x->>'id')::bigint
+      and a.updated_at = (x->>'updated_at')::timestamptz
+    returning a.id;
+$$;